@@ -0,0 +1,13 @@
+from phi.flow import *
+
+
+def smoke_scene(index):
+    world = World()
+    fluid = world.add(Fluid(Domain([64, 64], CLOSED), buoyancy_factor=0.2), physics=IncompressibleFlow())
+    world.add(Inflow(Sphere([8, 8 + np.random.RandomState(index).uniform() * 48], radius=4), rate=0.5))
+    return world, 32
+
+
+if __name__ == '__main__':
+    REPORT = generate_scenes(smoke_scene, 100, '~/phi/data/smoke')  # one simulation per process, resumes interrupted runs
+    print('Generated %d scenes (%d skipped) at %.2f scenes per second' % (REPORT['generated'], REPORT['skipped'], REPORT['scenes_per_second']))
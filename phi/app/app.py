@@ -130,6 +130,7 @@ class App(object):
         self.sequence_stride = stride if stride is not None else 1
         self.framerate = framerate if framerate is not None else stride
         self._custom_properties = custom_properties if custom_properties else {}
+        self.writer = None  # (optional) AsyncWriter for recorded data
         self.figures = PlotlyFigureBuilder()
         self.info('App created. Scene directory is %s' % self.scene.path)
 
@@ -368,6 +369,8 @@ class App(object):
                 step_count += 1
                 if max_steps and step_count >= max_steps:
                     break
+            if self.writer is not None:
+                self.writer.flush()
             if callback is not None:
                 if not self._pause or callback_if_aborted:
                     callback()
@@ -397,7 +400,7 @@ class App(object):
             arrays = [self.get_field(field) for field in self.recorded_fields]
             arrays = [a.staggered_tensor() if isinstance(a, StaggeredGrid) else a.data for a in arrays]
             names = [n.lower() for n in self.recorded_fields]
-            files += write_sim_frame(self.directory, arrays, names, self.steps)
+            files += write_sim_frame(self.directory, arrays, names, self.steps, writer=self.writer)
 
         if files:
             self.message = 'Frame written to %s' % files
@@ -0,0 +1,111 @@
+"""
+Background writing of scene frames.
+
+Compressing frames with `np.savez_compressed` can take longer than the simulation step that produced them.
+An `AsyncWriter` moves the compression and file I/O to a pool of worker threads so that the simulation can continue immediately.
+zlib and file writes release the GIL, so several frames are compressed in parallel.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .fluidformat import write_array_file
+
+
+class AsyncWriter(object):
+
+    def __init__(self, workers=2, max_pending=16):
+        """
+        Writes frame files on background threads.
+
+        Pass an AsyncWriter to `Scene.writer`, `write_sim_frame(writer=...)` or `App.writer` to write frames asynchronously.
+        Arrays are copied when they are enqueued so that callers may reuse or modify them afterwards.
+        If `max_pending` writes are queued, `write()` blocks until one of them has finished.
+
+        Call `flush()` to wait for all pending writes and `close()` when done.
+        Errors raised by a write are re-raised by the next call to `write()`, `flush()` or `close()`.
+
+        :param workers: number of writer threads
+        :param max_pending: maximum number of enqueued writes before `write()` blocks
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(workers)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Condition()
+        self._pending = set()
+        self._errors = []
+        self._closed = False
+
+    def write(self, filename, array):
+        """
+        Enqueues a frame file to be written, see `write_array_file()`.
+        :param filename: path of the frame file, the extension determines the format
+        :param array: NumPy array or tensor convertible to NumPy
+        """
+        assert not self._closed, 'AsyncWriter is closed'
+        self._raise_errors()
+        array = np.array(array, copy=True)
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(write_array_file, filename, array)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+            if future.exception() is not None:
+                self._errors.append(future.exception())
+            self._lock.notify_all()
+        self._slots.release()
+
+    @property
+    def pending(self):
+        """ Number of writes that have not finished yet. """
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """
+        Blocks until all enqueued writes have finished.
+        Raises the first error that occurred while writing.
+        """
+        with self._lock:
+            while self._pending:
+                self._lock.wait()
+        self._raise_errors()
+
+    def close(self):
+        """ Writes all pending frames and stops the worker threads. """
+        if self._closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._closed = True
+            self._executor.shutdown(wait=True)
+
+    def _raise_errors(self):
+        with self._lock:
+            errors, self._errors = self._errors, []
+        if errors:
+            raise errors[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._closed = True
+            self._executor.shutdown(wait=True)
+
+    def __repr__(self):
+        return 'AsyncWriter(workers=%d, pending=%d)' % (self.workers, self.pending)
@@ -0,0 +1,127 @@
+"""
+Generation of simulation data sets on multiple processes.
+
+`generate_scenes()` runs one independent simulation per scene.
+Scenes are distributed over a pool of worker processes and written through `Scene`, so all cores can be used even if a single simulation does not parallelize well.
+Completed scenes are marked in their description.json which allows interrupted runs to be resumed.
+"""
+import logging
+import multiprocessing
+import os
+import time
+from os.path import join
+
+from .fluidformat import Scene, NPZ, FORMATS, create_manifest, slugify
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+
+BLAS_THREAD_VARIABLES = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS')
+""" Environment variables limiting the number of threads used by NumPy and SciPy backends in each worker """
+
+_SETTINGS = ('factory', 'record', 'directory', 'category', 'format', 'resume')
+_WORKER = {}  # settings of the current worker process
+
+
+def generate_scenes(factory, count, directory, category=None, processes=None, blas_threads=1, record=None, format=NPZ, resume=True):
+    """
+    Simulates and writes `count` scenes with indices 0 to count-1 in parallel.
+
+    For each scene, `factory(index)` is called in a worker process and returns a World and the number of frames.
+    The state selected by `record` is written as frame 0, then the world is stepped and written for each further frame.
+    When all frames are written, the scene property 'complete' is set.
+
+    With resume=True, complete scenes are skipped and incomplete scenes from an interrupted run are regenerated.
+
+    Example:
+        def smoke(index):\n
+            world = World()\n
+            world.add(Fluid(Domain([64, 64], CLOSED), buoyancy_factor=0.1 * index), physics=IncompressibleFlow())\n
+            return world, 32\n
+        generate_scenes(smoke, 1000, '~/phi/data/smoke')
+
+    Worker processes are forked where supported. Otherwise, `factory` and `record` must be picklable module-level functions.
+
+    :param factory: function(index) -> (World, frame count)
+    :param count: number of scenes
+    :param directory: base directory or, if category is None, category directory
+    :param category: (optional) category name
+    :param processes: number of worker processes. Defaults to the number of CPUs divided by blas_threads. If 0, all scenes are generated in the calling process.
+    :param blas_threads: maximum number of threads each worker may use for linear algebra
+    :param record: (optional) function(World) -> struct to write. Defaults to the state of the world.
+    :param format: storage format of frames, one of `FORMATS`
+    :param resume: whether to skip complete scenes
+    :return: dict holding the numbers of 'generated' and 'skipped' scenes, the elapsed 'seconds' and 'scenes_per_second'
+    """
+    assert format in FORMATS, 'Unknown scene format: %s' % format
+    directory = os.path.expanduser(directory)
+    if category is None:
+        category = os.path.basename(directory)
+        directory = os.path.dirname(directory)
+    else:
+        category = slugify(category)
+    os.path.isdir(join(directory, category)) or os.makedirs(join(directory, category))
+    if processes is None:
+        processes = max(1, multiprocessing.cpu_count() // max(1, blas_threads))
+    settings = (factory, record, directory, category, format, resume)
+    start_time = time.time()
+    if processes == 0:
+        _WORKER.update(zip(_SETTINGS, settings))
+        results = [_generate_scene(index) for index in range(count)]
+    else:
+        pool = multiprocessing.Pool(processes, initializer=_init_worker, initargs=(blas_threads,) + settings)
+        try:
+            results = []
+            for generated in pool.imap_unordered(_generate_scene, range(count)):
+                results.append(generated)
+                logging.info('%d of %d scenes done' % (len(results), count))
+            pool.close()
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+    seconds = time.time() - start_time
+    generated = sum(results)
+    return {
+        'generated': generated,
+        'skipped': count - generated,
+        'seconds': seconds,
+        'scenes_per_second': generated / seconds if seconds > 0 else float('inf'),
+    }
+
+
+def is_complete(scene):
+    """ Tests whether all frames of a scene generated by `generate_scenes()` were written. """
+    return scene.exists_config() and scene.properties.get('complete', False)
+
+
+def _init_worker(blas_threads, *settings):
+    for variable in BLAS_THREAD_VARIABLES:
+        os.environ[variable] = str(blas_threads)
+    if threadpool_limits is not None:  # environment variables have no effect on libraries that are already loaded
+        _WORKER['limits'] = threadpool_limits(limits=blas_threads)
+    _WORKER.update(zip(_SETTINGS, settings))
+
+
+def _generate_scene(index):
+    scene = Scene(_WORKER['directory'], _WORKER['category'], index)
+    if _WORKER['resume'] and is_complete(scene):
+        return False
+    scene.remove()
+    scene.mkdir()
+    create_manifest(scene.path)
+    if _WORKER['format'] != NPZ:
+        scene.put_property('format', _WORKER['format'])
+    world, frames = _WORKER['factory'](index)
+    record = _WORKER['record'] or (lambda world_: world_.state)
+    for frame in range(frames):
+        if frame > 0:
+            world.step()
+        scene.write(record(world), frame=frame)
+    scene.put_property('frames', frames)
+    scene.put_property('complete', True)
+    return True
@@ -1,4 +1,5 @@
 # coding=utf-8
+import errno
 import inspect
 import json
 import logging
@@ -18,6 +19,14 @@ from phi.physics import field
 from phi.geom import GLOBAL_AXIS_ORDER as physics_config
 
 
+NPZ = 'npz'
+""" Scene format storing each frame of a field in a compressed .npz file. This is the default. """
+NPY = 'npy'
+""" Scene format storing each frame of a field in an uncompressed .npy file which is memory-mapped when read. """
+FORMATS = (NPZ, NPY)
+_EXTENSIONS = tuple('.' + format for format in FORMATS)
+
+
 def read_zipped_array(filename):
     file = np.load(filename)
     array = file[file.files[-1]]  # last entry in npz file has to be data array
@@ -36,19 +45,62 @@ def write_zipped_array(filename, array):
     np.savez_compressed(filename, array)
 
 
+def read_npy_array(filename, mmap=True):
+    """
+    Reads an array written by `write_npy_array()`.
+    With mmap=True, the file is memory-mapped and the result is a read-only view, i.e. no data is copied until it is accessed.
+    :param filename: path to .npy file
+    :param mmap: whether to memory-map the file instead of reading it into memory
+    :return: NumPy array with batch dimension
+    """
+    array = np.load(filename, mmap_mode='r' if mmap else None)
+    if array.shape[0] != 1 or len(array.shape) == 1:
+        array = array[np.newaxis, ...]
+    if not physics_config.is_x_first and array.shape[-1] != 1:
+        array = array[..., ::-1]  # component order in stored files is always XYZ
+    return array
+
+
+def write_npy_array(filename, array):
+    if array.shape[0] == 1 and len(array.shape) > 1:
+        array = array[0, ...]
+    if not physics_config.is_x_first and array.shape[-1] != 1:
+        array = array[..., ::-1]  # component order in stored files is always XYZ
+    np.save(filename, array)
+
+
+def read_array_file(filename):
+    """ Reads a single frame file of any scene format, choosing the reader by file extension. """
+    if filename.endswith('.npy'):
+        return read_npy_array(filename)
+    return read_zipped_array(filename)
+
+
+def write_array_file(filename, array):
+    """
+    Writes a single frame file of any scene format, choosing the writer by file extension.
+    If the directory contains a manifest, the file is added to it.
+    """
+    if filename.endswith('.npy'):
+        write_npy_array(filename, array)
+    else:
+        write_zipped_array(filename, array)
+    _add_to_manifest(filename, array)
+
+
 def _check_same_dimensions(arrays):
     for array in arrays:
         if array.shape[1:-1] != arrays[0].shape[1:-1]:
             raise ValueError("All arrays should have the same spatial dimensions, but got %s and %s" % (array.shape, arrays[0].shape))
 
 
-def read_sim_frame(simpath, fieldnames, frame, set_missing_to_none=True):
+def read_sim_frame(simpath, fieldnames, frame, set_missing_to_none=True, format=None):
     if isinstance(fieldnames, six.string_types):
         fieldnames = [fieldnames]
     for fieldname in fieldnames:
-        filename = _filename(simpath, fieldname, frame)
+        filename = _filename(simpath, fieldname, frame, format)
         if os.path.isfile(filename):
-            yield read_zipped_array(filename)
+            yield read_array_file(filename)
         else:
             if set_missing_to_none:
                 yield None
@@ -56,24 +108,30 @@ def read_sim_frame(simpath, fieldnames, frame, set_missing_to_none=True):
                 raise IOError("Missing data at frame %d: %s" % (frame, filename))
 
 
-def write_sim_frame(simpath, arrays, fieldnames, frame, check_same_dimensions=False):
+def write_sim_frame(simpath, arrays, fieldnames, frame, check_same_dimensions=False, format=NPZ, writer=None):
     if check_same_dimensions:
         _check_same_dimensions(arrays)
     os.path.isdir(simpath) or os.mkdir(simpath)
     if not isinstance(fieldnames, (tuple, list)) and not isinstance(arrays, (tuple, list)):
         fieldnames = [fieldnames]
         arrays = [arrays]
-    filenames = [_filename(simpath, name, frame) for name in fieldnames]
+    filenames = [_filename(simpath, name, frame, format) for name in fieldnames]
     for i in range(len(arrays)):
-        write_zipped_array(filenames[i], arrays[i])
+        if writer is not None:
+            writer.write(filenames[i], arrays[i])
+        else:
+            write_array_file(filenames[i], arrays[i])
     return filenames
 
 
-def _filename(simpath, name, frame):
-    return join(simpath, "%s_%06i.npz" % (name, frame))
+def _filename(simpath, name, frame, format=NPZ):
+    if format is None:  # detect from existing files
+        format = NPY if isfile(_filename(simpath, name, frame, NPY)) else NPZ
+    assert format in FORMATS, 'Unknown scene format: %s' % format
+    return join(simpath, "%s_%06i.%s" % (name, frame, format))
 
 
-def read_sim_frames(simpath, fieldnames=None, frames=None):
+def read_sim_frames(simpath, fieldnames=None, frames=None, format=None):
     if fieldnames is None:
         fieldnames = get_fieldnames(simpath)
     if not fieldnames:
@@ -88,15 +146,18 @@ def read_sim_frames(simpath, fieldnames=None, frames=None):
 
     field_lists = [[] for f in fieldnames]
     for i in frames:
-        fields = list(read_sim_frame(simpath, fieldnames, i, set_missing_to_none=False))
+        fields = list(read_sim_frame(simpath, fieldnames, i, set_missing_to_none=False, format=format))
         for j in range(len(fieldnames)):
             field_lists[j].append(fields[j])
     result = [np.concatenate(list, 0) for list in field_lists]
     return result if not single_fieldname else result[0]
 
 
-def get_fieldnames(simpath):
-    fieldnames_set = {f[:-11] for f in os.listdir(simpath) if f.endswith(".npz")}
+def get_fieldnames(simpath, manifest=None):
+    manifest = read_manifest(simpath) if manifest is None else manifest
+    if manifest is not None:
+        return sorted(manifest)
+    fieldnames_set = {f[:-11] for f in os.listdir(simpath) if f.endswith(_EXTENSIONS)}
     return sorted(fieldnames_set)
 
 
@@ -104,12 +165,15 @@ def first_frame(simpath, fieldname=None):
     return min(get_frames(simpath, fieldname))
 
 
-def get_frames(simpath, fieldname=None, mode="intersect"):
+def get_frames(simpath, fieldname=None, mode="intersect", manifest=None):
+    manifest = read_manifest(simpath) if manifest is None else manifest
     if fieldname is not None:
-        all_frames = {int(f[-10:-4]) for f in os.listdir(simpath) if f.startswith(fieldname) and f.endswith(".npz")}
+        if manifest is not None:
+            return sorted(manifest.get(fieldname, ()))
+        all_frames = {int(f[-10:-4]) for f in os.listdir(simpath) if f.startswith(fieldname) and f.endswith(_EXTENSIONS)}
         return sorted(all_frames)
     else:
-        frames_lists = [get_frames(simpath, fieldname) for fieldname in get_fieldnames(simpath)]
+        frames_lists = [get_frames(simpath, fieldname, manifest=manifest) for fieldname in get_fieldnames(simpath, manifest)]
         if mode.lower() == "intersect":
             intersection = set(frames_lists[0]).intersection(*frames_lists[1:])
             return sorted(intersection)
@@ -120,6 +184,150 @@ def get_frames(simpath, fieldname=None, mode="intersect"):
             return sorted(union)
 
 
+MANIFEST = 'manifest.jsonl'
+""" Name of the file listing all frame files of a scene, one JSON object per line. """
+SCENE_INDEX = 'index.jsonl'
+""" Name of the file listing all scene indices of a category, one JSON object per line. """
+_FRAME_FILE = re.compile(r'^(.+)_(\d{6})\.(npz|npy)$')
+
+
+def create_manifest(simpath):
+    """
+    Starts an empty manifest in a scene directory.
+    From then on, `write_array_file()` appends an entry for every frame file written to that directory.
+    Scenes created with `Scene.create()` have a manifest.
+    """
+    with open(join(simpath, MANIFEST), 'w'):
+        pass
+    _touch_manifest(simpath)  # creating the file may update the directory time stamp after the file time stamp
+
+
+def read_manifest(simpath):
+    """
+    Reads the frame index of a scene without listing the directory.
+
+    The manifest is considered stale if the directory was modified after the last manifest update, e.g. because files were added by other means or deleted.
+    Like other time stamp based checks, this cannot detect changes that happen within the time stamp resolution of the file system.
+
+    :param simpath: scene directory
+    :return: dict mapping field names to dicts mapping frames to entries with keys (field, frame, format, shape, dtype, bytes) or None if the manifest is missing or stale
+    """
+    filename = join(simpath, MANIFEST)
+    try:
+        if os.path.getmtime(simpath) > os.path.getmtime(filename):
+            return None
+        with open(filename) as stream:
+            entries = [json.loads(line) for line in stream if line.strip()]
+    except (IOError, OSError, ValueError):
+        return None
+    manifest = {}
+    for entry in entries:
+        manifest.setdefault(entry['field'], {})[entry['frame']] = entry
+    return manifest
+
+
+def _add_to_manifest(filename, array):
+    simpath, basename = os.path.split(filename)
+    manifest = join(simpath, MANIFEST)
+    match = _FRAME_FILE.match(basename)
+    if match is None or not isfile(manifest):
+        return
+    shape = tuple(array.shape)
+    if shape[0] != 1 or len(shape) == 1:
+        shape = (1,) + shape  # shape returned by read_array_file
+    entry = {'field': match.group(1), 'frame': int(match.group(2)), 'format': match.group(3), 'shape': shape, 'dtype': str(array.dtype), 'bytes': os.path.getsize(filename)}
+    _append_lines(manifest, [entry])
+
+
+def _touch_manifest(simpath):
+    # Marks the manifest as up to date after creating files that are not frames
+    filename = join(simpath, MANIFEST)
+    if isfile(filename):
+        os.utime(filename, None)
+
+
+def _append_lines(filename, entries):
+    # A single write in append mode keeps lines intact when several threads or processes append concurrently
+    with open(filename, 'a') as stream:
+        stream.write(''.join([json.dumps(entry) + '\n' for entry in entries]))
+
+
+def _read_scene_index(category_path, check_time=True):
+    filename = join(category_path, SCENE_INDEX)
+    try:
+        if check_time and os.path.getmtime(category_path) > os.path.getmtime(filename):
+            return None
+        with open(filename) as stream:
+            entries = [json.loads(line) for line in stream if line.strip()]
+    except (IOError, OSError, ValueError):
+        return None
+    indices = set()
+    for entry in entries:
+        if entry.get('removed', False):
+            indices.discard(entry['index'])
+        else:
+            indices.add(entry['index'])
+    return sorted(indices)
+
+
+def _scan_scene_indices(category_path):
+    return sorted(int(name[4:]) for name in os.listdir(category_path) if name.startswith("sim_"))
+
+
+def _reserve_scene_indices(category_path, start, count):
+    """
+    Creates `count` scene directories with consecutive indices, starting at `start` or the lowest free index above.
+    Since os.mkdir fails if the directory exists, concurrent processes never obtain the same index.
+    :return: first reserved index
+    """
+    while True:
+        created = []
+        try:
+            for index in range(start, start + count):
+                os.mkdir(join(category_path, "sim_%06d" % index))
+                created.append(index)
+            return start
+        except OSError as err:
+            for index in created:
+                os.rmdir(join(category_path, "sim_%06d" % index))
+            if err.errno != errno.EEXIST:
+                raise
+            start += len(created) + 1
+
+
+def _register_scene_indices(category_path, indices, existing):
+    """
+    Adds newly reserved scene indices to the category index.
+    If there is no index yet, it is created exclusively from the scenes that existed before the reservation so that other processes append to it instead.
+    """
+    filename = join(category_path, SCENE_INDEX)
+    try:
+        if not isfile(filename):
+            try:
+                descriptor = os.open(filename, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except OSError as err:
+                if err.errno != errno.EEXIST:
+                    raise
+            else:
+                with os.fdopen(descriptor, 'w') as stream:
+                    stream.write(''.join([json.dumps({'index': index}) + '\n' for index in sorted(existing) + list(indices)]))
+                os.utime(filename, None)
+                return
+        _append_lines(filename, [{'index': index} for index in indices])
+    except (IOError, OSError):
+        warnings.warn('Could not update scene index in %s' % category_path)
+
+
+def _write_scene_index(category_path, indices):
+    # The index is only a cache, so this fails silently, e.g. for read-only datasets
+    try:
+        with open(join(category_path, SCENE_INDEX), 'w') as stream:
+            stream.writelines([json.dumps({'index': index}) + '\n' for index in indices])
+        os.utime(join(category_path, SCENE_INDEX), None)
+    except (IOError, OSError):
+        pass
+
+
 def _copy_file(source, target):
     shutil.copy(source, target)
     try:
@@ -135,6 +343,7 @@ class Scene(object):
         self.category = category
         self.index = index
         self._properties = None
+        self.writer = None  # (optional) AsyncWriter used by write_sim_frame()
 
     @property
     def path(self):
@@ -144,6 +353,7 @@ class Scene(object):
         path = join(self.path, name)
         if create and not os.path.isdir(path):
             os.mkdir(path)
+            _touch_manifest(self.path)
         return path
 
     def _init_properties(self):
@@ -151,7 +361,8 @@ class Scene(object):
             return
         dfile = join(self.path, "description.json")
         if isfile(dfile):
-            self._properties = json.load(dfile)
+            with open(dfile) as stream:
+                self._properties = json.load(stream)
         else:
             self._properties = {}
 
@@ -168,21 +379,31 @@ class Scene(object):
         self._properties = dict
         with open(join(self.path, "description.json"), "w") as out:
             json.dump(self._properties, out, indent=2)
+        _touch_manifest(self.path)
 
     def put_property(self, key, value):
         self._init_properties()
         self._properties[key] = value
         with open(join(self.path, "description.json"), "w") as out:
             json.dump(self._properties, out, indent=2)
+        _touch_manifest(self.path)
+
+    @property
+    def format(self):
+        """
+        Storage format of the frame files, one of `FORMATS`.
+        It is stored in description.json under the key 'format'. Scenes without that entry use NPZ.
+        """
+        return self.properties.get('format', NPZ)
 
     def read_sim_frames(self, fieldnames=None, frames=None):
-        return read_sim_frames(self.path, fieldnames=fieldnames, frames=frames)
+        return read_sim_frames(self.path, fieldnames=fieldnames, frames=frames, format=self.format)
 
     def read_array(self, fieldname, frame):
-        return next(read_sim_frame(self.path, [fieldname], frame, set_missing_to_none=False))
+        return next(read_sim_frame(self.path, [fieldname], frame, set_missing_to_none=False, format=self.format))
 
     def write_sim_frame(self, arrays, fieldnames, frame, check_same_dimensions=False):
-        write_sim_frame(self.path, arrays, fieldnames, frame, check_same_dimensions=check_same_dimensions)
+        write_sim_frame(self.path, arrays, fieldnames, frame, check_same_dimensions=check_same_dimensions, format=self.format, writer=self.writer)
 
     def write(self, obj, names=None, frame=0):
         if struct.isstruct(obj):
@@ -208,6 +429,14 @@ class Scene(object):
         else:
             return self.read_array('unnamed', frame)
 
+    @property
+    def manifest(self):
+        """
+        Index of all frame files of this scene, see `read_manifest()`.
+        None if the scene has no manifest or it is out of date.
+        """
+        return read_manifest(self.path)
+
     @property
     def fieldnames(self):
         return get_fieldnames(self.path)
@@ -244,27 +473,44 @@ class Scene(object):
 
     def mkdir(self, subdir=None):
         path = self.path
-        isdir(path) or os.mkdir(path)
+        if not isdir(path):
+            os.mkdir(path)
+            if isfile(join(self.dir, self.category, SCENE_INDEX)):  # otherwise the index is rebuilt by Scene.list
+                _register_scene_indices(join(self.dir, self.category), [self.index], ())
         if subdir is not None:
             subpath = join(path, subdir)
             isdir(subpath) or os.mkdir(subpath)
+            _touch_manifest(path)
 
     def remove(self):
+        self._properties = None
         if isdir(self.path):
             shutil.rmtree(self.path)
+            index_file = join(self.dir, self.category, SCENE_INDEX)
+            if isfile(index_file):
+                _append_lines(index_file, [{'index': self.index, 'removed': True}])
 
     def data_paths(self, frames, field_names):
         for frame in frames:
-            yield tuple([_filename(self.path, name, frame) for name in field_names])
+            yield tuple([_filename(self.path, name, frame, self.format) for name in field_names])
 
     @staticmethod
-    def create(directory, category=None, count=1, mkdir=True, copy_calling_script=True):
-        if count > 1:
-            scenes = []
-            for _ in range(count):
-                scenes.append(Scene.create(directory, category, 1, mkdir, copy_calling_script))
-            return SceneBatch(scenes)
-        # Single scene
+    def create(directory, category=None, count=1, mkdir=True, copy_calling_script=True, format=NPZ):
+        """
+        Creates new scenes with unused indices in a category.
+
+        With mkdir=True, the scene directories are reserved atomically so that several processes can create scenes in the same category concurrently.
+        All `count` scenes receive consecutive indices.
+
+        :param directory: base directory or, if category is None, category directory
+        :param category: (optional) category name
+        :param count: number of scenes to create
+        :param mkdir: whether to create the scene directories
+        :param copy_calling_script: whether to copy the calling script into each scene
+        :param format: storage format of frames, one of `FORMATS`
+        :return: Scene if count == 1, else SceneBatch
+        """
+        assert format in FORMATS, 'Unknown scene format: %s' % format
         directory = os.path.expanduser(directory)
         if category is None:
             category = os.path.basename(directory)
@@ -274,24 +520,33 @@ class Scene(object):
 
         scenedir = join(directory, category)
         if not isdir(scenedir):
-            os.makedirs(scenedir)
-            next_index = 0
-        else:
-            indices = [int(name[4:]) for name in os.listdir(scenedir) if name.startswith("sim_")]
-            if not indices:
-                next_index = 0
-            else:
-                next_index = max(indices) + 1
-        scene = Scene(directory, category, next_index)
-        if mkdir:
-            scene.mkdir()
-        if copy_calling_script:
             try:
-                assert mkdir
-                scene.copy_calling_script()
-            except IOError as err:
-                warnings.warn('Failed to copy calling script to scene during Scene.create().\nCause: %s' % err)
-        return scene
+                os.makedirs(scenedir)
+            except OSError:
+                if not isdir(scenedir):  # otherwise created concurrently
+                    raise
+        # --- The index only serves as a hint here, taken indices are skipped during reservation ---
+        existing = _read_scene_index(scenedir, check_time=False)
+        if existing is None:
+            existing = _scan_scene_indices(scenedir)
+        next_index = max(existing) + 1 if existing else 0
+        if mkdir:
+            next_index = _reserve_scene_indices(scenedir, next_index, count)
+            _register_scene_indices(scenedir, range(next_index, next_index + count), existing)
+        scenes = [Scene(directory, category, next_index + i) for i in range(count)]
+        for scene in scenes:
+            if mkdir:
+                create_manifest(scene.path)
+            if format != NPZ:
+                assert mkdir, 'The scene format is stored in the scene directory which requires mkdir=True'
+                scene.put_property('format', format)
+            if copy_calling_script:
+                try:
+                    assert mkdir
+                    scene.copy_calling_script()
+                except IOError as err:
+                    warnings.warn('Failed to copy calling script to scene during Scene.create().\nCause: %s' % err)
+        return scenes[0] if count == 1 else SceneBatch(scenes)
 
     @staticmethod
     def list(directory, category=None, indexfilter=None, max_count=None):
@@ -304,7 +559,11 @@ class Scene(object):
             root_path = join(directory, category)
         if not os.path.isdir(root_path):
             return []
-        indices = [int(sim[4:]) for sim in os.listdir(root_path) if sim.startswith("sim_")]
+        indices = _read_scene_index(root_path)
+        if indices is None:
+            indices = _scan_scene_indices(root_path)
+            if indices:
+                _write_scene_index(root_path, indices)
         if indexfilter:
             indices = [i for i in indices if indexfilter(i)]
         if max_count and len(indices) >= max_count:
@@ -332,13 +591,24 @@ class Scene(object):
 class SceneBatch(Scene):
 
     def __init__(self, scenes):
-        Scene.__init__(self, scenes[0].dir, scenes[0].category, scenes[0].index)
         self.scenes = scenes
+        writer = scenes[0].writer
+        Scene.__init__(self, scenes[0].dir, scenes[0].category, scenes[0].index)
+        self.writer = writer
 
     @property
     def batch_size(self):
         return len(self.scenes)
 
+    @property
+    def writer(self):
+        return self.scenes[0].writer
+
+    @writer.setter
+    def writer(self, writer):
+        for scene in self.scenes:
+            scene.writer = writer
+
     def write_sim_frame(self, arrays, fieldnames, frame, check_same_dimensions=False):
         for array in arrays:
             assert array.shape[0] == self.batch_size or array.shape[0] == 1,\
@@ -0,0 +1,106 @@
+"""
+Decoded frames shared between processes.
+
+Decompressing npz frames is often the most expensive part of loading training data.
+When several training processes read the same scenes, a `SharedFrameCache` stores each decoded frame once as an uncompressed .npy file in shared memory (/dev/shm where available).
+All processes then memory-map these files so the frames occupy physical memory only once.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from os.path import join, isdir
+
+import numpy as np
+
+
+class SharedFrameCache(object):
+
+    def __init__(self, directory=None, capacity=2 * 1024 ** 3):
+        """
+        Cross-process cache of decoded frame files.
+
+        Pass the same directory to `BatchReader(shared_cache=...)` in all processes that should share frames.
+        Entries are keyed by the path and modification time of the frame file, so rewritten frames are decoded again.
+        When the cache exceeds `capacity` bytes, the least recently used files are deleted.
+        Processes that still map a deleted file keep their data.
+
+        :param directory: cache directory, defaults to a directory in /dev/shm or the temp directory
+        :param capacity: maximum total size of all cached frames in bytes
+        """
+        if directory is None:
+            directory = join('/dev/shm' if isdir('/dev/shm') else tempfile.gettempdir(), 'phiflow_frames')
+        self.directory = os.path.expanduser(directory)
+        isdir(self.directory) or os.makedirs(self.directory, exist_ok=True)
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._written = 0  # bytes written since the last eviction pass
+
+    def get(self, filename, load_function):
+        """
+        Returns the cached frame stored in `filename` or decodes and caches it.
+        :param filename: path of the frame file
+        :param load_function: function() -> NumPy array, decodes the frame
+        :return: read-only memory-mapped NumPy array
+        """
+        cache_file = self._cache_file(filename)
+        try:
+            array = np.load(cache_file, mmap_mode='r')
+            os.utime(cache_file)  # mark as recently used
+            with self._lock:
+                self.hits += 1
+            return array
+        except (IOError, OSError, ValueError):
+            pass
+        array = np.ascontiguousarray(load_function())
+        temporary = '%s.%d.%d.tmp' % (cache_file, os.getpid(), threading.current_thread().ident)
+        with open(temporary, 'wb') as file:
+            np.save(file, array)
+        os.replace(temporary, cache_file)  # atomic, readers never see partial files
+        with self._lock:
+            self.misses += 1
+            self._written += array.nbytes
+            evict = self._written > self.capacity // 8
+            if evict:
+                self._written = 0
+        if evict:
+            self.evict()
+        return np.load(cache_file, mmap_mode='r')
+
+    def evict(self, capacity=None):
+        """
+        Deletes least recently used frames until the cache holds at most `capacity` bytes.
+        :param capacity: target size in bytes, defaults to `self.capacity`
+        """
+        capacity = self.capacity if capacity is None else capacity
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npy'):
+                try:
+                    stat = os.stat(join(self.directory, name))
+                    entries.append((stat.st_mtime, stat.st_size, name))
+                except OSError:  # deleted by another process
+                    pass
+        size = sum(entry[1] for entry in entries)
+        for _, file_size, name in sorted(entries):
+            if size <= capacity:
+                break
+            try:
+                os.remove(join(self.directory, name))
+            except OSError:
+                pass
+            size -= file_size
+
+    def clear(self):
+        """ Deletes all cached frames, including those written by other processes. """
+        self.evict(0)
+
+    def _cache_file(self, filename):
+        filename = os.path.abspath(filename)
+        key = '%s|%d' % (filename, os.stat(filename).st_mtime_ns)
+        return join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.npy')
+
+    def __repr__(self):
+        return 'SharedFrameCache(%s, hits=%d, misses=%d)' % (self.directory, self.hits, self.misses)
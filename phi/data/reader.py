@@ -1,4 +1,5 @@
 import math
+import threading
 from bisect import bisect_left
 
 import six
@@ -9,11 +10,14 @@ try:
 except ImportError:
     # Python 2.7
     from collections import Iterable
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from sys import getsizeof
 
 import numpy as np
 from phi import struct
 
+from .source import shared_reads
 from .stream import DataStream, SourceStream
 
 SKIP = 'skip'
@@ -23,8 +27,22 @@ CLIP = 'clip'
 
 class BatchReader(object):
 
-    def __init__(self, dataset, fields):
+    def __init__(self, dataset, fields, threads=4, cache_size=512 * 1024 ** 2, shared_cache=None):
+        """
+        Loads batches of data from a Dataset.
+
+        Loaded examples are kept in a least-recently-used cache of `cache_size` bytes, see `cache_info()`.
+
+        :param dataset: Dataset
+        :param fields: stream, stream name or struct thereof that determines the structure of the loaded batches
+        :param threads: number of threads reading files in parallel. If 0, files are read on the calling thread.
+        :param cache_size: capacity of the example cache in bytes. If 0, examples are not cached.
+        :param shared_cache: (optional) SharedFrameCache to share decoded frames with other processes
+        """
         self._dataset = dataset
+        self.threads = threads
+        self.shared_cache = shared_cache
+        self._executor = ThreadPoolExecutor(threads) if threads > 0 else None  # threads are started on demand
         self._index = 0
         self._streams = []
         self._fields = fields
@@ -37,7 +55,7 @@ class BatchReader(object):
                 self._streams.append(SourceStream(stream))
             else:
                 assert False
-        self._cache = _BatchCache()
+        self._cache = _BatchCache(cache_size)
         self.indexcache = None
         self._dataset_changed()
 
@@ -46,21 +64,25 @@ class BatchReader(object):
         return self._dataset
 
     def _get_batch(self, indices):
-        data_list = self._cache.get(indices, self._load, add_to_cache=True)
-        data = list_swap_axes(data_list)
+        data_list = self._cache.get(indices, self._load, add_to_cache=self._cache.capacity > 0)
+        data = _assemble_batch(data_list, len(self._streams))
         data_map = {self.streams[i]: data[i] for i in range(len(self._streams))}
         return struct.map(lambda x, is_stream: data_map[x] if is_stream else x, struct.zip([self._fields, self.stream_mask]), content_type=struct.INVALID)
 
     def _load(self, indices):
-        result = []
-        for index in indices:
-            arrays = []
-            for stream in self._streams:
-                source, local_index = self.indexcache.get_source_and_local_index(index)
-                data = stream.get(source, [local_index])
-                array = next(iter(data))  # TODO group frames by source before calling get
-                arrays.append(array)
-            result.append(arrays)
+        result = [[None] * len(self._streams) for _ in indices]
+        if not self._streams:
+            return result
+        # --- Group by source so that each stream is queried once per source ---
+        groups = OrderedDict()
+        for position, (source, local_index) in enumerate(zip(*self.indexcache.get_sources_and_local_indices(indices))):
+            groups.setdefault(id(source), (source, []))[1].append((position, local_index))
+        with shared_reads(self._executor, self.shared_cache):
+            for source, items in groups.values():
+                local_indices = [local_index for _, local_index in items]
+                for stream_index, stream in enumerate(self._streams):
+                    for (position, _), array in zip(items, stream.get(source, local_indices)):
+                        result[position][stream_index] = array
         return result
 
     def __getitem__(self, item):
@@ -81,35 +103,71 @@ class BatchReader(object):
     def __len__(self):
         return self._len
 
+    def cache_info(self):
+        """
+        Returns statistics of the example cache.
+        :return: dict holding the numbers of cache 'hits' and 'misses', the current 'size' and 'capacity' in bytes and the number of cached 'examples'
+        """
+        return self._cache.info()
+
     def _dataset_changed(self):
         self._cache.clear()
         # Compute length
         if len(self._streams) == 0:
             self._len = 0
+            self.source_sizes = ()
             self.indexcache = None
         else:
             stream = self._streams[0]
-            self._len = np.sum([stream.size(source, lookup=True) for source in self._dataset.sources], dtype=np.int64)
-            self.indexcache = _IndexCache(self._dataset.sources, self._streams[0])
-
-    def all_batches(self, batch_size=1, last=CLIP, loop=False):
-        return _AdaptiveBatchIterator(self, batch_size, last, loop)
+            self.source_sizes = tuple(stream.size(source, lookup=True) for source in self._dataset.sources)
+            self._len = np.sum(self.source_sizes, dtype=np.int64)
+            self.indexcache = _IndexCache(self._dataset.sources, self._streams[0], self.source_sizes)
+
+    def all_batches(self, batch_size=1, last=CLIP, loop=False, prefetch=0, sampler=None, state=None):
+        """
+        Iterates over the data in batches.
+
+        The iterator's `state` holds the current epoch and position.
+        Passing it to `all_batches()` later continues the iteration at the same point which allows interrupted training runs to resume.
+
+        :param batch_size: number of examples per batch
+        :param last: how to handle the last batch if the number of examples is not divisible by batch_size. CLIP returns a smaller batch, SKIP drops it and WRAP fills it with the first examples.
+        :param loop: whether to restart from the beginning after the last batch
+        :param prefetch: number of batches loaded in advance on a background thread. If 0, batches are loaded when requested.
+        :param sampler: (optional) BlockShuffle determining the order of examples in each epoch. If None, examples are iterated in order.
+        :param state: (optional) `state` of a previous iterator to resume from
+        :return: iterator
+        """
+        if prefetch > 0:
+            iterator = _PrefetchingBatchIterator(self, batch_size, last, loop, sampler, prefetch)
+        else:
+            iterator = _AdaptiveBatchIterator(self, batch_size, last, loop, sampler)
+        if state is not None:
+            iterator.epoch, iterator.index = state['epoch'], state['index']
+        return iterator
 
 
 class _IndexCache(object):
 
-    def __init__(self, sources, stream, randomize_scene_order=False, randomize_frame_order=False, randomize_indices=True):
-        if randomize_scene_order and not randomize_indices:
-            # python2 doesnt yet support indexing via array, manually permutate
-            self.sources = []
-            p = np.random.permutation(len(sources))
-            for i in range(len(sources)):
-                self.sources.append(sources[p[i]])
-            # replace sometime with original code: self.sources = sources[np.random.permutation(len(sources))]
-        else:
-            self.sources = sources
+    def __init__(self, sources, stream, sizes=None):
+        self.sources = sources
         self.datastream = stream
-        self.accumulated_sizes = []
+        # Known sizes are accumulated up front so that lookups never modify the cache, e.g. when called from several threads
+        self.accumulated_sizes = [] if sizes is None else [int(size) for size in np.cumsum(sizes)]
+
+    def get_sources_and_local_indices(self, indices):
+        """
+        Vectorized version of `get_source_and_local_index()`.
+        :param indices: list of global indices
+        :return: list of sources, NumPy array of local indices
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if len(indices) == 0:
+            return [], indices
+        self.get_source_and_local_index(int(np.max(indices)))  # look up sizes of all required sources
+        positions = np.searchsorted(self.accumulated_sizes, indices + 1)
+        offsets = np.concatenate([[0], self.accumulated_sizes])[positions]
+        return [self.sources[position] for position in positions], indices - offsets
 
     def get_source_and_local_index(self, index):
         max_size = 0 if len(self.accumulated_sizes) == 0 else self.accumulated_sizes[-1]
@@ -125,64 +183,69 @@ class _IndexCache(object):
 
 class _BatchCache(object):
 
-    def __init__(self, capacity=512 * 1024 * 1024):
-        self._access_order = []  # most recent ones last
-        self._data_by_stream_by_index = {}
+    def __init__(self, capacity=512 * 1024 ** 2):
+        self._lock = threading.Lock()  # the cache is shared by prefetching iterators and direct reader access
+        self._data_by_index = OrderedDict()  # least recently used first
         self._size = 0
         self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
 
     def get(self, indices, lookup_function, add_to_cache=True):
-        indices = np.array(indices)
-        are_cached = np.array([index in self._data_by_stream_by_index for index in indices])
-        uncached_indices = indices[~are_cached]
-        cached_indices = indices[are_cached]
-
-        if len(uncached_indices) > 0:
-            uncached_data = lookup_function(uncached_indices)
+        with self._lock:
+            entries = [self._data_by_index.get(index) for index in indices]
+            result = [None if entry is None else entry[0] for entry in entries]
+            uncached_indices = list(OrderedDict.fromkeys([index for index, entry in zip(indices, entries) if entry is None]))
+            self.misses += len(uncached_indices)
+            self.hits += len(result) - len(uncached_indices)
+            for index, entry in zip(indices, entries):
+                if entry is not None:
+                    self._data_by_index.move_to_end(index)
+        if uncached_indices:  # loaded without holding the lock, another thread may load the same examples
+            uncached_data = dict(zip(uncached_indices, lookup_function(uncached_indices)))
             if add_to_cache:
-                for index, data in zip(uncached_indices, uncached_data):
-                    self.add(index, data)
-        else:
-            uncached_data = []
-
-        for index in cached_indices:
-            self._access_order.remove(index)
-            self._access_order.append(index)
-
-        result = []
-        for index in indices:
-            if index in cached_indices:
-                result.append(self._data_by_stream_by_index[index])
-            else:
-                result.append(uncached_data[int(np.where(uncached_indices == index)[0])])
+                for index in uncached_indices:
+                    self.add(index, uncached_data[index])
+            result = [uncached_data[index] if data is None else data for index, data in zip(indices, result)]
         return result
 
     def clear(self):
-        self._access_order = []
-        self._data_by_stream_by_index = {}
-        self._size = 0
+        with self._lock:
+            self._data_by_index.clear()
+            self._size = 0
 
     def add(self, index, data):
-        data_size = np.sum([getsizeof(array) for array in data])
-        self.remove_old(self.capacity - data_size)
-        self._access_order.append(index)
-        assert index not in self._data_by_stream_by_index
-        self._data_by_stream_by_index[index] = data
-        self._size += data_size
+        data_size = _nbytes(data)
+        if data_size > self.capacity:
+            return
+        with self._lock:
+            if index in self._data_by_index:  # added concurrently
+                return
+            self._remove_old(self.capacity - data_size)
+            self._data_by_index[index] = data, data_size
+            self._size += data_size
 
     def remove_old(self, target_capacity):
-        if target_capacity < 0:
-            target_capacity = 0
-        while self._size > target_capacity:
-            index = self._access_order.pop(0)
-            data = self._data_by_stream_by_index.pop(index)
-            for array in data:
-                self._size -= getsizeof(array)
+        with self._lock:
+            self._remove_old(target_capacity)
+
+    def _remove_old(self, target_capacity):
+        while self._size > max(target_capacity, 0):
+            _data, data_size = self._data_by_index.popitem(last=False)[1]
+            self._size -= data_size
+
+    def info(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': self._size, 'capacity': self.capacity, 'examples': len(self._data_by_index)}
+
+
+def _nbytes(data):
+    return int(sum(array.nbytes if isinstance(array, np.ndarray) and array.dtype != object else getsizeof(array) for array in data))
 
 
 class _AdaptiveBatchIterator(object):
 
-    def __init__(self, batchreader, batch_size, last, loop):
+    def __init__(self, batchreader, batch_size, last, loop, sampler=None):
         assert isinstance(batchreader, BatchReader)
         assert batch_size > 0
         assert last in (SKIP, CLIP, WRAP)
@@ -191,12 +254,27 @@ class _AdaptiveBatchIterator(object):
         self.batch_size = batch_size
         self.last = last
         self.loop = loop
+        self.sampler = sampler
+        self.epoch = 0
         self.index = 0
 
+    @property
+    def state(self):
+        """ Position of the iterator, see `BatchReader.all_batches()` """
+        return self._position()
+
+    def _position(self):
+        return {'epoch': self.epoch, 'index': self.index}
+
     def __iter__(self):
         return self
 
     def __next__(self):
+        return self.reader[self._next_indices()]
+
+    next = __next__
+
+    def _next_indices(self):
         start = self.index
         stop = start + self.batch_size
 
@@ -208,7 +286,8 @@ class _AdaptiveBatchIterator(object):
                 else:
                     start = 0
                     stop = min(self.batch_size, len(self.reader))
-            indices = range(start, stop)
+                    self.epoch += 1
+            positions = range(start, stop)
         elif self.last == SKIP:
             if stop > len(self.reader):
                 start = 0
@@ -218,20 +297,26 @@ class _AdaptiveBatchIterator(object):
                         raise StopIteration()
                     else:
                         raise AssertionError("Looping iterator with 0 batches")
-            indices = range(start, stop)
+                self.epoch += 1
+            positions = range(start, stop)
         elif self.last == WRAP:
             # Repeat first frames at the end
-            indices = range(start, start + self.batch_size)
-            indices = [i % len(self.reader) for i in indices]
+            positions = range(start, start + self.batch_size)
             stop = (start + self.batch_size) % len(self.reader)
         else:
             raise AssertionError()
 
-        batch = self.reader[indices]
+        indices = [self._example_index(self.epoch, position) for position in positions]
+        self.epoch += (start + self.batch_size) // len(self.reader) if self.last == WRAP else 0
         self.index = stop
-        return batch
+        return indices
 
-    next = __next__
+    def _example_index(self, epoch, position):
+        epoch += position // len(self.reader)
+        position %= len(self.reader)
+        if self.sampler is None:
+            return position
+        return int(self.sampler.order(self.reader.source_sizes, epoch)[position])
 
     def __len__(self):
         assert not self.loop, "Looping iterator has no finite length"
@@ -241,6 +326,89 @@ class _AdaptiveBatchIterator(object):
             return int(math.ceil(float(len(self.reader)) / self.batch_size))
 
 
+class _PrefetchingBatchIterator(_AdaptiveBatchIterator):
+
+    def __init__(self, batchreader, batch_size, last, loop, sampler, prefetch):
+        """
+        Loads up to `prefetch` batches in the background while the previous batches are being processed.
+        Batches are returned in the same order as by `_AdaptiveBatchIterator`.
+        Files within a batch are read in parallel by the BatchReader so a single loader thread suffices.
+        The reader may still be used directly while batches are prefetched.
+        """
+        _AdaptiveBatchIterator.__init__(self, batchreader, batch_size, last, loop, sampler)
+        self.prefetch = prefetch
+        self._executor = ThreadPoolExecutor(1)
+        self._futures = deque()  # (future, state after the batch)
+        self._exhausted = False
+        self._state = None  # position after the last returned batch
+
+    @property
+    def state(self):
+        """ Position after the last returned batch, excluding prefetched batches """
+        return self._position() if self._state is None else self._state
+
+    def __next__(self):
+        assert self._executor is not None, 'Iterator is closed'
+        while not self._exhausted and len(self._futures) < self.prefetch + 1:
+            try:
+                indices = self._next_indices()
+            except StopIteration:
+                self._exhausted = True
+            else:
+                self._futures.append((self._executor.submit(self.reader.__getitem__, indices), self._position()))
+        if not self._futures:
+            raise StopIteration()
+        future, state = self._futures.popleft()
+        batch = future.result()
+        self._state = state
+        return batch
+
+    next = __next__
+
+    def close(self):
+        """ Discards all prefetched batches and stops the loader thread. """
+        if self._executor is None:
+            return
+        for future, _state in self._futures:
+            future.cancel()
+        self._futures.clear()
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __del__(self):
+        if getattr(self, '_executor', None) is not None:
+            self._executor.shutdown(wait=False)
+
+
+def _assemble_batch(data_list, stream_count):
+    """
+    Combines the data of individual examples into one array per stream.
+    The result arrays are allocated once and filled instead of concatenating.
+    :param data_list: list holding for each example a list of arrays, one per stream
+    :return: list of arrays, one per stream
+    """
+    result = []
+    for stream_index in range(stream_count):
+        arrays = [np.asarray(example[stream_index]) for example in data_list]
+        first = arrays[0]
+        if any(array.shape[1:] != first.shape[1:] or array.dtype != first.dtype for array in arrays):
+            result.append(np.concatenate(arrays, axis=0))
+            continue
+        batch = np.empty((sum(array.shape[0] for array in arrays),) + first.shape[1:], first.dtype)
+        offset = 0
+        for array in arrays:
+            batch[offset:offset + array.shape[0]] = array
+            offset += array.shape[0]
+        result.append(batch)
+    return result
+
+
 def list_swap_axes(list_in, concatenate=True):
     if len(list_in) == 0:
         return list_in
@@ -0,0 +1,67 @@
+"""
+Shuffling of disk-backed datasets with near-sequential file access.
+
+A global random permutation of all frames reads files from all over the disk in random order which defeats OS caching.
+`BlockShuffle` only shuffles the scene order globally and mixes frames through a bounded shuffle buffer so that only a few scenes are accessed at any time.
+"""
+import numpy as np
+
+
+class BlockShuffle(object):
+
+    def __init__(self, block_size=8, buffer_size=256, seed=None):
+        """
+        Locality-aware shuffling of examples.
+
+        Each epoch, the scenes are visited in random order.
+        Their examples are split into blocks of `block_size` consecutive examples which pass through a shuffle buffer holding `buffer_size` examples.
+        Every example is therefore drawn from one of the last scenes read while examples within a block stay in order.
+
+        The order only depends on `seed` and the epoch which allows interrupted training runs to resume exactly.
+
+        Pass a BlockShuffle to `BatchReader.all_batches(sampler=...)` or `phi.tf.data.Dataset.shuffle(sampler=...)`.
+
+        :param block_size: number of consecutive examples that are kept together
+        :param buffer_size: number of examples held in the shuffle buffer. Larger buffers improve randomness but access more scenes at once.
+        :param seed: (optional) random seed. If None, a random seed is chosen.
+        """
+        assert block_size > 0 and buffer_size > 0
+        self.block_size = block_size
+        self.buffer_size = buffer_size
+        self.seed = seed if seed is not None else int(np.random.randint(2 ** 31))
+        self._cached = None  # (source sizes, epoch, order)
+
+    @property
+    def buffer_blocks(self):
+        """ Number of blocks held in the shuffle buffer """
+        return max(1, self.buffer_size // self.block_size)
+
+    def order(self, source_sizes, epoch=0):
+        """
+        Computes the order in which the examples of all sources are visited in the given epoch.
+        :param source_sizes: number of examples in each source. Examples of source i have the global indices following those of source i-1.
+        :param epoch: epoch number
+        :return: NumPy array holding a permutation of all global indices
+        """
+        source_sizes = tuple(int(size) for size in source_sizes)
+        if self._cached is not None and self._cached[:2] == (source_sizes, epoch):
+            return self._cached[2]
+        random = np.random.RandomState([self.seed, epoch])
+        offsets = np.cumsum((0,) + source_sizes)
+        stream = np.concatenate([np.arange(offsets[i], offsets[i + 1]) for i in random.permutation(len(source_sizes))] + [np.zeros(0, np.int64)])
+        blocks = [stream[i:i + self.block_size] for i in range(0, len(stream), self.block_size)]
+        buffer, result = [], []
+        for block in blocks:
+            if len(buffer) < self.buffer_blocks:
+                buffer.append(block)
+            else:
+                position = random.randint(len(buffer))
+                result.append(buffer[position])
+                buffer[position] = block
+        result.extend(buffer[i] for i in random.permutation(len(buffer)))
+        order = np.concatenate(result + [np.zeros(0, np.int64)]).astype(np.int64)
+        self._cached = (source_sizes, epoch, order)
+        return order
+
+    def __repr__(self):
+        return 'BlockShuffle(block_size=%d, buffer_size=%d, seed=%d)' % (self.block_size, self.buffer_size, self.seed)
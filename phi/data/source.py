@@ -1,3 +1,29 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+_CONTEXT = threading.local()
+
+
+@contextmanager
+def shared_reads(executor=None, frame_cache=None):
+    """
+    Within this context, `SceneSource.get()` reads each frame file only once and reads the frames of one call in parallel.
+    This is used by `BatchReader` so that frames requested by several streams, e.g. from `consecutive_frames()`, are only loaded once per batch.
+    The context is local to the calling thread.
+
+    :param executor: (optional) concurrent.futures.Executor used to read frames in parallel
+    :param frame_cache: (optional) SharedFrameCache holding frames decoded by other processes
+    """
+    previous = getattr(_CONTEXT, 'reads', None)
+    _CONTEXT.reads = ({}, executor, frame_cache)
+    try:
+        yield
+    finally:
+        _CONTEXT.reads = previous
+
+
 class UnknownShapeError(RuntimeError):
 
     def __init__(self, *args, **kwargs):
@@ -60,8 +86,25 @@ class SceneSource(DataSource):
         self._shape_map = shape_map if shape_map is not None else dict()
 
     def get(self, fieldname, frames):
-        for frame in frames:
-            yield self.scene.read_array(fieldname, frame)
+        reads = getattr(_CONTEXT, 'reads', None)
+        if reads is None:
+            return [self.scene.read_array(fieldname, frame) for frame in frames]
+        loaded, executor, frame_cache = reads
+        keys = [(self.scene.path, fieldname, frame) for frame in frames]
+        missing = list(OrderedDict.fromkeys([key for key in keys if key not in loaded]))
+
+        def read(key):
+            if frame_cache is None:
+                return self.scene.read_array(key[1], key[2])
+            filename = next(self.scene.data_paths([key[2]], [key[1]]))[0]
+            return frame_cache.get(filename, lambda: self.scene.read_array(key[1], key[2]))
+
+        if executor is not None and len(missing) > 1:
+            arrays = executor.map(read, missing)
+        else:
+            arrays = [read(key) for key in missing]
+        loaded.update(zip(missing, arrays))
+        return [loaded[key] for key in keys]
 
     def list_fieldnames(self):
         return self.scene.fieldnames
@@ -79,9 +122,12 @@ class SceneSource(DataSource):
     def shape(self, fieldname):
         if fieldname in self._shape_map:
             return self._shape_map[fieldname]
-        first_frame = next(self.frames())
-        first_array = self.get(fieldname, [first_frame])
-        shape = first_array.shape
+        manifest = self.scene.manifest
+        if manifest is not None and manifest.get(fieldname):
+            shape = tuple(next(iter(manifest[fieldname].values()))['shape'])
+        else:
+            first_frame = self.frames()[0]
+            shape = self.get(fieldname, [first_frame])[0].shape
         self._shape_map[fieldname] = shape
         return shape
 
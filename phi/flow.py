@@ -6,6 +6,7 @@ from .physics.schroedinger import *
 from .physics.fluid import *
 from .physics.burgers import *
 from .physics.heat import *
+from .physics.ensemble import Ensemble
 from .physics.worldutil import *
 from .physics.field import *
 from .physics.obstacle import *
@@ -18,6 +19,10 @@ from .physics.pressuresolver.geom import GeometricCG
 from .physics.pressuresolver.fourier import FourierSolver
 
 from .data.fluidformat import *
+from .data.async_writer import AsyncWriter
+from .data.frame_cache import SharedFrameCache
+from .data.sampler import BlockShuffle
+from .data.farm import generate_scenes
 from .data.dataset import *
 from .data.stream import *
 from .data.reader import *
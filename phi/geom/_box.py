@@ -112,15 +112,15 @@ class AABox(AbstractBox):
         else:
             return None
 
-    @struct.derived()
+    @struct.derived(cached=True)
     def size(self):
         return self.upper - self.lower
 
-    @struct.derived()
+    @struct.derived(cached=True)
     def center(self):
         return 0.5 * (self.lower + self.upper)
 
-    @struct.derived()
+    @struct.derived(cached=True)
     def half_size(self):
         return self.size * 0.5
 
@@ -185,15 +185,15 @@ class Cuboid(AbstractBox):
         else:
             return None
 
-    @struct.derived()
+    @struct.derived(cached=True)
     def size(self):
         return 2 * self.half_size
 
-    @struct.derived()
+    @struct.derived(cached=True)
     def lower(self):
         return self.center - self.half_size
 
-    @struct.derived()
+    @struct.derived(cached=True)
     def upper(self):
         return self.center + self.half_size
 
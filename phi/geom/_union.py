@@ -1,8 +1,11 @@
+import numpy as np
+
 from phi import struct, math
 from ._geom import Geometry
 from ._empty import NO_GEOMETRY
 from ._transform import rotate
-from ._box import bounding_box, AABox
+from ._box import bounding_box, AABox, AbstractBox
+from ._sphere import Sphere
 
 
 @struct.definition()
@@ -64,4 +67,206 @@ def union(*geometries):
         return Union(base_geometries)
 
 
+@struct.definition()
+class GridUnion(Union):
+    """
+    Union of many geometries, accelerated by a uniform grid that maps each cell to the children overlapping it.
+
+    Queries only evaluate the children registered in the cell containing each point and process the points in chunks of `chunk_size`.
+    Spheres and boxes are handled natively. Array-valued Spheres and boxes, e.g. with centers of shape (n, rank), are treated as n separate children.
+    Other geometries and children with infinite extent are evaluated at every point.
+
+    `approximate_signed_distance()` matches Union up to a distance of `cell_size` from the nearest child and is clamped to `cell_size` beyond that.
+    Results are differentiable w.r.t. the query locations.
+    """
+
+    def __init__(self, geometries, cell_size=None, chunk_size=2 ** 16, **kwargs):
+        Union.__init__(self, **struct.kwargs(locals()))
+
+    @struct.constant(default=None)
+    def cell_size(self, cell_size):
+        """ Edge length of the grid cells. If None, it is chosen from the typical size of the children. """
+        return cell_size
+
+    @struct.constant(default=2 ** 16)
+    def chunk_size(self, chunk_size):
+        return chunk_size
+
+    @struct.derived(cached=True)
+    def _grids(self):
+        """ Returns (sphere grid, box grid, other geometries) where the grids are _ChildGrids or None. """
+        centers, radii, lowers, uppers, others = [], [], [], [], []
+        for geometry in self.geometries:
+            try:
+                if not math.is_numpy(_bounds(geometry)):
+                    pass  # other tensors, e.g. requiring gradients, are evaluated with their own backend
+                elif isinstance(geometry, Sphere):
+                    center = np.array(geometry.center, np.float64)
+                    radius = np.broadcast_to(np.array(geometry.radius, np.float64), center.shape[:-1])
+                    if np.all(np.isfinite(center)) and np.all(np.isfinite(radius)):
+                        centers.append(np.reshape(center, (-1, self.rank)))
+                        radii.append(np.reshape(radius, (-1,)))
+                        continue
+                elif isinstance(geometry, AbstractBox):
+                    lower, upper = np.broadcast_arrays(np.array(geometry.lower, np.float64), np.array(geometry.upper, np.float64))
+                    if np.all(np.isfinite(lower)) and np.all(np.isfinite(upper)):
+                        lowers.append(np.reshape(lower, (-1, self.rank)))
+                        uppers.append(np.reshape(upper, (-1, self.rank)))
+                        continue
+            except (NotImplementedError, TypeError, ValueError):
+                pass  # not a NumPy geometry
+            others.append(geometry)
+        centers, radii = (np.concatenate(centers), np.concatenate(radii)) if centers else (np.zeros((0, self.rank)), np.zeros((0,)))
+        lowers, uppers = (np.concatenate(lowers), np.concatenate(uppers)) if lowers else (np.zeros((0, self.rank)), np.zeros((0, self.rank)))
+        bounds_lower = np.concatenate([centers - radii[:, None], lowers])
+        bounds_upper = np.concatenate([centers + radii[:, None], uppers])
+        if len(bounds_lower) == 0:
+            return None, None, tuple(others)
+        cell_size = self.cell_size if self.cell_size is not None else _default_cell_size(bounds_lower, bounds_upper)
+        sphere_grid = _ChildGrid(bounds_lower[:len(centers)], bounds_upper[:len(centers)], cell_size, centers=centers, radii=radii) if len(centers) else None
+        box_grid = _ChildGrid(lowers, uppers, cell_size, lowers=lowers, uppers=uppers) if len(lowers) else None
+        return sphere_grid, box_grid, tuple(others)
+
+    def lies_inside(self, location):
+        sphere_grid, box_grid, others = self._grids
+
+        def inside(points):
+            result = [geometry.lies_inside(points) for geometry in others]
+            if sphere_grid is not None:
+                center, radius, valid = sphere_grid.candidates(points, 'centers', 'radii')
+                distance_squared = math.sum((math.expand_dims(points, 1) - center) ** 2, axis=-1)
+                result.append(math.any(valid & (distance_squared <= radius ** 2), axis=-1, keepdims=True))
+            if box_grid is not None:
+                lower, upper, valid = box_grid.candidates(points, 'lowers', 'uppers')
+                points = math.expand_dims(points, 1)
+                result.append(math.any(valid & math.all((points >= lower) & (points <= upper), axis=-1), axis=-1, keepdims=True))
+            return math.any(result, axis=0)
+
+        return self._chunked(inside, location) if self._can_chunk(location) else Union.lies_inside(self, location)
+
+    def approximate_signed_distance(self, location):
+        sphere_grid, box_grid, others = self._grids
+
+        def distance(points):
+            result = [geometry.approximate_signed_distance(points) for geometry in others]
+            for grid in (sphere_grid, box_grid):
+                if grid is None:
+                    continue
+                if grid is sphere_grid:
+                    center, radius, valid = grid.candidates(points, 'centers', 'radii')
+                    distance_squared = math.sum((math.expand_dims(points, 1) - center) ** 2, axis=-1)
+                    distance_squared = math.maximum(distance_squared, radius * 1e-2)  # Prevent infinite gradient at sphere center, as in Sphere
+                    child_distance = math.sqrt(distance_squared) - radius
+                else:
+                    lower, upper, valid = grid.candidates(points, 'lowers', 'uppers')
+                    child_distance = math.max(math.abs(math.expand_dims(points, 1) - 0.5 * (lower + upper)) - 0.5 * (upper - lower), axis=-1)
+                child_distance = math.where(valid, child_distance, grid.cell_size + math.zeros_like(child_distance))
+                result.append(math.minimum(math.min(child_distance, axis=-1, keepdims=True), grid.cell_size))
+            return math.min(result, axis=0)
+
+        return self._chunked(distance, location) if self._can_chunk(location) else Union.approximate_signed_distance(self, location)
+
+    def _can_chunk(self, location):
+        shape = math.staticshape(location)
+        return None not in shape and any(grid is not None for grid in self._grids[:2])
+
+    def _chunked(self, function, location):
+        shape = math.staticshape(location)
+        points = math.reshape(location, (-1, shape[-1]))
+        point_count = int(np.prod(shape[:-1]))
+        chunks = [function(points[start:start + self.chunk_size]) for start in range(0, point_count, self.chunk_size)]
+        result = chunks[0] if len(chunks) == 1 else math.concat(chunks, axis=0)
+        return math.reshape(result, tuple(shape[:-1]) + (1,))
+
+    def _bounding_box(self):
+        sphere_grid, box_grid, others = self._grids
+        lower = [np.min(grid.lower, axis=0) for grid in (sphere_grid, box_grid) if grid is not None] + [bounding_box(g).lower for g in others]
+        upper = [np.max(grid.upper, axis=0) for grid in (sphere_grid, box_grid) if grid is not None] + [bounding_box(g).upper for g in others]
+        return AABox(math.min(lower, axis=0), math.max(upper, axis=0))
+
+    def shifted(self, delta):
+        return self.copied_with(geometries=[geometry.shifted(delta) for geometry in self.geometries])
+
+
+class _ChildGrid(object):
+    """
+    Uniform grid over the bounding boxes (lower, upper) of a set of children.
+    Each cell lists all children whose bounding box, widened by one cell, overlaps the cell.
+    """
+
+    def __init__(self, lower, upper, cell_size, **child_values):
+        self.lower, self.upper = lower, upper
+        self.cell_size = cell_size
+        self.origin = np.min(lower, axis=0) - cell_size
+        self.shape = np.maximum(1, np.ceil((np.max(upper, axis=0) + cell_size - self.origin) / cell_size)).astype(np.int64)
+        self.strides = np.append(np.cumprod(self.shape[::-1])[::-1][1:], 1)
+        # --- List all (cell, child) pairs ---
+        first = np.clip(np.floor((lower - cell_size - self.origin) / cell_size), 0, self.shape - 1).astype(np.int64)
+        extent = np.clip(np.floor((upper + cell_size - self.origin) / cell_size), 0, self.shape - 1).astype(np.int64) - first + 1
+        counts = np.prod(extent, axis=-1)
+        child = np.repeat(np.arange(len(lower)), counts)
+        offset = np.arange(len(child)) - np.repeat(np.cumsum(counts) - counts, counts)
+        cell = np.zeros(len(child), np.int64)
+        for axis in reversed(range(len(self.shape))):
+            cell += (first[child, axis] + offset % extent[child, axis]) * self.strides[axis]
+            offset //= extent[child, axis]
+        # --- Table of shape (cells, max children per cell), padded with -1 ---
+        order = np.argsort(cell, kind='stable')
+        cell, child = cell[order], child[order]
+        cell_counts = np.bincount(cell, minlength=int(np.prod(self.shape)))
+        self.table = np.full((len(cell_counts), max(1, np.max(cell_counts))), -1, np.int32)
+        self.table[cell, np.arange(len(cell)) - (np.cumsum(cell_counts) - cell_counts)[cell]] = child
+        self.child_values = {name: math.to_float(value) for name, value in child_values.items()}
+
+    def candidates(self, points, *names):
+        """
+        Looks up the children registered in the cells containing `points`.
+        :param points: float tensor of shape (point count, rank)
+        :param names: names of the child values to gather
+        :return: gathered child values of shape (point count, candidates, ...) for each name, followed by a boolean tensor of shape (point count, candidates) marking valid candidates
+        """
+        cell = math.clip(math.floor((points - math.to_float(self.origin)) / self.cell_size), 0, math.to_float(self.shape - 1))
+        index = math.sum(math.to_int(cell) * self.strides.astype(np.int32), axis=-1)
+        backend = math.choose_backend(index)  # math.gather() would choose the backend of the NumPy tables
+        children = backend.gather(self.table, index)
+        valid = children >= 0
+        children = math.maximum(children, 0)
+        return tuple(backend.gather(self.child_values[name], children) for name in names) + (valid,)
+
+
+def _default_cell_size(lower, upper):
+    """ Twice the median child size, increased until the grid has at most 64 cells per child. """
+    cell_size = 2 * np.median(np.max(upper - lower, axis=-1))
+    total_size = np.max(upper, axis=0) - np.min(lower, axis=0)
+    if cell_size <= 0:
+        cell_size = np.max(total_size) / 16 or 1.
+    while np.prod(np.ceil(total_size / cell_size) + 2) > 64 * len(lower):
+        cell_size *= 2
+    return float(cell_size)
+
+
+def grid_union(*geometries, **kwargs):
+    """
+    Creates a GridUnion which answers lies_inside() and approximate_signed_distance() queries by only evaluating nearby children.
+    Use this instead of union() for large numbers of geometries.
+    :param geometries: geometries or a list of geometries
+    :param kwargs: cell_size, chunk_size (see GridUnion)
+    :return: GridUnion
+    """
+    if len(geometries) == 1 and isinstance(geometries[0], (tuple, list)):
+        geometries = geometries[0]
+    base_geometries = ()
+    for geometry in geometries:
+        base_geometries += geometry.geometries if isinstance(geometry, Union) else (geometry,)
+    return GridUnion(base_geometries, **kwargs)
+
+
 Geometry.__add__ = lambda g1, g2: union(g1, g2)
+
+
+def _bounds(geometry):
+    if isinstance(geometry, Sphere):
+        return [geometry.center, geometry.radius]
+    if isinstance(geometry, AbstractBox):
+        return [geometry.lower, geometry.upper]
+    return None
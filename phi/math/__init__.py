@@ -3,7 +3,7 @@ from phi.backend.dynamic_backend import DYNAMIC_BACKEND
 from phi.backend.scipy_backend import SciPyBackend
 from phi.struct.struct_backend import StructBroadcastBackend
 from .math_util import types, is_static_shape, zeros, ones, randn, randfreq, interpolate
-from .helper import is_scalar, axes, rank
+from .helper import is_scalar, is_numpy, axes, rank
 from .nd import (spatial_rank, spatial_dimensions, all_dimensions,
                  indices_tensor,
                  normalize_to,
@@ -16,6 +16,8 @@ from .nd import (spatial_rank, spatial_dimensions, all_dimensions,
                  spatial_sum,)
 from .batched import BATCHED, ShapeMismatch
 from . import optim
+from . import fused
+from . import stencil
 
 
 # Setup Backend
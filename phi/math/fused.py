@@ -0,0 +1,194 @@
+"""
+Deferred evaluation of element-wise expressions.
+
+Arithmetic on `Expression` objects only records the operations.
+`evaluate()` then computes the whole expression in a single pass over the data, block by block, so that intermediate results stay small.
+If the optional package `numexpr` is installed, it is used for NumPy data. Otherwise, the blocks are evaluated with NumPy.
+Expressions involving other tensors (e.g. TensorFlow or PyTorch) are evaluated eagerly using the corresponding backend.
+"""
+import numbers
+
+import numpy as np
+
+from phi.backend.dynamic_backend import DYNAMIC_BACKEND as math
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+
+CHUNK_SIZE = 2 ** 16
+""" Number of elements computed at once by the NumPy block evaluator. """
+
+_BINARY = {
+    'add': ('+', np.add, math.add),
+    'sub': ('-', np.subtract, math.sub),
+    'mul': ('*', np.multiply, math.mul),
+    'div': ('/', np.true_divide, math.div),
+    'pow': ('**', np.power, math.pow),
+}
+
+
+class Expression(object):
+    """
+    Node of an element-wise expression graph.
+    Leaves hold tensors or numbers, all other nodes hold an operator and its arguments.
+    """
+
+    __array_ufunc__ = None  # NumPy operations with Expressions fall back to the reflected operators below
+
+    def __init__(self, operator, args):
+        self.operator = operator
+        self.args = tuple(args)
+
+    @property
+    def leaves(self):
+        if self.operator is None:
+            return [self]
+        result = []
+        for arg in self.args:
+            for leaf in arg.leaves:
+                if not any(leaf is existing for existing in result):
+                    result.append(leaf)
+        return result
+
+    @property
+    def value(self):
+        assert self.operator is None, 'value is only defined for leaves'
+        return self.args[0]
+
+    def _op(self, other, operator, reverse=False):
+        other = lazy(other)
+        return Expression(operator, (other, self) if reverse else (self, other))
+
+    def __add__(self, other):
+        return self._op(other, 'add')
+
+    def __radd__(self, other):
+        return self._op(other, 'add', reverse=True)
+
+    def __sub__(self, other):
+        return self._op(other, 'sub')
+
+    def __rsub__(self, other):
+        return self._op(other, 'sub', reverse=True)
+
+    def __mul__(self, other):
+        return self._op(other, 'mul')
+
+    def __rmul__(self, other):
+        return self._op(other, 'mul', reverse=True)
+
+    def __truediv__(self, other):
+        return self._op(other, 'div')
+
+    def __rtruediv__(self, other):
+        return self._op(other, 'div', reverse=True)
+
+    def __pow__(self, power, modulo=None):
+        return self._op(power, 'pow')
+
+    def __rpow__(self, other):
+        return self._op(other, 'pow', reverse=True)
+
+    def __neg__(self):
+        return Expression('neg', (self,))
+
+    def __repr__(self):
+        if self.operator is None:
+            return 'Leaf(%s)' % (math.staticshape(self.value),) if math.ndims(self.value) > 0 else repr(self.value)
+        if self.operator == 'neg':
+            return '-(%s)' % self.args[0]
+        return '(%s %s %s)' % (self.args[0], _BINARY[self.operator][0], self.args[1])
+
+
+def lazy(value):
+    """
+    Wraps a tensor or number in an Expression so that subsequent arithmetic is deferred until `evaluate()` is called.
+    :param value: tensor, number or Expression
+    :return: Expression
+    """
+    if isinstance(value, Expression):
+        return value
+    return Expression(None, (value,))
+
+
+def evaluate(expression, chunk_size=None):
+    """
+    Computes the value of an Expression.
+    For NumPy data, the expression is evaluated in one pass without allocating full-size temporary arrays.
+    :param expression: Expression or tensor
+    :param chunk_size: (optional) number of elements to compute at once when evaluating with NumPy
+    :return: tensor holding the result
+    """
+    if not isinstance(expression, Expression):
+        return expression
+    if expression.operator is None:
+        return expression.value
+    values = [leaf.value for leaf in expression.leaves]
+    if not all(isinstance(value, (np.ndarray, numbers.Number)) for value in values):
+        return _evaluate_eager(expression)
+    if numexpr is not None:
+        return _evaluate_numexpr(expression)
+    return _evaluate_blocked(expression, CHUNK_SIZE if chunk_size is None else chunk_size)
+
+
+def _evaluate_eager(expression, values=None):
+    if expression.operator is None:
+        return expression.value if values is None else values[id(expression)]
+    args = [_evaluate_eager(arg, values) for arg in expression.args]
+    if expression.operator == 'neg':
+        return -args[0]
+    if all(isinstance(arg, (np.ndarray, numbers.Number)) for arg in args):  # keeps the dtype of NumPy arrays
+        return _BINARY[expression.operator][1](*args)
+    return _BINARY[expression.operator][2](*args)
+
+
+def _evaluate_numexpr(expression):
+    leaves = expression.leaves
+    dtype = np.result_type(*[leaf.value for leaf in leaves])
+    local_dict = {}
+    names = {}
+    for i, leaf in enumerate(leaves):
+        names[id(leaf)] = 'x%d' % i
+        value = leaf.value
+        local_dict[names[id(leaf)]] = value if isinstance(value, np.ndarray) else np.asarray(value, dtype)
+    result = numexpr.evaluate(_to_string(expression, names), local_dict=local_dict)
+    return result.astype(dtype, copy=False)
+
+
+def _to_string(expression, names):
+    if expression.operator is None:
+        return names[id(expression)]
+    if expression.operator == 'neg':
+        return '(-%s)' % _to_string(expression.args[0], names)
+    return '(%s %s %s)' % (_to_string(expression.args[0], names), _BINARY[expression.operator][0], _to_string(expression.args[1], names))
+
+
+def _evaluate_blocked(expression, chunk_size):
+    leaves = expression.leaves
+    shape = np.broadcast(*[leaf.value for leaf in leaves]).shape
+    if len(shape) == 0:
+        return _evaluate_eager(expression, {id(leaf): leaf.value for leaf in leaves})
+    # --- Split the outermost non-singleton dimension into blocks ---
+    axis = next((i for i, dim in enumerate(shape) if dim > 1), 0)
+    block_length = max(1, chunk_size // max(1, int(np.prod(shape[axis + 1:]))))
+    result = None
+    for start in range(0, shape[axis], block_length):
+        block = slice(start, min(start + block_length, shape[axis]))
+        values = {id(leaf): _leaf_block(leaf.value, len(shape), axis, block) for leaf in leaves}
+        block_result = np.broadcast_to(_evaluate_eager(expression, values), shape[:axis] + (block.stop - block.start,) + shape[axis + 1:])
+        if result is None:
+            result = np.empty(shape, block_result.dtype)
+        result[(slice(None),) * axis + (block,)] = block_result
+    return result
+
+
+def _leaf_block(value, ndims, axis, block):
+    if not isinstance(value, np.ndarray):
+        return value
+    axis -= ndims - value.ndim  # value is broadcast from the left
+    if axis < 0 or value.shape[axis] == 1:
+        return value
+    return value[(slice(None),) * axis + (block,)]
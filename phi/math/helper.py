@@ -1,6 +1,7 @@
 from phi.struct.tensorop import collapsed_gather_nd
 
-from phi.backend.dynamic_backend import DYNAMIC_BACKEND as math
+from phi.backend.dynamic_backend import DYNAMIC_BACKEND as math, NoBackendFound
+from phi.backend.scipy_backend import SciPyBackend
 
 
 def rank(tensor):
@@ -28,6 +29,16 @@ def is_scalar(tensor):
     return math.ndims(tensor) == 0
 
 
+def is_numpy(values):
+    """ Tests whether `values` are handled by the NumPy backend, i.e. hold no tensors of other backends such as TensorFlow. """
+    if values is None:
+        return False
+    try:
+        return isinstance(math.choose_backend(values), SciPyBackend)
+    except NoBackendFound:
+        return False
+
+
 def _get_pad_width_axes(rank, axes, val_true=(1, 1), val_false=(0, 0)):
     mid_shape = []
     for i in range(rank):
@@ -7,8 +7,9 @@ from phi import struct
 from phi.backend.dynamic_backend import DYNAMIC_BACKEND as math
 from phi.struct.functions import mappable
 
+from . import stencil
 from .helper import (_contains_axis, _dim_shifted, _get_pad_width,
-                     _get_pad_width_axes, all_dimensions, rank,
+                     all_dimensions, rank,
                      spatial_dimensions, spatial_rank)
 
 
@@ -202,24 +203,7 @@ def gradient(tensor, dx=1, difference='forward', padding='replicate'):
     """
     assert tensor.shape[-1] == 1, "Gradient requires a scalar channel as input"
     assert 1 not in tensor.shape[1:-1], "All spatial dimensions must have size larger than 1, got %s" % tensor.shape
-    if difference.lower() == 'central':
-        return _gradient_nd(tensor, padding, (-1, 1)) / (dx * 2)
-    elif difference.lower() == 'forward':
-        return _gradient_nd(tensor, padding, (0, 1)) / dx
-    elif difference.lower() == 'backward':
-        return _gradient_nd(tensor, padding, (-1, 0)) / dx
-    else:
-        raise ValueError('Invalid difference type: {}. Can be CENTRAL or FORWARD'.format(difference))
-
-
-def _gradient_nd(tensor, padding, relative_shifts):
-    rank = spatial_rank(tensor)
-    tensor = math.pad(tensor, _get_pad_width(rank, (-relative_shifts[0], relative_shifts[1])), mode=padding)
-    components = []
-    for dimension in range(rank):
-        lower, upper = _dim_shifted(tensor, dimension, relative_shifts, diminish_others=(-relative_shifts[0], relative_shifts[1]))
-        components.append(upper - lower)
-    return math.concat(components, axis=-1)
+    return stencil.gradient(tensor, dx=dx, difference=difference, padding=padding)
 
 
 def axis_gradient(tensor, spatial_axis):
@@ -246,73 +230,9 @@ def laplace(tensor, padding='replicate', axes=None, use_fft_for_periodic=False):
     :type axes: list
     :return: tensor of same shape
     """
-    rank = spatial_rank(tensor)
-    if padding is None or padding == 'valid':
-        pass  # do not pad tensor
-    elif padding in ('circular', 'wrap') and use_fft_for_periodic:
+    if padding in ('circular', 'wrap') and use_fft_for_periodic:
         return fourier_laplace(tensor)
-    else:
-        tensor = math.pad(tensor, _get_pad_width_axes(rank, axes, val_true=[1, 1], val_false=[0, 0]), padding)
-    # --- convolutional laplace ---
-    if axes is not None:
-        return _sliced_laplace_nd(tensor, axes)
-    if rank == 2:
-        return _conv_laplace_2d(tensor)
-    elif rank == 3:
-        return _conv_laplace_3d(tensor)
-    else:
-        return _sliced_laplace_nd(tensor)
-
-
-def _conv_laplace_2d(tensor):
-    kernel = math.to_float([[0., 1., 0.], [1., -4., 1.], [0., 1., 0.]])
-    kernel = kernel.reshape((3, 3, 1, 1))
-    if tensor.shape[-1] == 1:
-        return math.conv(tensor, kernel, padding='VALID')
-    else:
-        return math.concat([math.conv(tensor[..., i:i + 1], kernel, padding='VALID') for i in range(tensor.shape[-1])], -1)
-
-
-def _conv_laplace_3d(tensor):
-    """
-    3D/Cube laplace stencil in 3D+2D [3,3,3,1,1]
-    array([[[[[ 0.]], [[ 0.]], [[ 0.]]],
-            [[[ 0.]], [[ 1.]], [[ 0.]]],
-            [[[ 0.]], [[ 0.]], [[ 0.]]]],
-           [[[[ 0.]], [[ 1.]], [[ 0.]]],
-            [[[ 1.]], [[-6.]], [[ 1.]]],
-            [[[ 0.]], [[ 1.]], [[ 0.]]]],
-           [[[[ 0.]], [[ 0.]], [[ 0.]]],
-            [[[ 0.]], [[ 1.]], [[ 0.]]],
-            [[[ 0.]], [[ 0.]], [[ 0.]]]]]
-    returns ...
-
-    padding explicitly done in laplace(), hence here not needed
-    """
-    kernel = math.to_float([[[0., 0., 0.], [0., 1., 0.], [0., 0., 0.]],
-                            [[0., 1., 0.], [1., -6., 1.], [0., 1., 0.]],
-                            [[0., 0., 0.], [0., 1., 0.], [0., 0., 0.]]])
-    kernel = kernel.reshape((3, 3, 3, 1, 1))
-    if tensor.shape[-1] == 1:
-        return math.conv(tensor, kernel, padding='VALID')
-    else:
-        return math.concat([math.conv(tensor[..., i:i + 1], kernel, padding='VALID')
-                            for i in range(tensor.shape[-1])], -1)
-
-
-def _sliced_laplace_nd(tensor, axes=None):
-    """
-    Laplace Stencil for N-Dimensions
-    aggregated from (c)enter, (u)pper, and (l)ower parts
-    """
-    rank = spatial_rank(tensor)
-    dims = range(rank)
-    components = []
-    for ax in dims:
-        if _contains_axis(axes, ax, rank):
-            lower, center, upper = _dim_shifted(tensor, ax, (-1, 0, 1), diminish_others=(1, 1), diminish_other_condition=lambda other_ax: _contains_axis(axes, other_ax, rank))
-            components.append(upper + lower - 2 * center)
-    return math.sum(components, 0)
+    return stencil.laplace(tensor, padding=padding, axes=axes)
 
 
 @mappable()
@@ -0,0 +1,224 @@
+"""
+Finite difference stencils evaluated by slicing.
+
+Each operator pads its input once (unless padding='valid') and then combines shifted slices of the padded tensor.
+All channels are processed at once and no convolution kernels are required, so the stencils work with every backend.
+Higher-order central differences are available via the `order` parameter.
+"""
+from __future__ import division
+
+import numpy as np
+
+from phi.backend.dynamic_backend import DYNAMIC_BACKEND as math
+
+from .helper import spatial_rank, _contains_axis, _get_pad_width_axes
+
+
+FIRST_DERIVATIVE = {
+    2: (-1 / 2, 0, 1 / 2),
+    4: (1 / 12, -2 / 3, 0, 2 / 3, -1 / 12),
+    6: (-1 / 60, 3 / 20, -3 / 4, 0, 3 / 4, -3 / 20, 1 / 60),
+}
+""" Central difference coefficients of the first derivative by order of accuracy """
+
+SECOND_DERIVATIVE = {
+    2: (1, -2, 1),
+    4: (-1 / 12, 4 / 3, -5 / 2, 4 / 3, -1 / 12),
+    6: (1 / 90, -3 / 20, 3 / 2, -49 / 18, 3 / 2, -3 / 20, 1 / 90),
+}
+""" Central difference coefficients of the second derivative by order of accuracy """
+
+
+def pad(tensor, widths, padding='replicate', axes=None):
+    """
+    Adds ghost cells to the spatial dimensions of `tensor`.
+
+    :param tensor: tensor of shape (batch, spatial dimensions..., components)
+    :param widths: number of ghost cells on each side, int or (lower, upper)
+    :param padding: padding mode passed to math.pad. If None or 'valid', `tensor` is returned unchanged.
+    :param axes: spatial axes to pad, None for all
+    :return: padded tensor
+    """
+    if padding is None or padding == 'valid':
+        return tensor
+    widths = [widths, widths] if isinstance(widths, int) else list(widths)
+    return math.pad(tensor, _get_pad_width_axes(spatial_rank(tensor), axes, val_true=widths, val_false=[0, 0]), padding)
+
+
+def shifted(tensor, axis, shift, widths, axes=None, components=None):
+    """
+    Slices the interior of a padded tensor, shifted by `shift` cells along `axis`.
+
+    :param tensor: padded tensor
+    :param axis: spatial axis along which to shift
+    :param shift: offset in cells, must lie within the padding widths
+    :param widths: number of ghost cells on each side of the padded axes, int or (lower, upper)
+    :param axes: spatial axes that are padded, None for all
+    :param components: (optional) index of the component to select
+    :return: tensor with the shape of the unpadded tensor
+    """
+    lower, upper = (widths, widths) if isinstance(widths, int) else widths
+    rank = spatial_rank(tensor)
+    slices = [slice(None)]
+    for ax in range(rank):
+        if _contains_axis(axes, ax, rank):
+            offset = shift if ax == axis else 0
+            slices.append(slice(lower + offset, -upper + offset if upper != offset else None))
+        else:
+            slices.append(slice(None))
+    slices.append(slice(None) if components is None else slice(components, components + 1))
+    return tensor[tuple(slices)]
+
+
+def laplace(tensor, padding='replicate', axes=None, dx=1, order=2):
+    """
+    Spatial Laplace operator, computed component-wise.
+
+    :param tensor: tensor of shape (batch, spatial dimensions..., components)
+    :param padding: padding mode, see `pad()`
+    :param axes: The second derivative along these axes is summed over. None for all.
+    :param dx: grid spacing, scalar or one value per spatial axis
+    :param order: order of accuracy, one of (2, 4, 6)
+    :return: tensor of same shape (or cropped by order/2 cells per side along `axes` if padding='valid')
+    """
+    coefficients = SECOND_DERIVATIVE[order]
+    width = order // 2
+    tensor = pad(tensor, width, padding, axes)
+    rank = spatial_rank(tensor)
+    axes = [ax for ax in range(rank) if _contains_axis(axes, ax, rank)]
+    scales = _per_axis(dx, rank) ** -2
+    result = shifted(tensor, None, 0, width, axes) * float(coefficients[width] * np.sum(scales[axes]))
+    for ax in axes:
+        for shift, coefficient in zip(range(-width, width + 1), coefficients):
+            if shift != 0:
+                result += shifted(tensor, ax, shift, width, axes) * float(coefficient * scales[ax])
+    return result
+
+
+def gradient(tensor, dx=1, difference='central', padding='replicate', order=2):
+    """
+    Computes the spatial gradient of a tensor from finite differences.
+    The derivatives along the spatial axes are concatenated in axis order.
+
+    :param tensor: tensor of shape (batch, spatial dimensions..., components)
+    :param dx: grid spacing, scalar or one value per spatial axis
+    :param difference: one of ('central', 'forward', 'backward')
+    :param padding: padding mode, see `pad()`
+    :param order: order of accuracy for central differences, one of (2, 4, 6)
+    :return: tensor of shape (batch, spatial dimensions..., spatial rank * components)
+    """
+    difference = difference.lower()
+    if difference == 'central':
+        coefficients = FIRST_DERIVATIVE[order]
+        widths = (order // 2, order // 2)
+    elif difference == 'forward':
+        coefficients, widths = (-1, 1), (0, 1)
+    elif difference == 'backward':
+        coefficients, widths = (-1, 1), (1, 0)
+    else:
+        raise ValueError('Invalid difference type: {}. Can be CENTRAL, FORWARD or BACKWARD'.format(difference))
+    tensor = pad(tensor, widths, padding)
+    rank = spatial_rank(tensor)
+    scales = 1 / _per_axis(dx, rank)
+    return math.concat([_derivative(tensor, ax, coefficients, widths, scales[ax]) for ax in range(rank)], axis=-1)
+
+
+def divergence(tensor, dx=1, padding='constant', order=2):
+    """
+    Computes the divergence of a centered vector field using central differences.
+    Component i of `tensor` is the vector component along spatial axis i.
+
+    :param tensor: tensor of shape (batch, spatial dimensions..., spatial rank)
+    :param dx: grid spacing, scalar or one value per spatial axis
+    :param padding: padding mode, see `pad()`
+    :param order: order of accuracy, one of (2, 4, 6)
+    :return: tensor of shape (batch, spatial dimensions..., 1)
+    """
+    coefficients = FIRST_DERIVATIVE[order]
+    width = order // 2
+    tensor = pad(tensor, width, padding)
+    rank = spatial_rank(tensor)
+    scales = 1 / _per_axis(dx, rank)
+    return math.sum([_derivative(tensor, ax, coefficients, (width, width), scales[ax], components=ax) for ax in range(rank)], axis=0)
+
+
+def staggered_divergence(tensor, dx=1):
+    """
+    Computes the divergence of a staggered vector field at the cell centers.
+
+    :param tensor: staggered tensor of shape (batch, spatial dimensions + 1..., spatial rank) or list of staggered components
+    :param dx: grid spacing, scalar or one value per spatial axis
+    :return: tensor of shape (batch, spatial dimensions..., 1)
+    """
+    if isinstance(tensor, (tuple, list)):
+        rank = len(tensor)
+        scales = 1 / _per_axis(dx, rank)
+        return math.sum([_derivative(component, ax, (-1, 1), (0, 1), scales[ax], axes=[ax]) for ax, component in enumerate(tensor)], axis=0)
+    rank = spatial_rank(tensor)
+    scales = 1 / _per_axis(dx, rank)
+    return math.sum([_derivative(tensor, ax, (-1, 1), (0, 1), scales[ax], components=ax) for ax in range(rank)], axis=0)
+
+
+def curl(tensor, dx=1, padding='replicate', order=2):
+    """
+    Computes the curl of a centered 2D or 3D vector field using central differences.
+    Component i of `tensor` is the vector component along spatial axis i.
+
+    :param tensor: tensor of shape (batch, spatial dimensions..., spatial rank)
+    :param dx: grid spacing, scalar or one value per spatial axis
+    :param padding: padding mode, see `pad()`
+    :param order: order of accuracy, one of (2, 4, 6)
+    :return: 2D: scalar curl of shape (batch, y, x, 1). 3D: vector curl of shape (batch, z, y, x, 3) with components ordered like the axes.
+    """
+    coefficients = FIRST_DERIVATIVE[order]
+    width = order // 2
+    tensor = pad(tensor, width, padding)
+    rank = spatial_rank(tensor)
+    scales = 1 / _per_axis(dx, rank)
+
+    def d(axis, component):
+        return _derivative(tensor, axis, coefficients, (width, width), scales[axis], components=component)
+
+    if rank == 2:
+        return d(1, 0) - d(0, 1)
+    elif rank == 3:
+        return math.concat([d(2, 1) - d(1, 2), d(0, 2) - d(2, 0), d(1, 0) - d(0, 1)], axis=-1)
+    else:
+        raise ValueError('curl is only defined for 2D and 3D vector fields but got rank %d' % rank)
+
+
+def weighted_laplace(tensor, weights, padding='replicate'):
+    """
+    Laplace operator where the coupling between neighbouring cells is scaled by the product of their weights.
+    This is the operator used by iterative pressure solvers in the presence of obstacles.
+
+    :param tensor: tensor of shape (batch, spatial dimensions..., 1)
+    :param weights: tensor of shape (batch, spatial dimensions + 2..., 1), i.e. already padded by one cell on each side
+    :param padding: padding mode for `tensor`, see `pad()`. Use 'valid' if `tensor` is already padded.
+    :return: tensor of shape (batch, spatial dimensions..., 1)
+    """
+    if math.staticshape(tensor)[-1] != 1:
+        raise ValueError('Laplace operator requires a scalar channel as input')
+    tensor = pad(tensor, 1, padding)
+    rank = spatial_rank(tensor)
+    center_weights = shifted(weights, None, 0, 1)
+    neighbour_weights = 0
+    result = 0
+    for ax in range(rank):
+        lower_weights, upper_weights = shifted(weights, ax, -1, 1), shifted(weights, ax, 1, 1)
+        result += shifted(tensor, ax, 1, 1) * upper_weights + shifted(tensor, ax, -1, 1) * lower_weights
+        neighbour_weights += lower_weights + upper_weights
+    return result * center_weights - shifted(tensor, None, 0, 1) * neighbour_weights
+
+
+def _derivative(tensor, axis, coefficients, widths, scale, axes=None, components=None):
+    result = None
+    for shift, coefficient in zip(range(-widths[0], widths[1] + 1), coefficients):
+        if coefficient != 0:
+            term = shifted(tensor, axis, shift, widths, axes, components) * float(coefficient * scale)
+            result = term if result is None else result + term
+    return result
+
+
+def _per_axis(value, rank):
+    return np.array(np.broadcast_to(value, [rank]), np.float64)
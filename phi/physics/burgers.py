@@ -28,7 +28,7 @@ class BurgersVelocity(DomainState):
 
 class Burgers(Physics):
 
-    def __init__(self, default_viscosity=0.1, viscosity=None, diffusion_substeps=1, advection=advect.semi_lagrangian):
+    def __init__(self, default_viscosity=0.1, viscosity=None, diffusion_substeps=1, advection=advect.semi_lagrangian, implicit_diffusion=False):
         Physics.__init__(self, [StateDependency('effects', 'velocity_effect', blocking=True)])
         if viscosity is not None:
             warnings.warn("Argument 'viscosity' is deprecated, use 'default_viscosity' instead.", DeprecationWarning)
@@ -36,6 +36,7 @@ class Burgers(Physics):
         self.default_viscosity = default_viscosity
         self.diffusion_substeps = diffusion_substeps
         self.advection = advection
+        self.implicit_diffusion = implicit_diffusion
 
     def step(self, v, dt=1.0, effects=()):
         if isinstance(v, BurgersVelocity):
@@ -44,7 +45,7 @@ class Burgers(Physics):
             return self.step_velocity(v, self.default_viscosity, dt, effects, self.diffusion_substeps)
 
     def step_velocity(self, v, viscosity, dt, effects, diffusion_substeps):
-        v = diffuse(v, dt * viscosity, substeps=diffusion_substeps)
+        v = diffuse(v, dt * viscosity, substeps=diffusion_substeps, implicit=self.implicit_diffusion)
         v = self.advection(v, v, dt)
         for effect in effects:
             v = effect_applied(effect, v, dt)
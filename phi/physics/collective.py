@@ -1,4 +1,7 @@
+import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+
 import six
 
 from .physics import Physics, State, struct, _ChainedPhysics, _as_physics
@@ -112,40 +115,80 @@ CollectiveState = StateCollection
 
 class CollectivePhysics(Physics):
 
-    def __init__(self):
+    def __init__(self, threads=None):
+        """
+        Steps all states of a StateCollection, resolving the dependencies between them.
+
+        :param threads: (optional) number of threads used to step independent states concurrently.
+            States are grouped into levels such that no state has a blocking dependency on a state of the same level.
+            All states of one level are stepped in parallel. The results do not depend on the number of threads.
+            This is beneficial when the physics release the GIL, as NumPy, SciPy and PyTorch do in most operations.
+        """
         Physics.__init__(self, {})
         self.physics = {}  # map from name to Physics
+        self.threads = threads
+        self.timings = {}  # map from state name to the duration of its last step in seconds
+        self._plan = None
+        self._executor = None
+        self._executor_threads = None
 
     def step(self, state_collection, dt=1.0, **dependent_states):
         assert len(dependent_states) == 0
         if len(state_collection) == 0:
             return state_collection
-        unhandled_states = list(state_collection.values())
-        next_states = {}
-        partial_next_state_collection = StateCollection(next_states)
-
-        for sweep in range(len(state_collection)):
-            for state in tuple(unhandled_states):
-                physics = self.for_(state)
-                if self._all_dependencies_fulfilled(physics.blocking_dependencies, state_collection, partial_next_state_collection):
-                    next_state = self.substep(state, state_collection, dt, partial_next_state_collection=partial_next_state_collection)
-                    assert next_state is not None, "step() called on %s returned None for state '%s'" % (type(physics).__name__, state)
-                    assert isinstance(next_state, State), "step() called on %s dit not return a State but '%s' for state '%s'" % (type(physics).__name__, next_state, state)
-                    assert next_state.name == state.name, "The state name must remain constant during step(). Caused by '%s' on state '%s'." % (type(physics).__name__, state)
-                    next_states[next_state.name] = next_state
-                    unhandled_states.remove(state)
-            partial_next_state_collection = StateCollection(next_states)
-            if len(unhandled_states) == 0:
-                ordered_states = [partial_next_state_collection[state] for state in state_collection]
-                return StateCollection(ordered_states)
-
-        # Error
-        errstr = 'Cyclic blocking_dependencies in simulation: %s' % unhandled_states
-        for state in tuple(unhandled_states):
-            physics = self.for_(state)
-            state_dict = self._gather_dependencies(physics.blocking_dependencies, state_collection, {})
-            errstr += '\nState "%s" with physics "%s" depends on %s' % (state, physics, state_dict)
-        raise AssertionError(errstr)
+        states = list(state_collection.values())
+        physics = [self.for_(state) for state in states]
+        plan = self.plan(states, physics)
+        next_states = [None] * len(states)
+        durations = [None] * len(states)
+
+        def step_state(i):
+            return self._step_state(states[i], physics[i], plan.dependencies[i], states, next_states, dt)
+
+        for level in plan.levels:
+            if self.threads and len(level) > 1:
+                results = list(self._thread_pool().map(step_state, level))
+            else:
+                results = [step_state(i) for i in level]
+            for i, (next_state, duration) in zip(level, results):
+                next_states[i] = next_state
+                durations[i] = duration
+        self.timings = {state.name: duration for state, duration in zip(states, durations)}
+        return StateCollection(next_states)
+
+    @staticmethod
+    def _step_state(state, physics, dependencies, states, next_states, dt):
+        start = time.time()
+        dependent_states = {}
+        for parameter_name, indices, single_state, blocking in dependencies:
+            source = next_states if blocking else states
+            dependent_states[parameter_name] = source[indices[0]] if single_state else tuple(source[j] for j in indices)
+        next_state = physics.step(state, dt, **dependent_states)
+        assert next_state is not None, "step() called on %s returned None for state '%s'" % (type(physics).__name__, state)
+        assert isinstance(next_state, State), "step() called on %s dit not return a State but '%s' for state '%s'" % (type(physics).__name__, next_state, state)
+        assert next_state.name == state.name, "The state name must remain constant during step(). Caused by '%s' on state '%s'." % (type(physics).__name__, state)
+        return next_state, time.time() - start
+
+    def _thread_pool(self):
+        if self._executor is None or self._executor_threads != self.threads:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = ThreadPoolExecutor(max_workers=self.threads)
+            self._executor_threads = self.threads
+        return self._executor
+
+    def plan(self, states, physics):
+        """
+        Returns the execution plan for the given states and their physics.
+        The plan is reused as long as the state names, tags and physics dependencies stay the same.
+        :param states: list of states in collection order
+        :param physics: list holding the Physics for each state
+        :return: StepPlan
+        """
+        key = tuple((state.name, tuple(state.tags), _dependency_signature(phys)) for state, phys in zip(states, physics))
+        if self._plan is None or self._plan.key != key:
+            self._plan = StepPlan(key, states, physics)
+        return self._plan
 
     def substep(self, state, state_collection, dt, override_physics=None, partial_next_state_collection=None):
         physics = self.for_(state) if override_physics is None else override_physics
@@ -172,18 +215,6 @@ class CollectivePhysics(Physics):
             result_dict[statedependency.parameter_name] = value
         return result_dict
 
-    def _all_dependencies_fulfilled(self, dependencies, all_states, computed_states):
-        state_dict = self._gather_dependencies(dependencies, all_states, {})
-        for name, states in state_dict.items():
-            if isinstance(states, tuple):
-                for state in states:
-                    if state.name not in computed_states:
-                        return False
-            else:  # single state
-                if states.name not in computed_states:
-                    return False
-        return True
-
     def for_(self, state):
         return self.physics[state.name] if state.name in self.physics else state.default_physics()
 
@@ -193,3 +224,63 @@ class CollectivePhysics(Physics):
     def remove(self, name):
         if name in self.physics:
             del self.physics[name]
+
+
+class StepPlan(object):
+
+    def __init__(self, key, states, physics):
+        """
+        Execution order and resolved dependencies of one CollectivePhysics step.
+
+        States are grouped into levels which are executed one after another.
+        Each state belongs to the first level after all of its blocking dependencies have been computed, so states of the same level are independent of each other.
+        Dependencies are stored as state indices, so that gathering them during a step requires no search.
+
+        :param key: key identifying the configuration of states and physics
+        :param states: list of states in collection order
+        :param physics: list holding the Physics for each state
+        """
+        self.key = key
+        tag_index = {}
+        name_index = {}
+        for i, state in enumerate(states):
+            name_index[state.name] = i
+            for tag in state.tags:
+                tag_index.setdefault(tag, []).append(i)
+        resolved = []
+        for state, phys in zip(states, physics):
+            state_dependencies = []
+            for dependency in phys.dependencies:
+                if dependency.state_name is not None:
+                    indices = [name_index[dependency.state_name]] if dependency.state_name in name_index else []
+                else:
+                    indices = tag_index.get(dependency.tag, [])
+                if dependency.single_state:
+                    assert len(indices) == 1, 'Dependency %s requires 1 state but found %d' % (dependency, len(indices))
+                state_dependencies.append((dependency.parameter_name, list(indices), dependency.single_state, dependency.blocking))
+            resolved.append(state_dependencies)
+        # --- Group states into levels ---
+        self.levels = []
+        unhandled = list(range(len(states)))
+        computed = set()
+        for sweep in range(len(states)):
+            ready = [i for i in unhandled if all(set(indices) <= computed for _, indices, _, blocking in resolved[i] if blocking)]
+            self.levels.append(ready)
+            computed.update(ready)
+            unhandled = [i for i in unhandled if i not in computed]
+            if len(unhandled) == 0:
+                break
+        if len(unhandled) > 0:
+            errstr = 'Cyclic blocking_dependencies in simulation: %s' % [states[i] for i in unhandled]
+            for i in unhandled:
+                blocking = {name: [states[j] for j in indices] for name, indices, _, is_blocking in resolved[i] if is_blocking}
+                errstr += '\nState "%s" with physics "%s" depends on %s' % (states[i], physics[i], blocking)
+            raise AssertionError(errstr)
+        self.order = [i for level in self.levels for i in level]
+        # --- Blocking dependencies are passed in execution order ---
+        position = {i: n for n, i in enumerate(self.order)}
+        self.dependencies = [[(name, sorted(indices, key=position.get) if blocking else indices, single_state, blocking) for name, indices, single_state, blocking in state_dependencies] for state_dependencies in resolved]
+
+
+def _dependency_signature(physics):
+    return tuple((dependency.parameter_name, dependency.tag, dependency.single_state, dependency.blocking, dependency.state_name) for dependency in physics.dependencies)
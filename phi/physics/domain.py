@@ -55,7 +55,7 @@ class Domain(struct.Struct):
     def box(self, box):
         return AABox.to_box(box, resolution_hint=self.resolution)
 
-    @struct.derived()
+    @struct.derived(cached=True)
     def dx(self):
         return self.box.size / self.resolution
 
@@ -200,9 +200,10 @@ class Domain(struct.Struct):
             else:
                 grid = data.at(StaggeredGrid.sample(0, self, batch_size=batch_size))  # ToDo this is not ideal
         elif isinstance(data, (int, float)):
-            shape = self.staggered_shape(batch_size=batch_size, name=name, extrapolation=extrapolation)
-            from phi.physics.field import DIVERGENCE_FREE
-            grid = (math.zeros(shape, dtype=dtype) + data).copied_with(flags=[DIVERGENCE_FREE])
+            from phi.physics.field import StaggeredGrid, DIVERGENCE_FREE
+            from phi.physics.field.staggered_grid import zero_invalid_staggered
+            tensor = zero_invalid_staggered(math.zeros((batch_size,) + tuple(self.resolution + 1) + (self.rank,), dtype=dtype) + data)
+            grid = StaggeredGrid(tensor, self.box, name, batch_size=batch_size, extrapolation=extrapolation).copied_with(flags=[DIVERGENCE_FREE])
         else:
             from .field import StaggeredGrid
             grid = StaggeredGrid(data, self.box, name, batch_size=None, extrapolation=extrapolation)
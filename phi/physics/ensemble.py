@@ -0,0 +1,134 @@
+"""
+Parameter sweeps run as a single batched simulation.
+
+An `Ensemble` holds one set of parameters per member.
+`Ensemble.batch()` tiles the data of a state along the batch dimension and replaces matching state items or physics attributes by tensors holding one value per member.
+All members are then stepped together, e.g. in one World, and `Ensemble.split()` separates the results again.
+"""
+import copy
+
+import numpy as np
+
+from phi import math, struct
+from phi.data.fluidformat import Scene, SceneBatch
+from .domain import DomainState
+from .physics import Physics
+
+
+class Ensemble(object):
+
+    def __init__(self, members):
+        """
+        Ensemble of simulations that only differ in the values of some parameters.
+
+        Example:
+            ensemble = Ensemble.sweep(buoyancy_factor=[0.1, 0.2, 0.4])\n
+            fluid = world.add(ensemble.batch(Fluid(Domain([64, 64]))))\n
+            world.step()\n
+            fluids = ensemble.split(fluid.state)
+
+        :param members: list of dicts mapping parameter names to the values of one member. All members must define the same parameters.
+        """
+        self.members = tuple(dict(member) for member in members)
+        assert len(self.members) > 0, 'Ensemble requires at least one member'
+        names = set(self.members[0])
+        for member in self.members:
+            assert set(member) == names, 'All ensemble members must define the same parameters but got %s and %s' % (sorted(names), sorted(member))
+        self.parameter_names = tuple(sorted(names))
+
+    @staticmethod
+    def sweep(**parameters):
+        """
+        Creates an Ensemble from lists of parameter values. Member i uses the i-th value of every list.
+        :param parameters: parameter names mapped to lists of equal length
+        :return: Ensemble
+        """
+        sizes = set(len(values) for values in parameters.values())
+        assert len(sizes) == 1, 'All parameter lists must have the same length but got %s' % {name: len(values) for name, values in parameters.items()}
+        return Ensemble([dict(zip(parameters.keys(), values)) for values in zip(*parameters.values())])
+
+    @property
+    def size(self):
+        return len(self.members)
+
+    def parameter(self, name, rank=0):
+        """
+        Stacks the values of a parameter along the batch dimension.
+        :param name: parameter name
+        :param rank: number of inner dimensions to append so that the result broadcasts against tensors of shape (batch, ...)
+        :return: float tensor of shape (size, 1, ..., 1)
+        """
+        values = np.array([member[name] for member in self.members])
+        return math.to_float(np.reshape(values, (self.size,) + (1,) * rank))
+
+    def batch(self, obj, rank=None):
+        """
+        Creates the batched version of a State or Physics object.
+
+        For States, all data is tiled to the ensemble size and items named like a parameter are replaced by the stacked parameter values.
+        For Physics, attributes named like a parameter are replaced in a shallow copy.
+
+        :param obj: State or Physics
+        :param rank: (optional) number of inner dimensions of the parameter tensors. Defaults to the spatial rank + 1 for DomainStates and 0 otherwise which broadcasts in functions using `math.batch_align` such as `diffuse`.
+        :return: object of the same type as `obj`
+        """
+        if rank is None:
+            rank = obj.domain.rank + 1 if isinstance(obj, DomainState) else 0
+        if isinstance(obj, Physics):
+            obj = copy.copy(obj)
+            for name in self.parameter_names:
+                if hasattr(obj, name):
+                    setattr(obj, name, self.parameter(name, rank))
+            return obj
+        obj = struct.map(self._tile, obj)
+        items = {name: self.parameter(name, rank) for name in self.parameter_names if name in _item_names(obj)}
+        return obj.copied_with(**items) if items else obj
+
+    def split(self, obj):
+        """
+        Separates a batched State into one State per member.
+        Data is sliced along the batch dimension and parameter items are set to the values of the member.
+        :param obj: State created by `batch()` or stepped from one
+        :return: list of States, one per member
+        """
+        names = _item_names(obj)
+        result = []
+        for i, member in enumerate(self.members):
+            member_state = struct.map(lambda tensor: self._slice(tensor, i), obj)
+            items = {name: member[name] for name in self.parameter_names if name in names}
+            result.append(member_state.copied_with(**items) if items else member_state)
+        return result
+
+    def scenes(self, directory, category=None, mkdir=True, copy_calling_script=True):
+        """
+        Creates one Scene per member and stores the member parameters in the scene properties.
+        Writing a batched state to the returned SceneBatch writes each member to its own scene.
+        :return: SceneBatch
+        """
+        scenes = [Scene.create(directory, category, 1, mkdir, copy_calling_script) for _ in self.members]
+        for scene, member in zip(scenes, self.members):
+            scene.put_property('ensemble_member', {name: _json_value(value) for name, value in member.items()})
+        return SceneBatch(scenes)
+
+    def _tile(self, tensor):
+        shape = math.staticshape(tensor)
+        if len(shape) == 0 or shape[0] != 1 or self.size == 1:
+            return tensor
+        return math.tile(tensor, (self.size,) + (1,) * (len(shape) - 1))
+
+    def _slice(self, tensor, index):
+        shape = math.staticshape(tensor)
+        if len(shape) == 0 or shape[0] != self.size:
+            return tensor
+        return tensor[index:index + 1, ...]
+
+    def __repr__(self):
+        return 'Ensemble(%d members: %s)' % (self.size, ', '.join(self.parameter_names))
+
+
+def _item_names(obj):
+    return struct.to_dict(obj, item_condition=struct.ALL_ITEMS) if isinstance(obj, struct.Struct) else {}
+
+
+def _json_value(value):
+    return value.tolist() if isinstance(value, np.ndarray) else (value.item() if isinstance(value, np.generic) else value)
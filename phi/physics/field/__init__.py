@@ -2,6 +2,7 @@ from .field import Field, StaggeredSamplePoints, IncompatibleFieldTypes
 from .flag import Flag, DIVERGENCE_FREE, L2_NORMALIZED
 from .constant import ConstantField
 from .grid import CenteredGrid
+from .lazy import LazyGrid
 from .staggered_grid import StaggeredGrid, unstack_staggered_tensor
 from .sampled import SampledField
 from .analytic import AnalyticField, SymbolicFieldBackend
@@ -8,6 +8,8 @@ from .field import Field
 @struct.definition()
 class AnalyticField(Field):
 
+    __slots__ = ('_rank',)
+
     def __init__(self, rank, data=None, name=None, **kwargs):
         Field.__init__(self, **struct.kwargs(locals(), ignore='rank'))
         self._rank = rank
@@ -107,6 +109,8 @@ class SymbolicFieldBackend(Backend):
 @struct.definition()
 class _SymbolicOpField(AnalyticField):
 
+    __slots__ = ('fields', 'channels')
+
     def __init__(self, function, function_args, **kwargs):
         fields = filter(lambda arg: isinstance(arg, Field), function_args)
         AnalyticField.__init__(self, _determine_rank(fields), name=function.__name__, **struct.kwargs(locals(), ignore='fields'))
@@ -1,7 +1,14 @@
+import numpy as np
+
 from phi import math, struct
 from phi.geom import GLOBAL_AXIS_ORDER
 
 from .analytic import AnalyticField
+from .grid import CenteredGrid
+
+
+MEMORY_BUDGET = 2 ** 22
+""" Default maximum number of elements of the pairwise (points x sources) distance tensor computed at once by AngularVelocity.sample_at. """
 
 
 @struct.definition()
@@ -11,6 +18,25 @@ class AngularVelocity(AnalyticField):
         AnalyticField.__init__(self, rank=None, **struct.kwargs(locals()))
 
     def sample_at(self, points):
+        """
+        Computes the velocity induced by all sources at the given points.
+        If the pairwise distance tensor would exceed `memory_budget` elements, the points are processed in chunks.
+        """
+        point_shape = math.staticshape(points)
+        source_shape = math.staticshape(self.location)
+        if None in point_shape[1:] or None in source_shape[1:]:  # unknown sizes cannot be chunked
+            return self._sample(points)
+        point_count = int(np.prod(point_shape[1:-1]))
+        source_count = int(np.prod(source_shape[1:-1]))
+        budget = MEMORY_BUDGET if self.memory_budget is None else self.memory_budget
+        chunk_size = max(1, budget // (source_count * self.rank))
+        if point_count <= chunk_size:
+            return self._sample(points)
+        points = math.reshape(points, [-1, point_count, point_shape[-1]])
+        velocities = [self._sample(points[:, start:start + chunk_size]) for start in range(0, point_count, chunk_size)]
+        return math.reshape(math.concat(velocities, axis=1), [-1] + list(point_shape[1:]))
+
+    def _sample(self, points):
         points_rank = math.spatial_rank(points)
         src_rank = math.spatial_rank(self.location)
         # --- Expand shapes to format (batch_size, points_dims..., src_dims..., channels) ---
@@ -29,19 +55,62 @@ class AngularVelocity(AnalyticField):
         else:
             strength = src_strength
         # --- Compute velocities ---
-        if math.staticshape(points)[-1] == 2:  # Curl in 2D
-            dist_1, dist_2 = math.unstack(distances, axis=-1)
-            if GLOBAL_AXIS_ORDER.is_x_first:
-                velocity = strength * math.stack([-dist_2, dist_1], axis=-1)
-            else:
-                velocity = strength * math.stack([dist_2, -dist_1], axis=-1)
-        elif math.staticshape(points)[-1] == 3:  # Curl in 3D
-            raise NotImplementedError('not yet implemented')
-        else:
-            raise AssertionError('Vector product not available in > 3 dimensions')
+        velocity = strength * _perpendicular(distances)
         velocity = math.sum(velocity, axis=src_axes)
         return velocity
 
+    def periodic_at(self, grid):
+        """
+        Computes the induced velocity at the cell centers of `grid`, treating its box as a periodic domain.
+
+        The source strengths are deposited onto the grid (cloud-in-cell) and convolved with the velocity kernel using FFTs.
+        This takes O(N log N) operations for N cells, independent of the number of sources.
+        Only the nearest periodic image of each source contributes, so the falloff should decay within half the domain size.
+        The falloff function must be the same for all sources, i.e. it may not hold per-source parameters.
+        With TensorFlow, gradients are not propagated to the source strengths through the deposit.
+
+        :param grid: CenteredGrid or Domain defining box and resolution
+        :return: CenteredGrid holding the velocity
+        """
+        resolution = np.array(grid.resolution)
+        dx = np.array(grid.box.size / resolution) * np.ones(len(resolution))
+        density = self._deposit(grid.box, resolution)
+        kernel = self._kernel(resolution, dx)
+        velocity = math.real(math.ifft(math.fft(math.to_complex(density)) * math.fft(math.to_complex(kernel))))
+        velocity = math.cast(velocity, math.dtype(self.location))
+        return CenteredGrid(velocity, box=grid.box, extrapolation='periodic', name=self.name)
+
+    def _deposit(self, box, resolution):
+        rank = len(resolution)
+        location = math.reshape(self.location, [-1, int(np.prod(math.staticshape(self.location)[1:-1])), rank])
+        strength = math.expand_dims(self.strength, axis=-1)
+        if math.ndims(strength) == 1:
+            strength = math.expand_dims(strength, axis=-2)
+        strength = math.reshape(math.zeros_like(self.location[..., :1]) + strength, [-1, math.staticshape(location)[1], 1])
+        cell_coordinates = box.global_to_local(location) * resolution - 0.5
+        lower_index = math.floor(cell_coordinates)
+        upper_weight = cell_coordinates - lower_index
+        lower_index = math.to_int(lower_index)
+        batch_size = math.staticshape(location)[0]
+        density = 0
+        for corner in np.ndindex(*[2] * rank):
+            weight = 1
+            for d, c in enumerate(corner):
+                weight *= upper_weight[..., d:d + 1] if c else 1 - upper_weight[..., d:d + 1]
+            indices = (lower_index + np.array(corner)) % resolution
+            density += math.scatter(location, _batch_indices(indices, batch_size), strength * weight, (batch_size,) + tuple(resolution) + (1,), duplicates_handling='add')
+        return density
+
+    def _kernel(self, resolution, dx):
+        indices = np.stack(np.meshgrid(*[np.arange(n) for n in resolution], indexing='ij'), axis=-1)
+        distances = (((indices + resolution // 2) % resolution - resolution // 2) * dx)[np.newaxis, ...]
+        off_center = np.any(distances != 0, axis=-1, keepdims=True)
+        kernel = _perpendicular(math.to_float(distances))
+        if self.falloff is not None:
+            # the kernel vanishes at the source itself, replace the zero distance to avoid singular falloff values
+            kernel = kernel * self.falloff(math.to_float(np.where(off_center, distances, dx))) * math.to_float(off_center)
+        return kernel
+
     @property
     def component_count(self):
         return self.rank
@@ -63,6 +132,33 @@ class AngularVelocity(AnalyticField):
         assert callable(falloff) or falloff is None
         return falloff
 
+    @struct.constant(default=None)
+    def memory_budget(self, memory_budget):
+        """
+Maximum number of elements of the pairwise (points x sources) distance tensor computed at once by sample_at().
+If None, the module default MEMORY_BUDGET is used.
+        """
+        assert memory_budget is None or memory_budget > 0
+        return memory_budget
+
     @property
     def rank(self):
         return math.staticshape(self.location)[-1]
+
+
+def _perpendicular(distances):
+    if math.staticshape(distances)[-1] == 2:  # Curl in 2D
+        dist_1, dist_2 = math.unstack(distances, axis=-1)
+        if GLOBAL_AXIS_ORDER.is_x_first:
+            return math.stack([-dist_2, dist_1], axis=-1)
+        else:
+            return math.stack([dist_2, -dist_1], axis=-1)
+    elif math.staticshape(distances)[-1] == 3:  # Curl in 3D
+        raise NotImplementedError('not yet implemented')
+    else:
+        raise AssertionError('Vector product not available in > 3 dimensions')
+
+
+def _batch_indices(indices, batch_size):
+    batch_ids = math.zeros_like(indices[..., :1]) + np.arange(batch_size).reshape([batch_size, 1, 1])
+    return math.concat([batch_ids, indices], axis=-1)
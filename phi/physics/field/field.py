@@ -210,6 +210,9 @@ class Field(State):
             other_data = other.data if other.has_points else other.at(self).data
             data = data_operator(self_data, other_data)
         else:
+            from .lazy import LazyGrid
+            if isinstance(other, LazyGrid):
+                return NotImplemented
             flags = propagate_flags_operation(self.flags, linear_if_scalar, self.rank, self.component_count)
             data = data_operator(self.data, other)
         return self.copied_with(data=data, flags=flags)
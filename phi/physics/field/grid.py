@@ -73,7 +73,7 @@ class CenteredGrid(Field):
         return data
     data.override(struct.staticshape, lambda self, data: (self._batch_size,) + math.staticshape(data)[1:])
 
-    @property
+    @struct.derived(cached=True)
     def resolution(self):
         if self.content_type in (struct.VALID, struct.INVALID):
             return math.as_tensor(math.staticshape(self.data)[1:-1])
@@ -86,7 +86,7 @@ class CenteredGrid(Field):
     def box(self, box):
         return AABox.to_box(box, resolution_hint=self.resolution)
 
-    @struct.derived()
+    @struct.derived(cached=True)
     def dx(self):
         return self.box.size / self.resolution
 
@@ -204,14 +204,8 @@ class CenteredGrid(Field):
         points = box.local_to_global(local_coords)
         return CenteredGrid(points, box, name='grid_centers(%s, %s)' % (box, resolution), flags=[SAMPLE_POINTS])
 
-    def laplace(self, physical_units=True, axes=None):
-        if not physical_units:
-            data = math.laplace(self.data, padding=_pad_mode(self.extrapolation), axes=axes)
-        else:
-            if not self.has_cubic_cells:
-                raise NotImplementedError('Only cubic cells supported.')
-            laplace = math.laplace(self.data, padding=_pad_mode(self.extrapolation), axes=axes)
-            data = laplace / self.dx[0] ** 2
+    def laplace(self, physical_units=True, axes=None, order=2):
+        data = math.stencil.laplace(self.data, padding=_pad_mode(self.extrapolation), axes=axes, dx=self.dx if physical_units else 1, order=order)
         extrapolation = map_for_axes(_gradient_extrapolation, self.extrapolation, axes, self.rank)
         return self.copied_with(data=data, extrapolation=extrapolation, flags=())
 
@@ -222,6 +216,15 @@ class CenteredGrid(Field):
         else:
             raise NotImplementedError('Only cubic cells supported.')
 
+    def lazy(self):
+        """
+        Returns a LazyGrid wrapping this grid.
+        Arithmetic on the result is deferred and evaluated in one fused pass when `data` or `evaluate()` is accessed.
+        :return: LazyGrid
+        """
+        from .lazy import LazyGrid
+        return LazyGrid(self, self.data)
+
     @property
     def has_cubic_cells(self):
         return np.allclose(self.dx, np.mean(self.dx))
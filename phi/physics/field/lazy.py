@@ -0,0 +1,76 @@
+from phi.math import fused
+
+from .grid import CenteredGrid
+
+
+class LazyGrid(object):
+    """
+    Deferred arithmetic on CenteredGrids.
+
+    Operators applied to a LazyGrid are recorded in an expression graph instead of being computed one by one.
+    Accessing `data` or calling `evaluate()` computes the whole expression in one fused pass (see `phi.math.fused`).
+    This avoids allocating a temporary grid for every intermediate result.
+
+    Create a LazyGrid using `CenteredGrid.lazy()`.
+    """
+
+    __array_ufunc__ = None  # let NumPy arrays defer to the reflected operators
+
+    def __init__(self, grid, expression):
+        assert isinstance(grid, CenteredGrid)
+        self.grid = grid
+        self.expression = fused.lazy(expression)
+
+    @property
+    def data(self):
+        return fused.evaluate(self.expression)
+
+    def evaluate(self):
+        """
+        Computes the expression and returns the result as a CenteredGrid.
+        Box, extrapolation and name are taken from the first grid of the expression.
+        :return: CenteredGrid
+        """
+        return self.grid.copied_with(data=self.data, flags=())
+
+    def _op(self, other, operator):
+        if isinstance(other, LazyGrid):
+            assert self.grid.compatible(other.grid), 'Fields are not compatible: %s and %s' % (self.grid, other.grid)
+            other = other.expression
+        elif isinstance(other, CenteredGrid):
+            assert self.grid.compatible(other), 'Fields are not compatible: %s and %s' % (self.grid, other)
+            other = other.data
+        return LazyGrid(self.grid, operator(self.expression, fused.lazy(other)))
+
+    def __add__(self, other):
+        return self._op(other, lambda a, b: a + b)
+
+    def __radd__(self, other):
+        return self._op(other, lambda a, b: b + a)
+
+    def __sub__(self, other):
+        return self._op(other, lambda a, b: a - b)
+
+    def __rsub__(self, other):
+        return self._op(other, lambda a, b: b - a)
+
+    def __mul__(self, other):
+        return self._op(other, lambda a, b: a * b)
+
+    def __rmul__(self, other):
+        return self._op(other, lambda a, b: b * a)
+
+    def __truediv__(self, other):
+        return self._op(other, lambda a, b: a / b)
+
+    def __rtruediv__(self, other):
+        return self._op(other, lambda a, b: b / a)
+
+    def __pow__(self, power, modulo=None):
+        return self._op(power, lambda a, b: a ** b)
+
+    def __neg__(self):
+        return LazyGrid(self.grid, -self.expression)
+
+    def __repr__(self):
+        return 'Lazy%s = %s' % (self.grid, self.expression)
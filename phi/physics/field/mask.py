@@ -1,9 +1,13 @@
 import warnings
 
+import numpy as np
+
 from phi import struct, math, geom
+from phi.geom._union import Union, GridUnion
 
-from .field import Field
+from .field import Field, propagate_flags_resample
 from .analytic import AnalyticField
+from .grid import CenteredGrid
 
 
 @struct.definition()
@@ -43,6 +47,13 @@ If True, field values smoothly go from 0 to 1 at the surface and the field is di
     def sample_at(self, points):
         return math.to_float(self.geometry.lies_inside(points))
 
+    def at(self, other_field):
+        if isinstance(other_field, CenteredGrid):
+            data = _rasterize(self, other_field)
+            if data is not None:
+                return other_field.copied_with(data=data, flags=propagate_flags_resample(self, other_field.flags, other_field.rank))
+        return Field.at(self, other_field)
+
     @property
     def component_count(self):
         return 1
@@ -51,6 +62,51 @@ If True, field values smoothly go from 0 to 1 at the surface and the field is di
 mask = GeometryMask
 
 
+def _rasterize(mask, grid):
+    """
+    Samples `mask` at the cells of `grid`, only evaluating the cells within the bounding boxes of the geometries.
+    All other cells are zero.
+
+    :return: NumPy array of shape (1, resolution..., 1) or None if the geometries or the grid are not given as unbatched NumPy values
+    """
+    geometries = mask.geometry.geometries if isinstance(mask.geometry, Union) and not isinstance(mask.geometry, GridUnion) else (mask.geometry,)
+    lower_corner, dx, resolution = grid.box.lower, grid.dx, grid.resolution
+    if not isinstance(lower_corner, np.ndarray) or not isinstance(dx, np.ndarray):
+        return None
+    lower_corner, dx = np.broadcast_to(lower_corner, [grid.rank]), np.broadcast_to(dx, [grid.rank])
+    margin = np.linalg.norm(dx) / 2 + dx  # antialiased cells are affected up to half a cell diagonal from the surface
+    result = None
+    for geometry in geometries:
+        # --- Cell index range within the bounding box ---
+        try:
+            center, extent = geometry.center, geometry.bounding_half_extent()
+        except NotImplementedError:
+            return None
+        if not math.is_numpy([center, extent]):  # other tensors, e.g. requiring gradients, use the backend-generic sampling
+            return None
+        center, extent = np.array(center, np.float64), np.array(extent, np.float64)
+        lower = (center - extent - margin - lower_corner) / dx - 0.5
+        upper = (center + extent + margin - lower_corner) / dx - 0.5
+        if lower.shape != (grid.rank,) or upper.shape != (grid.rank,) or not np.all(np.isfinite(lower) & np.isfinite(upper)):
+            return None
+        start = np.clip(np.ceil(lower), 0, resolution).astype(np.int64)
+        stop = np.clip(np.floor(upper) + 1, 0, resolution).astype(np.int64)
+        if np.any(stop <= start):
+            continue
+        # --- Evaluate the geometry inside its bounding box ---
+        axes = [lower_corner[d] + (np.arange(start[d], stop[d]) + 0.5) * dx[d] for d in range(grid.rank)]
+        points = math.to_float(np.expand_dims(np.stack(np.meshgrid(*axes, indexing='ij'), -1), 0))
+        if mask.antialias:
+            values = geometry.approximate_fraction_inside(geom.box(center=points, size=dx))
+        else:
+            values = math.to_float(geometry.lies_inside(points))
+        if result is None:
+            result = np.zeros([1] + list(resolution) + [1], values.dtype)
+        region = (slice(None),) + tuple(slice(lo, hi) for lo, hi in zip(start, stop)) + (slice(None),)
+        result[region] = np.maximum(result[region], values)
+    return result if result is not None else math.to_float(np.zeros([1] + list(resolution) + [1]))
+
+
 def union_mask(geometries):
     warnings.warn("union_mask() is deprecated, use mask(union()) instead.", DeprecationWarning)
     return mask(geom.union(*geometries))
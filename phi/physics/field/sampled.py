@@ -14,6 +14,8 @@ from .util import extrapolate
 @struct.definition()
 class SampledField(Field):
 
+    __slots__ = ('_point_count',)
+
     def __init__(self, sample_points, data=1, mode='mean', point_count=None, **kwargs):
         Field.__init__(self, **struct.kwargs(locals(), ignore=['point_count']))
         self._point_count = point_count
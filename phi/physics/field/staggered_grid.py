@@ -42,12 +42,22 @@ def unstack_staggered_tensor(tensor):
 
 
 def stack_staggered_components(tensors):
+    tensors = list(tensors)
     for i, tensor in enumerate(tensors):
         paddings = [[0, 1] if d != i else [0, 0] for d in range(len(tensors))]
         tensors[i] = math.pad(tensor, [[0, 0]] + paddings + [[0, 0]])
     return math.concat(tensors, -1)
 
 
+def zero_invalid_staggered(tensor):
+    """
+    Sets the invalid upper entries of a staggered tensor to zero, like `stack_staggered_components` does.
+    :param tensor: staggered tensor of shape (batch_size, *resolution + 1, rank)
+    :return: tensor of the same shape
+    """
+    return stack_staggered_components(unstack_staggered_tensor(tensor))
+
+
 def staggered_component_box(resolution, axis, box_like=None):
     staggered_box = AABox(0, resolution) if box_like is None else AABox.to_box(box_like, resolution_hint=resolution)
     unit = np.array([(staggered_box.size[axis] / resolution[axis]) if d == axis else 0 for d in range(len(resolution))])
@@ -57,8 +67,19 @@ def staggered_component_box(resolution, axis, box_like=None):
 
 @struct.definition()
 class StaggeredGrid(Field):
+    """
+    Holds one CenteredGrid per vector component, each sampled at the lower faces of the cells along its axis.
+
+    Grids created from a staggered tensor (see `staggered_tensor()`) keep that tensor as their storage.
+    Their components are views into it so that `staggered_tensor()` does not need to pad and concatenate the components.
+    Element-wise operations between such grids and scalars or other such grids operate on the staggered tensor directly.
+    The invalid upper rows of the staggered tensor are kept at zero.
+    """
+
+    __slots__ = ('_buffer',)
 
     def __init__(self, data, box=None, name=None, **kwargs):
+        self._buffer = None
         Field.__init__(self, **struct.kwargs(locals()))
 
     @staticmethod
@@ -80,13 +101,29 @@ class StaggeredGrid(Field):
     def data(self, data):
         assert data is not None
         if math.is_tensor(data) is True:
+            buffer = data
             components = unstack_staggered_tensor(data)
         else:
+            buffer = self._buffered_tensor(data)
             components = data
         result = []
         for cmp_idx, grid in enumerate(components):
             result.append(self._component_grid(grid, cmp_idx))
-        return tuple(result)
+        result = tuple(result)
+        self._buffer = (result, buffer) if buffer is not None else None
+        return result
+
+    def _buffered_tensor(self, components=None):
+        """
+        :param components: component tuple to check, defaults to self.data
+        :return: staggered tensor holding the values of `components` if this grid stores one, else None
+        """
+        if self._buffer is None:
+            return None
+        buffered_components, buffer = self._buffer
+        if (self.data if components is None else components) is buffered_components:
+            return buffer
+        return None
 
     def _component_grid(self, grid, axis):
         resolution = list(grid.resolution if isinstance(grid, CenteredGrid) else math.staticshape(grid)[1:-1])
@@ -108,7 +145,7 @@ class StaggeredGrid(Field):
     def rank(self):
         return len(self.resolution)
 
-    @struct.derived()
+    @struct.derived(cached=True)
     def resolution(self):
         return _res(self.data[0], 0)
 
@@ -118,7 +155,7 @@ class StaggeredGrid(Field):
         assert_same_rank(len(self.data), self.box, 'StaggeredGrid.data does not match box.')
         return box
 
-    @struct.derived()
+    @struct.derived(cached=True)
     def dx(self):
         return self.box.size / self.resolution
 
@@ -194,6 +231,14 @@ class StaggeredGrid(Field):
             return False
 
     def __dataop__(self, other, linear_if_scalar, data_operator):
+        buffer = self._buffered_tensor()
+        if buffer is not None:
+            if isinstance(other, StaggeredGrid) and other._buffered_tensor() is not None and self.compatible(other):
+                flags = propagate_flags_operation(self.flags + other.flags, False, self.rank, self.component_count)
+                return self.copied_with(data=zero_invalid_staggered(data_operator(buffer, other._buffered_tensor())), flags=flags)
+            if not isinstance(other, Field) and math.ndims(other) == 0:
+                flags = propagate_flags_operation(self.flags, linear_if_scalar, self.rank, self.component_count)
+                return self.copied_with(data=zero_invalid_staggered(data_operator(buffer, other)), flags=flags)
         if isinstance(other, StaggeredGrid):
             assert self.compatible(other), 'Fields are not compatible: %s and %s' % (self, other)
             data = [data_operator(c1, c2) for c1, c2 in zip(self.data, other.data)]
@@ -208,17 +253,32 @@ class StaggeredGrid(Field):
         return self.copied_with(data=np.array(data, dtype=np.object), flags=flags)
 
     def staggered_tensor(self):
-        tensors = [c.data for c in self.data]
-        return stack_staggered_components(tensors)
+        """
+        Stores all components in a single tensor of shape (batch_size, *resolution + 1, rank).
+        The upper-most entries along the axes which are not the component axis are invalid.
+
+        For valid grids, the tensor is computed at most once and reused by subsequent calls.
+        :return: staggered tensor
+        """
+        buffer = self._buffered_tensor()
+        if buffer is None:
+            buffer = stack_staggered_components([c.data for c in self.data])
+            if self.is_valid:
+                self._buffer = (self.data, buffer)
+        return buffer
+
+    def buffered(self):
+        """
+        Returns an equivalent StaggeredGrid whose components are views into a single staggered tensor.
+        This makes `staggered_tensor()` free and lets element-wise operations with other buffered grids run on the whole tensor at once.
+        :return: StaggeredGrid
+        """
+        return self.copied_with(data=self.staggered_tensor())
 
     def divergence(self, physical_units=True):
-        components = []
-        for dim, field in enumerate(self.data):
-            grad = math.axis_gradient(field.data, dim)
-            if physical_units:
-                grad /= self.dx[dim]
-            components.append(grad)
-        data = math.sum(components, 0)
+        buffer = self._buffered_tensor()
+        tensor = buffer if buffer is not None else [component.data for component in self.data]
+        data = math.stencil.staggered_divergence(tensor, dx=self.dx if physical_units else 1)
         return CenteredGrid(data, self.box, name='div(%s)' % self.name, batch_size=self._batch_size)
 
     def padded(self, widths):
@@ -244,12 +304,13 @@ class StaggeredGrid(Field):
         data = scalar_field.data
         if data.shape[-1] != 1:
             raise ValueError('input must be a scalar field')
+        padded = math.pad(data, [[0, 0]] + [[1, 1]] * scalar_field.rank + [[0, 0]], padding_mode)
+        upper = padded[tuple([slice(None)] + [slice(1, None)] * scalar_field.rank + [slice(None)])]
         tensors = []
         for dim in math.spatial_dimensions(data):
-            upper = math.pad(data, [[0,1] if d == dim else [0,0] for d in math.all_dimensions(data)], padding_mode)
-            lower = math.pad(data, [[1,0] if d == dim else [0,0] for d in math.all_dimensions(data)], padding_mode)
+            lower = padded[tuple([slice(None)] + [slice(None, -1) if d == dim else slice(1, None) for d in math.spatial_dimensions(data)] + [slice(None)])]
             tensors.append((upper - lower) / scalar_field.dx[dim - 1])
-        return StaggeredGrid(tensors, scalar_field.box, name='grad(%s)' % scalar_field.name,
+        return StaggeredGrid(zero_invalid_staggered(math.concat(tensors, -1)), scalar_field.box, name='grad(%s)' % scalar_field.name,
                              batch_size=scalar_field._batch_size)
 
     @staticmethod
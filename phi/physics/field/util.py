@@ -3,34 +3,47 @@ import itertools
 
 import numpy as np
 from numpy import pi
+from scipy import ndimage
 from phi import math, struct
 from phi.geom import AABox
+from phi.math.optim import conjugate_gradient
 from phi.physics.field import ConstantField, StaggeredGrid
 
 from .field import Field, StaggeredSamplePoints
-from .grid import CenteredGrid
+from .grid import CenteredGrid, _pad_mode
 
 
-def diffuse(field, amount, substeps=1):
+def diffuse(field, amount, substeps=1, implicit=False, accuracy=1e-5, max_iterations=1000, fluiddomain=None, enable_backprop=True):
     u"""
 Simulate a finite-time diffusion process of the form dF/dt = α · ΔF on a given `Field` F with diffusion coefficient α.
 
 If `field` is periodic (set via `extrapolation='periodic'`), diffusion may be simulated in Fourier space.
-Otherwise, finite differencing is used to approximate the
+Otherwise, finite differencing is used to approximate the Laplace operator.
+Explicit substeps are only stable for small amounts relative to dx².
+With `implicit=True`, each substep instead solves the backward Euler system (1 - α · Δ) F' = F using conjugate gradient, warm-started from F.
+This is stable for arbitrarily large amounts.
+
+If `fluiddomain` is given, only cells that are both accessible and active exchange values, like in the pressure solvers.
+Obstacles, inactive cells and closed boundaries then neither receive nor pass on any flux and keep their values.
     :param field: CenteredGrid, StaggeredGrid or ConstantField
     :param amount: number of Field, typically α · dt
     :param substeps: number of iterations to use
+    :param implicit: whether to use backward Euler steps instead of explicit ones for non-periodic fields
+    :param accuracy: maximum residual of the implicit solve in every cell
+    :param max_iterations: maximum number of conjugate gradient iterations per implicit substep
+    :param fluiddomain: (optional) FluidDomain whose accessible and active masks restrict the diffusion
+    :param enable_backprop: whether automatic differentiation through the implicit solve should be enabled
     :return: Field of same type as `field`
     :rtype: Field
     """
     if isinstance(field, ConstantField):
         return field
     if isinstance(field, StaggeredGrid):
-        return struct.map(lambda grid: diffuse(grid, amount, substeps=substeps), field, leaf_condition=lambda x: isinstance(x, CenteredGrid))
+        return struct.map(lambda grid: diffuse(grid, amount, substeps, implicit, accuracy, max_iterations, fluiddomain, enable_backprop), field, leaf_condition=lambda x: isinstance(x, CenteredGrid))
     assert isinstance(field, CenteredGrid), "Cannot diffuse field of type '%s'" % type(field)
-    if field.extrapolation == 'periodic' and not isinstance(amount, Field):
+    if field.extrapolation == 'periodic' and not isinstance(amount, Field) and fluiddomain is None:
         fft_laplace = -(2 * pi) ** 2 * field.squared_frequencies
-        diffuse_kernel = math.exp(fft_laplace * amount)
+        diffuse_kernel = math.exp(fft_laplace * math.batch_align(amount, 0, field.data))
         return math.real(math.ifft(field.fft() * math.to_complex(diffuse_kernel)))
     else:
         data = field.data
@@ -38,11 +51,54 @@ Otherwise, finite differencing is used to approximate the
             amount = amount.at(field).data
         else:
             amount = math.batch_align(amount, 0, data)
+        padding = _pad_mode(field.extrapolation)
+        if fluiddomain is None:
+            def laplace(x):
+                return math.stencil.laplace(x, padding=padding, dx=field.dx)
+        else:
+            weights = _diffusion_weights(fluiddomain, field)
+            def laplace(x):
+                return _masked_laplace(x, weights, padding, field.dx)
         for i in range(substeps):
-            data += amount / substeps * field.laplace().data
+            if implicit:
+                def apply_A(x):
+                    return x - amount / substeps * laplace(x)
+                data = conjugate_gradient(apply_A, data, data, accuracy, max_iterations, back_prop=enable_backprop).x
+            else:
+                data = data + amount / substeps * laplace(data)
     return field.with_data(data)
 
 
+def _diffusion_weights(fluiddomain, grid):
+    """
+    Padded mask of the cells of `grid` that take part in the diffusion.
+    Staggered components use the faces between two accessible and active cells.
+    """
+    widths = [[0, 0]] + [[1, 1]] * fluiddomain.rank + [[0, 0]]
+    mask = fluiddomain.accessible_tensor(extend=1) * math.pad(fluiddomain.active.data, widths, constant_values=1)
+    offset = grid.resolution - fluiddomain.domain.resolution
+    if np.all(offset == 0):
+        return mask
+    assert np.sum(offset) == 1 and np.all(offset >= 0), 'Grid of resolution %s does not match domain %s' % (grid.resolution, fluiddomain.domain)
+    axis = int(np.argmax(offset))
+    lower = math.stencil.shifted(mask, axis, -1, (1, 0), axes=[axis])
+    upper = math.stencil.shifted(mask, axis, 0, (1, 0), axes=[axis])
+    return math.pad(math.minimum(lower, upper), [[0, 0]] + [[1, 1] if ax == axis else [0, 0] for ax in range(fluiddomain.rank)] + [[0, 0]])
+
+
+def _masked_laplace(tensor, weights, padding, dx):
+    """ Laplace operator where only pairs of neighbouring cells with non-zero weights exchange values. Symmetric for symmetric padding. """
+    tensor = math.stencil.pad(tensor, 1, padding)
+    rank = math.spatial_rank(tensor)
+    scales = np.array(np.broadcast_to(dx, [rank]), np.float64) ** -2
+    center = math.stencil.shifted(tensor, None, 0, 1)
+    result = 0
+    for ax in range(rank):
+        for shift in (-1, 1):
+            result += math.stencil.shifted(weights, ax, shift, 1) * (math.stencil.shifted(tensor, ax, shift, 1) - center) * float(scales[ax])
+    return math.stencil.shifted(weights, None, 0, 1) * result
+
+
 def data_bounds(field):
     assert field.has_points
     try:
@@ -66,13 +122,14 @@ def staggered_curl_2d(grid, pad_width=(1, 2)):
     return StaggeredGrid(vector_field, box=grid.box)
 
 
-def extrapolate(input_field, valid_mask, voxel_distance=10):
+def extrapolate(input_field, valid_mask, voxel_distance=10, use_distance_transform=True):
     """
     Create a signed distance field for the grid, where negative signs are fluid cells and positive signs are empty cells. The fluid surface is located at the points where the interpolated value is zero. Then extrapolate the input field into the air cells.
         :param domain: Domain that can create new Fields
         :param input_field: Field to be extrapolated
         :param valid_mask: One dimensional binary mask indicating where fluid is present
         :param voxel_distance: Optional maximal distance (in number of grid cells) where signed distance should still be calculated / how far should be extrapolated.
+        :param use_distance_transform: If True and all data are NumPy arrays, the distances and nearest valid cells are computed in one pass using scipy.ndimage.distance_transform_edt instead of iteratively.
         :return: ext_field: a new Field with extrapolated values, s_distance: tensor containing signed distance field, depending only on the valid_mask
     """
     ext_data = input_field.data
@@ -129,7 +186,13 @@ def extrapolate(input_field, valid_mask, voxel_distance=10):
                 # Mixed axis direction (1,1,0), (1,1,-1), etc.
                 continue
 
-    for _ in range(voxel_distance):
+    if use_distance_transform and isinstance(ext_data, np.ndarray) and isinstance(s_distance, np.ndarray):
+        ext_data, s_distance = _extrapolate_nearest(ext_data, s_distance, valid_mask, surface_mask, dx, voxel_distance)
+        voxel_distance_iterations = 0
+    else:
+        voxel_distance_iterations = voxel_distance
+
+    for _ in range(voxel_distance_iterations):
         buffered_distance = 1.0 * s_distance  # Create a copy of current voxel_distance. This should not be necessary...
         for d in directions:
             if (d == 0).all():
@@ -170,6 +233,39 @@ def extrapolate(input_field, valid_mask, voxel_distance=10):
     return ext_field, s_distance
 
 
+def _extrapolate_nearest(ext_data, s_distance, valid_mask, surface_mask, dx, voxel_distance):
+    """
+Non-iterative version of the extrapolation loop in extrapolate() for NumPy arrays.
+Empty cells within voxel_distance steps copy the values of the nearest cell that already holds valid data (fluid cells and cells set by the staggered pre-pass).
+Their distance is the Euclidean distance to the nearest fluid cell.
+    """
+    rank = math.spatial_rank(ext_data)
+    dx = np.broadcast_to(np.array(dx, np.float64), [rank])
+    batch_size = max(ext_data.shape[0], s_distance.shape[0])
+    dtype = s_distance.dtype
+    ext_data = np.array(np.broadcast_to(ext_data, (batch_size,) + ext_data.shape[1:]))
+    s_distance = np.array(np.broadcast_to(s_distance, (batch_size,) + s_distance.shape[1:]), np.float64)
+    valid_mask = np.broadcast_to(valid_mask, s_distance.shape) > 0
+    surface_mask = np.broadcast_to(surface_mask, s_distance.shape) > 0
+    initial_distance = np.max(np.abs(s_distance))
+    for b in range(batch_size):
+        valid = valid_mask[b, ..., 0]
+        source = valid | (np.abs(s_distance[b, ..., 0]) < initial_distance)
+        if not np.any(source) or np.all(source):
+            continue
+        nearest = ndimage.distance_transform_edt(~source, return_distances=False, return_indices=True)
+        updates = ~source & (np.max(np.abs(nearest - np.indices(source.shape)), axis=0) <= voxel_distance)
+        ext_data[b][updates] = ext_data[b][tuple(index[updates] for index in nearest)]
+        if np.any(valid):
+            distance, nearest = ndimage.distance_transform_edt(~valid, sampling=dx, return_indices=True)
+            updates = ~valid & (np.max(np.abs(nearest - np.indices(valid.shape)), axis=0) <= voxel_distance)
+            s_distance[b, ..., 0][updates] = distance[updates]
+        interior = valid & ~surface_mask[b, ..., 0]
+        if np.any(interior) and not np.all(interior):
+            s_distance[b, ..., 0][interior] = -ndimage.distance_transform_edt(interior, sampling=dx)[interior]
+    return ext_data, s_distance.astype(dtype)
+
+
 def create_surface_mask(liquid_mask):
     """
 Computes inner contours of the liquid_mask.
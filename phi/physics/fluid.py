@@ -1,14 +1,15 @@
 """
 Definition of Fluid, IncompressibleFlow as well as fluid-related functions.
 """
+import threading
 import warnings
+from collections import OrderedDict
 from numbers import Number
 
 import numpy as np
 import six
 
 from phi import math, struct
-from phi.geom import union
 from phi.physics.field import Field, mask
 from phi.physics.field.angular_velocity import AngularVelocity
 
@@ -228,14 +229,7 @@ Projects the given velocity field by solving for and subtracting the pressure.
     # --- Set up FluidDomain ---
     if domain is None:
         domain = Domain(velocity.resolution, OPEN)
-    obstacle_mask = mask(union([obstacle.geometry for obstacle in obstacles]), antialias=False)
-    if obstacle_mask is not None:
-        obstacle_grid = obstacle_mask.at(velocity.center_points).copied_with(extrapolation='constant')
-        active_mask = 1 - obstacle_grid
-    else:
-        active_mask = math.ones(domain.centered_shape(name='active', extrapolation='constant'))
-    accessible_mask = active_mask.copied_with(extrapolation=Material.accessible_extrapolation_mode(domain.boundaries))
-    fluiddomain = FluidDomain(domain, active=active_mask, accessible=accessible_mask)
+    fluiddomain = _FLUID_DOMAIN_CACHE.fluid_domain(domain, [obstacle.geometry for obstacle in obstacles], velocity)
     # --- Boundary Conditions, Pressure Solve ---
     velocity = fluiddomain.with_hard_boundary_conditions(velocity)
     for obstacle in obstacles:
@@ -249,3 +243,86 @@ Projects the given velocity field by solving for and subtracting the pressure.
     gradp = StaggeredGrid.gradient(pressure)
     velocity -= fluiddomain.with_hard_boundary_conditions(gradp)
     return velocity if not return_info else (velocity, {'pressure': pressure, 'iterations': iterations, 'divergence': divergence_field})
+
+
+class FluidDomainCache(object):
+    """
+    Keeps the most recently used FluidDomains and rasterized obstacle masks so that static obstacles are not rasterized again in every call to `divergence_free()`.
+
+    FluidDomains are looked up by domain, velocity grid and obstacle geometries, using their exact values (see `struct.exact_key()`).
+    Obstacles that move by less than the tolerance of struct equality are therefore rasterized again.
+    Obstacle masks are stored per geometry. When one obstacle moves, only its mask needs to be computed again.
+    Only NumPy masks are cached.
+    """
+
+    def __init__(self, max_domains=8, max_masks=64):
+        self.max_domains = max_domains
+        self.max_masks = max_masks
+        self._domains = OrderedDict()
+        self._masks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fluid_domain(self, domain, geometries, velocity):
+        """
+        Returns the FluidDomain for the given obstacle geometries, creating it if it is not cached.
+        :param domain: Domain
+        :param geometries: obstacle geometries
+        :param velocity: StaggeredGrid, the obstacles are sampled at its cell centers
+        :return: FluidDomain
+        """
+        key = _exact_key(domain, velocity.box, tuple(velocity.resolution), math.DYNAMIC_BACKEND.precision, tuple(geometries))
+        with self._lock:
+            if key in self._domains:
+                self._domains.move_to_end(key)  # mark as most recently used
+                return self._domains[key]
+        masks = [self.obstacle_mask(geometry, velocity) for geometry in geometries]
+        if masks:
+            obstacle_tensor = masks[0]
+            for mask_tensor in masks[1:]:
+                obstacle_tensor = math.maximum(obstacle_tensor, mask_tensor)
+            active_mask = CenteredGrid(1 - obstacle_tensor, velocity.box, extrapolation='constant', name='active')
+        else:
+            active_mask = math.ones(domain.centered_shape(name='active', extrapolation='constant'))
+        accessible_mask = active_mask.copied_with(extrapolation=Material.accessible_extrapolation_mode(domain.boundaries))
+        fluiddomain = FluidDomain(domain, active=active_mask, accessible=accessible_mask)
+        if key is not None and all(isinstance(mask_tensor, np.ndarray) for mask_tensor in masks):
+            with self._lock:
+                _store(self._domains, key, fluiddomain, self.max_domains)
+        return fluiddomain
+
+    def obstacle_mask(self, geometry, velocity):
+        """
+        Rasterizes a geometry at the cell centers of `velocity`.
+        :return: mask tensor with ones inside and zeros outside the geometry
+        """
+        key = _exact_key(geometry, velocity.box, tuple(velocity.resolution), math.DYNAMIC_BACKEND.precision)
+        with self._lock:
+            if key in self._masks:
+                self._masks.move_to_end(key)
+                return self._masks[key]
+        mask_tensor = mask(geometry, antialias=False).at(velocity.center_points).data
+        if key is not None and isinstance(mask_tensor, np.ndarray):
+            with self._lock:
+                _store(self._masks, key, mask_tensor, self.max_masks)
+        return mask_tensor
+
+    def clear(self):
+        with self._lock:
+            self._domains.clear()
+            self._masks.clear()
+
+
+def _exact_key(*values):
+    try:
+        return struct.exact_key(values)
+    except TypeError:  # values holding unhashable tensors are not cached
+        return None
+
+
+def _store(cache, key, value, max_size):
+    cache[key] = value
+    while len(cache) > max_size:
+        cache.popitem(last=False)
+
+
+_FLUID_DOMAIN_CACHE = FluidDomainCache()
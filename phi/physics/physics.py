@@ -17,6 +17,8 @@ class State(struct.Struct):
     States are identified by their unique name.
     """
 
+    __slots__ = ('_batch_size',)
+
     def __init__(self, batch_size=None, **kwargs):
         self._batch_size = batch_size
         struct.Struct.__init__(self, **kwargs)
@@ -2,8 +2,7 @@ from numbers import Number
 
 from phi import math
 from phi.math.blas import conjugate_gradient
-from phi.math.helper import _dim_shifted
-from phi.physics.field import CenteredGrid
+from phi.physics.field.grid import _pad_mode
 from .solver_api import PoissonDomain, PoissonSolver
 from phi.physics.material import Material
 
@@ -31,22 +30,9 @@ Obstacles are allowed to vary between examples but the same number of iterations
         fluid_mask = domain.accessible_tensor(extend=1)
         extrapolation = Material.extrapolation_mode(domain.domain.boundaries)
 
+        padding = _pad_mode(extrapolation)
+
         def apply_A(pressure):
-            pressure = CenteredGrid(pressure, extrapolation=extrapolation)
-            pressure_padded = pressure.padded([[1, 1]] * pressure.rank)
-            return _weighted_sliced_laplace_nd(pressure_padded.data, weights=fluid_mask)
+            return math.stencil.weighted_laplace(pressure, fluid_mask, padding=padding)
 
         return conjugate_gradient(divergence, apply_A, guess, self.accuracy, self.max_iterations, back_prop=enable_backprop)
-
-
-def _weighted_sliced_laplace_nd(tensor, weights):
-    if tensor.shape[-1] != 1:
-        raise ValueError('Laplace operator requires a scalar channel as input')
-    dims = range(math.spatial_rank(tensor))
-    components = []
-    for dimension in dims:
-        lower_weights, center_weights, upper_weights = _dim_shifted(weights, dimension, (-1, 0, 1), diminish_others=(1, 1))
-        lower_values, center_values, upper_values = _dim_shifted(tensor, dimension, (-1, 0, 1), diminish_others=(1, 1))
-        diff = math.mul(upper_values, upper_weights * center_weights) + math.mul(lower_values, lower_weights * center_weights) + math.mul(center_values, - lower_weights - upper_weights)
-        components.append(diff)
-    return math.sum(components, 0)
@@ -52,6 +52,8 @@ PressureSolver = PoissonSolver
 @struct.definition()
 class PoissonDomain(struct.Struct):
 
+    __slots__ = ('_valid_state',)
+
     def __init__(self, domain, valid_state=(), active=None, accessible=None, **kwargs):
         struct.Struct.__init__(self, **struct.kwargs(locals(), ignore='valid_state'))
         self._valid_state = valid_state
@@ -95,7 +97,10 @@ class PoissonDomain(struct.Struct):
 
         :param extend: Extend the grid in all directions beyond the grid size specified by the domain
         """
-        return self.active.padded([[extend, extend]] * self.rank).data
+        key = ('active', extend)
+        if key not in self._tensor_cache:
+            self._tensor_cache[key] = self.active.padded([[extend, extend]] * self.rank).data
+        return self._tensor_cache[key]
 
     def accessible_tensor(self, extend=0):
         """
@@ -103,10 +108,13 @@ class PoissonDomain(struct.Struct):
 
         :param extend: Extend the grid in all directions beyond the grid size specified by the domain
         """
+        key = ('accessible', extend)
+        if key in self._tensor_cache:
+            return self._tensor_cache[key]
         pad_values = struct.map(lambda solid: int(not solid), Material.solid(self.domain.boundaries))
         if isinstance(pad_values, (list, tuple)):
             pad_values = [0] + list(pad_values) + [0]
-        result = math.pad(self.accessible.data, [[0,0]] + [[extend, extend]] * self.rank + [[0,0]], constant_values=pad_values)
+        result = self._tensor_cache[key] = math.pad(self.accessible.data, [[0,0]] + [[extend, extend]] * self.rank + [[0,0]], constant_values=pad_values)
         return result
 
     def with_hard_boundary_conditions(self, velocity):
@@ -114,12 +122,21 @@ class PoissonDomain(struct.Struct):
         return masked  # TODO add surface velocity
 
     def _frictionless_velocity_mask(self, velocity):
+        if 'frictionless' in self._tensor_cache:
+            return velocity.with_data(self._tensor_cache['frictionless'])
+        padded = self.accessible.padded([[1, 1]] * self.rank).data
+        upper = padded[tuple([slice(None)] + [slice(1, None)] * self.rank + [slice(None)])]
         tensors = []
         for axis in range(velocity.rank):
-            upper = self.accessible.padded([[0, 1] if ax == axis else [0, 0] for ax in range(self.rank)])
-            lower = self.accessible.padded([[1, 0] if ax == axis else [0, 0] for ax in range(self.rank)])
-            tensors.append(math.minimum(upper.data, lower.data))
-        return velocity.with_data(tensors)
+            lower = padded[tuple([slice(None)] + [slice(None, -1) if ax == axis else slice(1, None) for ax in range(self.rank)] + [slice(None)])]
+            tensors.append(math.minimum(upper, lower))
+        tensor = self._tensor_cache['frictionless'] = math.concat(tensors, -1)
+        return velocity.with_data(tensor)
+
+    @struct.derived(cached=True)
+    def _tensor_cache(self):
+        """ Padded masks computed by `active_tensor()`, `accessible_tensor()` and `with_hard_boundary_conditions()`. Only kept for valid domains. """
+        return {}
 
 
 FluidDomain = PoissonDomain
@@ -1,3 +1,6 @@
+import threading
+from collections import OrderedDict
+
 import numpy as np
 from phi import math, struct
 
@@ -36,48 +39,129 @@ psquare = math.abs_square
 
 class Schroedinger(Physics):
 
-    def __init__(self, margin=1):
+    def __init__(self, margin=1, substeps=1, strang=False, cache_size=8):
+        """
+        Split-step Fourier method for the Schroedinger equation.
+
+        The kinetic propagator, the potential phase rotation and the absorbing obstacle/boundary mask are cached.
+        They are only recomputed when resolution, dt, mass, potentials or obstacles change.
+        All examples of a batch share the same kernels.
+
+        :param margin: number of cells at the domain boundary that absorb the wave
+        :param substeps: number of split steps per call to step()
+        :param strang: If True, uses second-order Strang splitting. The potential half-steps of consecutive substeps are fused so that each substep needs one FFT and one inverse FFT, like first-order splitting.
+        :param cache_size: maximum number of cached tensors per kind
+        """
         Physics.__init__(self, [StateDependency('obstacles', 'obstacle'),
                                 StateDependency('potentials', 'potential_effect', blocking=True)])
         self.margin = margin
+        self.substeps = substeps
+        self.strang = strang
+        self.cache_size = cache_size
+        self._kinetic = OrderedDict()
+        self._potentials = OrderedDict()
+        self._masks = OrderedDict()
+        self._lock = threading.Lock()
 
     def step(self, state, dt=1.0, potentials=(), obstacles=()):
-        if len(potentials) == 0:
-            potential = 0
+        h = dt / self.substeps
+        kinetic = self.kinetic_propagator(state.resolution, h, state.mass)
+        if self.strang:
+            rotations = [self.potential_rotation(state, potentials, h, fraction) for fraction in (0.5, 1)]
         else:
-            potential = math.zeros_like(math.real(state.amplitude))  # for the moment, allow only real potentials
-            for pot in potentials:
-                potential = effect_applied(pot, potential, dt)
-            potential = potential.data
+            rotations = [self.potential_rotation(state, potentials, h)] * 2
+        mask = self.absorbing_mask(state, obstacles)
 
         amplitude = state.amplitude.data
-
-        # Rotate by potential
-        rotation = math.exp(1j * math.to_complex(potential * dt))
-        amplitude = amplitude * rotation
-
-        # Move by rotating in Fourier space
-        amplitude_fft = math.fft(amplitude)
-        laplace = math.fftfreq(state.resolution, mode='square')
-        amplitude_fft *= math.exp(-1j * (2 * np.pi)**2 * math.to_complex(dt) * laplace / (2 * state.mass))
-        amplitude = math.ifft(amplitude_fft)
-
-        obstacle_mask = union_mask([obstacle.geometry for obstacle in obstacles]).at(state.amplitude).data
-        amplitude *= 1 - obstacle_mask
-
-        normalized = False
-        symmetric = False
-        if not symmetric:
-            boundary_mask = math.zeros(state.domain.centered_shape(1, batch_size=1)).data
-            boundary_mask[[slice(None)] + [slice(self.margin,-self.margin) for i in math.spatial_dimensions(boundary_mask)] + [slice(None)]] = 1
-            amplitude *= boundary_mask
-
-        if len(obstacles) > 0 or not symmetric:
-            amplitude = normalize_probability(amplitude)
-            normalized = True
-
+        for i in range(self.substeps):
+            # Rotate by potential
+            if rotations[0 if i == 0 else 1] is not None:
+                amplitude = amplitude * rotations[0 if i == 0 else 1]
+            # Move by rotating in Fourier space
+            amplitude = math.ifft(math.fft(amplitude) * kinetic)
+        if self.strang and rotations[0] is not None:
+            amplitude *= rotations[0]
+        amplitude *= mask
+
+        amplitude = normalize_probability(amplitude)
         return state.copied_with(amplitude=amplitude)
 
+    def kinetic_propagator(self, resolution, dt, mass):
+        """
+        Returns the cached phase rotation exp(-i (2π)² dt k² / 2m) applied to the Fourier transformed amplitude.
+        :return: complex tensor of shape (1, resolution..., 1)
+        """
+        key = _exact_key(tuple(resolution), dt, mass, math.DYNAMIC_BACKEND.precision)
+        cached = self._lookup(self._kinetic, key)
+        if cached is not None:
+            return cached
+        laplace = math.fftfreq(resolution, mode='square')
+        propagator = math.exp(-1j * (2 * np.pi) ** 2 * math.to_complex(dt) * laplace / (2 * mass))
+        self._store(self._kinetic, key, propagator)
+        return propagator
+
+    def potential_rotation(self, state, potentials, dt, fraction=1):
+        """
+        Returns the phase rotation exp(i V dt · fraction) of the summed potentials.
+        V is accumulated over the full step `dt` so that the half-steps of Strang splitting rotate by half the angle of a full step for all effect modes.
+        The result is cached as long as the potential fields and the grid of `state` do not change.
+        :return: complex tensor or None if there are no potentials
+        """
+        if len(potentials) == 0:
+            return None
+        key = _exact_key(tuple((potential.field, potential.mode, potential.targets) for potential in potentials), state.domain, dt, fraction, math.DYNAMIC_BACKEND.precision)
+        cached = self._lookup(self._potentials, key)
+        if cached is not None:
+            return cached
+        potential = math.zeros_like(math.real(state.amplitude))  # for the moment, allow only real potentials
+        for pot in potentials:
+            potential = effect_applied(pot, potential, dt)
+        rotation = math.exp(1j * math.to_complex(potential.data * (dt * fraction)))
+        if isinstance(rotation, np.ndarray):
+            self._store(self._potentials, key, rotation)
+        return rotation
+
+    def absorbing_mask(self, state, obstacles):
+        """
+        Returns a mask that is zero inside obstacles and within `margin` cells of the domain boundary, one elsewhere.
+        The mask is cached per grid and obstacle geometries.
+        :return: tensor of shape (1, resolution..., 1)
+        """
+        geometries = [obstacle.geometry for obstacle in obstacles]
+        key = _exact_key(tuple(geometries), state.domain, self.margin, math.DYNAMIC_BACKEND.precision)
+        cached = self._lookup(self._masks, key)
+        if cached is not None:
+            return cached
+        boundary_mask = np.zeros((1,) + tuple(state.resolution) + (1,))
+        boundary_mask[tuple([slice(None)] + [slice(self.margin, -self.margin) for _ in range(state.rank)] + [slice(None)])] = 1
+        obstacle_mask = union_mask(geometries).at(state.amplitude).data
+        mask = math.to_float(boundary_mask) * (1 - obstacle_mask)
+        if isinstance(mask, np.ndarray):
+            self._store(self._masks, key, mask)
+        return mask
+
+    def _lookup(self, cache, key):
+        with self._lock:
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+            return None
+
+    def _store(self, cache, key, value):
+        if key is None:
+            return
+        with self._lock:
+            cache[key] = value
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+
+
+def _exact_key(*values):
+    try:
+        return struct.exact_key(values)
+    except TypeError:  # values holding unhashable tensors are not cached
+        return None
+
 
 SCHROEDINGER = Schroedinger()
 
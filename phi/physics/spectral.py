@@ -0,0 +1,104 @@
+"""
+Exponential time differencing for periodic PDEs of the form du/dt = L·u + N(u).
+
+The linear operator L must be diagonal in Fourier space (e.g. derivatives with constant coefficients).
+It is integrated exactly while the nonlinear part N is integrated explicitly with fourth-order accuracy (ETDRK4, Cox & Matthews 2002).
+This removes the stability limit of stiff linear terms such as high-order diffusion and allows much larger time steps than explicit schemes.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from phi import math
+
+
+def wave_vectors(resolution, dx):
+    """
+    Angular wave vectors 2πk of the modes computed by `math.fft` on a grid.
+
+    :param resolution: grid resolution
+    :param dx: cell size, scalar or one value per dimension
+    :return: NumPy array of shape (1, resolution..., rank)
+    """
+    dx = np.broadcast_to(np.array(dx, np.float64), [len(resolution)])
+    k = np.meshgrid(*[2 * np.pi * np.fft.fftfreq(int(n), d) for n, d in zip(resolution, dx)], indexing='ij')
+    return np.stack(k, -1)[np.newaxis, ...]
+
+
+def etdrk4_coefficients(linear, dt, contour_points=32):
+    """
+    Computes the ETDRK4 coefficients for a diagonal linear operator.
+    The phi-functions are evaluated by averaging over a complex contour around each eigenvalue which avoids cancellation errors for small L·dt (Kassam & Trefethen 2005).
+
+    :param linear: NumPy array holding the eigenvalues of L for each Fourier mode
+    :param dt: time increment
+    :param contour_points: number of points on the contour
+    :return: tuple (E, E2, Q, f1, f2, f3) of NumPy arrays with the shape of `linear`
+    """
+    linear = np.asarray(linear, np.float64)
+    roots = np.exp(1j * np.pi * (np.arange(1, contour_points + 1) - 0.5) / contour_points)
+    lr = dt * linear[..., np.newaxis] + roots
+    q = dt * np.real(np.mean((np.exp(lr / 2) - 1) / lr, axis=-1))
+    f1 = dt * np.real(np.mean((-4 - lr + np.exp(lr) * (4 - 3 * lr + lr ** 2)) / lr ** 3, axis=-1))
+    f2 = dt * np.real(np.mean((2 + lr + np.exp(lr) * (lr - 2)) / lr ** 3, axis=-1))
+    f3 = dt * np.real(np.mean((-4 - 3 * lr - lr ** 2 + np.exp(lr) * (4 - lr)) / lr ** 3, axis=-1))
+    return np.exp(dt * linear), np.exp(dt * linear / 2), q, f1, f2, f3
+
+
+class ETDRK4(object):
+
+    def __init__(self, contour_points=32, cache_size=8):
+        """
+        Fourth-order exponential time differencing Runge-Kutta integrator.
+        The coefficients only depend on the linear operator and dt, and are cached between steps.
+
+        :param contour_points: number of points used to evaluate the coefficients, see `etdrk4_coefficients()`
+        :param cache_size: maximum number of coefficient sets to keep
+        """
+        self.contour_points = contour_points
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def coefficients(self, key, linear, dt):
+        """
+        Returns the cached coefficients for `key` and `dt`, computing them if necessary.
+
+        :param key: hashable object identifying the linear operator, e.g. (resolution, dx, parameters)
+        :param linear: function without arguments returning the eigenvalues of L as NumPy array
+        :param dt: time increment
+        :return: tuple (E, E2, Q, f1, f2, f3) of complex tensors
+        """
+        key = (key, float(dt), math.DYNAMIC_BACKEND.precision)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        coefficients = tuple(math.to_complex(math.to_float(c)) for c in etdrk4_coefficients(linear(), dt, self.contour_points))
+        with self._lock:
+            self._cache[key] = coefficients
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return coefficients
+
+    def step(self, data, nonlinear, coefficients):
+        """
+        Advances `data` by one time step.
+
+        :param data: real tensor of shape (batch, spatial dimensions..., channels)
+        :param nonlinear: function mapping the Fourier transform of the state to the Fourier transform of N(u)
+        :param coefficients: coefficients for L and dt, see `coefficients()`
+        :return: real tensor like `data`
+        """
+        e, e2, q, f1, f2, f3 = coefficients
+        v = math.fft(math.to_complex(data))
+        nv = nonlinear(v)
+        a = e2 * v + q * nv
+        na = nonlinear(a)
+        b = e2 * v + q * na
+        nb = nonlinear(b)
+        c = e2 * a + q * (2 * nb - nv)
+        nc = nonlinear(c)
+        v = e * v + f1 * nv + 2 * f2 * (na + nb) + f3 * nc
+        return math.cast(math.real(math.ifft(v)), math.dtype(data))
@@ -110,9 +110,15 @@ class World(object):
     The method world.step() evolves the whole state or optionally a specific state in time.
     """
 
-    def __init__(self, batch_size=None, add_default_objects=True):
+    def __init__(self, batch_size=None, add_default_objects=True, threads=None):
+        """
+        :param batch_size: int or None
+        :param add_default_objects: if True, adds defaults like Gravity
+        :param threads: (optional) number of threads used to step independent states concurrently, see CollectivePhysics
+        """
         # --- Insert object / create proxy shortcuts ---
         self._state = self.physics = self.observers = self.batch_size = None
+        self.threads = threads
         self.reset(batch_size, add_default_objects)
 
     def reset(self, batch_size=None, add_default_objects=True):
@@ -124,6 +130,7 @@ This removes all States and observers.
         """
         self._state = StateCollection()
         self.physics = self._state.default_physics()
+        self.physics.threads = self.threads
         self.observers = set()
         self.batch_size = batch_size
         if add_default_objects:
@@ -1,17 +1,28 @@
+import threading
 import warnings
 from contextlib import contextmanager
 
 
-_STRUCT_CONTEXT_STACK = []
+_STRUCT_CONTEXT = threading.local()
+
+
+def _struct_context_stack():
+    """ Returns the context stack of the current thread. Contexts entered in one thread do not affect other threads. """
+    try:
+        return _STRUCT_CONTEXT.stack
+    except AttributeError:
+        stack = _STRUCT_CONTEXT.stack = []
+        return stack
 
 
 @contextmanager
 def _struct_context(object):
-    _STRUCT_CONTEXT_STACK.append(object)
+    stack = _struct_context_stack()
+    stack.append(object)
     try:
         yield None
     finally:
-        _STRUCT_CONTEXT_STACK.pop(-1)
+        stack.pop(-1)
 
 
 def unsafe():
@@ -24,4 +35,4 @@ def _unsafe():
 
 
 def skip_validate():
-    return 'unsafe' in _STRUCT_CONTEXT_STACK
+    return 'unsafe' in _struct_context_stack()
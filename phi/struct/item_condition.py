@@ -1,6 +1,6 @@
 import six
 
-from .context import _struct_context, _STRUCT_CONTEXT_STACK
+from .context import _struct_context_stack
 from .structdef import Item
 
 
@@ -29,13 +29,10 @@ This module provides some standard conditions like ALL_ITEMS, DATA, VARIABLES, C
     __call__ = condition_check
 
     def __enter__(self):
-        self.context = _struct_context(self)
-        return self.context.__enter__()
+        _struct_context_stack().append(self)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        result = self.context.__exit__(exc_type, exc_val, exc_tb)
-        self.context = None
-        return result
+        _struct_context_stack().pop(-1)
 
     def __repr__(self):
         return self.name
@@ -57,14 +54,14 @@ ALL_ITEMS = ItemCondition(None)
 
 def context_item_condition(item):
     """
-Checks all thread-global item conditions.
+Checks all item conditions of the current thread.
 Conditions can be specified using 'with ItemCondition:' blocks.
 If no condition was specified, this function defaults to testing whether the item holds data.
     :param item: item to be checked
     :return: True if the item passes all conditions, False otherwise
     """
     user_specified = False
-    for context in _STRUCT_CONTEXT_STACK:
+    for context in _struct_context_stack():
         if isinstance(context, ItemCondition):
             user_specified = True
             if not context.condition_check(item):
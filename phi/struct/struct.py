@@ -48,6 +48,8 @@ To implement a custom struct, extend this class and add the decorator @struct.de
 See the struct documentation at documentation/Structs.ipynb
     """
 
+    __slots__ = ('__content_type__', '__derived__', '__dict__', '__weakref__')
+    __struct_slots__ = ('__content_type__',)
     __items__ = None
     __traits__ = None
     __initialized_class__ = None
@@ -136,11 +138,24 @@ The returned struct will be validated unless this struct is not valid or the con
             duplicate.__content_type__ = target_type
         return duplicate
 
+    def __copy__(self):
+        cls = self.__class__
+        duplicate = cls.__new__(cls)
+        for slot in cls.__struct_slots__:
+            try:
+                setattr(duplicate, slot, getattr(self, slot))
+            except AttributeError:  # slot not assigned
+                pass
+        if self.__dict__:
+            duplicate.__dict__.update(self.__dict__)
+        return duplicate
+
     def _set_items(self, **kwargs):
         if len(kwargs) == 0:
             return
         if self.is_valid:
             self.__content_type__ = INVALID
+        self.__derived__ = None
         for name, value in kwargs.items():
             try:
                 item = getattr(self.__class__, name)
@@ -327,3 +342,25 @@ def equal(obj1, obj2):
             if obj1 is not obj2:
                 return False
     return True
+
+
+def exact_key(obj):
+    """
+    Returns a hashable key that identifies `obj` by its exact values.
+    Unlike `equal()`, which compares arrays within a tolerance, the keys of two objects are only equal if all arrays have the same dtype, shape and contents.
+
+    :param obj: struct or value
+    :return: hashable object, raises TypeError if `obj` contains unhashable values
+    """
+    if isinstance(obj, np.ndarray) and obj.dtype != np.object:
+        return 'ndarray', obj.dtype.str, obj.shape, obj.tobytes()
+    if isinstance(obj, Struct):
+        return (type(obj),) + tuple((item.name, exact_key(item.get(obj))) for item in obj.__items__)
+    if isinstance(obj, np.ndarray):  # object array
+        return (np.ndarray, obj.shape) + tuple(exact_key(element) for element in obj.flat)
+    if isinstance(obj, (list, tuple)):
+        return (type(obj),) + tuple(exact_key(element) for element in obj)
+    if isinstance(obj, dict):
+        return (dict,) + tuple((key, exact_key(obj[key])) for key in sorted(obj, key=str))
+    hash(obj)
+    return obj
@@ -9,6 +9,9 @@ from .trait import Trait
 def definition(traits=()):
     """
 Required decorator for custom struct classes.
+
+The decorated class is rebuilt with `__slots__` holding the item values.
+Additional attributes can be declared via `__slots__` in the class body. Undeclared attributes are stored in the instance `__dict__` which is only allocated when needed.
     """
     if isinstance(traits, Trait):
         traits = (traits,)
@@ -38,6 +41,7 @@ Required decorator for custom struct classes.
                         inherited_traits += (trait,)
         traits = inherited_traits + tuple([t for t in traits if t not in inherited_traits])
         assert len(set(traits)) == len(traits), "Duplicate traits on struct class '%s'" % struct_class
+        struct_class = _slotted(struct_class, items.values())
         # --- Initialize & Decorate ---
         struct_class.__traits__ = traits
         for item in items.values():
@@ -85,13 +89,14 @@ The enclosing class must be decorated with struct.definition().
     return decorator
 
 
-def derived():
+def derived(cached=False):
     """
 Derived properties work similar to @property but can be easily broadcast across many instances.
+    :param cached: If True, the value is computed only once per valid struct instance. Only use this for properties that depend exclusively on item values.
     :return: read-only property
     """
     def decorator(getter):
-        return DerivedProperty(getter.__name__, getter)
+        return DerivedProperty(getter.__name__, getter, cached)
     return decorator
 
 
@@ -104,6 +109,7 @@ Represents an item type of a struct, a variable or a constant.
         assert callable(validation_function) or validation_function is None
         assert isinstance(is_variable, bool)
         self.name = name
+        self.slot_name = '_%s' % (name,)
         self.validation_function = validation_function
         self.is_variable = is_variable
         self.default_value = default_value
@@ -135,12 +141,12 @@ Represents an item type of a struct, a variable or a constant.
 
     def set(self, struct, value):
         try:
-            setattr(struct, '_' + self.name, value)
+            setattr(struct, self.slot_name, value)
         except AttributeError:
             raise AttributeError("can't modify struct %s because item %s cannot be set." % (struct, self))
 
     def get(self, struct):
-        return getattr(struct, '_' + self.name)
+        return getattr(struct, self.slot_name)
 
     def validate(self, struct):
         if self.validation_function is not None:
@@ -188,14 +194,14 @@ Example: to override the shape of an item, put the following just below its decl
 
     def __get__(self, instance, owner):
         if instance is not None:
-            return getattr(instance, '_' + self.name)
+            return getattr(instance, self.slot_name)
         else:
             return self
 
     def __call__(self, obj):
         assert self.struct_class is not None
         from .functions import map
-        return map(lambda x: getattr(x, '_' + self.name), obj, leaf_condition=lambda x: isinstance(x, self.struct_class))
+        return map(lambda x: getattr(x, self.slot_name), obj, leaf_condition=lambda x: isinstance(x, self.struct_class))
 
     def __set__(self, instance, value):
         raise AttributeError('Struct variables and constants are read-only.')
@@ -222,16 +228,24 @@ class _IndexItem(Item):
 
 class DerivedProperty(object):
 
-    def __init__(self, name, getter):
+    def __init__(self, name, getter, cached=False):
         self.name = name
         self.getter = getter
+        self.cached = cached
 
     def __get__(self, instance, owner):
-        if instance is not None:
-            return self.getter(instance)
-        else:
+        if instance is None:
             self.owner = owner
             return self
+        if not self.cached or not instance.is_valid:
+            return self.getter(instance)
+        cache = getattr(instance, '__derived__', None)
+        if cache is None:
+            cache = instance.__derived__ = {}
+        elif self.name in cache:
+            return cache[self.name]
+        value = cache[self.name] = self.getter(instance)
+        return value
 
     def __call__(self, obj):
         assert self.owner is not None
@@ -248,6 +262,58 @@ class DerivedProperty(object):
         return self.name
 
 
+def _slotted(struct_class, items):
+    """
+Rebuilds a struct class so that item values are stored in `__slots__` instead of the instance `__dict__`.
+Slots declared in the class body are kept, slots already provided by a base class are not repeated.
+    """
+    namespace = dict(struct_class.__dict__)
+    declared = namespace.pop('__slots__', ())
+    declared = (declared,) if isinstance(declared, six.string_types) else tuple(declared)
+    inherited = set()
+    for base in struct_class.__mro__[1:]:
+        base_slots = base.__dict__.get('__slots__', ())
+        inherited.update((base_slots,) if isinstance(base_slots, six.string_types) else base_slots)
+    slots = declared + tuple(sorted(set(item.slot_name for item in items) - inherited - set(declared)))
+    for name in declared + ('__dict__', '__weakref__'):
+        namespace.pop(name, None)
+    namespace['__slots__'] = slots
+    slotted_class = type(struct_class)(struct_class.__name__, struct_class.__bases__, namespace)
+    slotted_class.__struct_slots__ = _copyable_slots(slotted_class)
+    _replace_class_references(namespace.values(), struct_class, slotted_class)
+    return slotted_class
+
+
+def _copyable_slots(cls):
+    result = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get('__slots__', ())
+        for slot in (slots,) if isinstance(slots, six.string_types) else slots:
+            if slot not in result and slot not in ('__dict__', '__weakref__', '__derived__'):
+                result.append(slot)
+    return tuple(result)
+
+
+def _replace_class_references(values, old_class, new_class):
+    """ Updates `__class__` closure cells (used by zero-argument `super()`) of methods defined in the original class body. """
+    for value in values:
+        if isinstance(value, (staticmethod, classmethod)):
+            value = value.__func__
+        if isinstance(value, property):
+            _replace_class_references((value.fget, value.fset, value.fdel), old_class, new_class)
+            continue
+        if isinstance(value, Item):
+            value = value.validation_function
+        elif isinstance(value, DerivedProperty):
+            value = value.getter
+        for cell in getattr(value, '__closure__', None) or ():
+            try:
+                if cell.cell_contents is old_class:
+                    cell.cell_contents = new_class
+            except ValueError:  # empty cell
+                pass
+
+
 def _order_by_dependencies(item_dict, struct_cls):
     result = []
     for item in item_dict.values():
@@ -99,6 +99,7 @@ class LearningApp(App):
                  epoch_size=None,
                  force_custom_stride=False,
                  log_scalars=EVERY_EPOCH,
+                 prefetch=2,
                  **kwargs):
         App.__init__(self, name=name, subtitle=subtitle, base_dir=base_dir, **kwargs)
         self.add_trait('model')
@@ -118,6 +119,8 @@ class LearningApp(App):
         self._training_set = None
         self._validation_set = None
         self._pipeline = None
+        self.prefetch = prefetch  # number of training batches loaded in the background by the 'placeholder' pipeline
+        self._train_iterator = None
         self.set_data(None, None)
         assert stride is None or epoch_size is None
         self.epoch_size = epoch_size if epoch_size is not None else stride
@@ -200,9 +203,11 @@ Regardless of pipeline, the recommended way to obtain `dict` is through `build_g
         self._channel_struct = tuple(self._channel_struct)
         self._placeholder_struct = tuple(self._placeholder_struct)
         # Train
+        if hasattr(self._train_iterator, 'close'):
+            self._train_iterator.close()
         if self._training_set is not None:
             self._train_reader = BatchReader(self._training_set, self._channel_struct)
-            self._train_iterator = self._train_reader.all_batches(batch_size=self.world.batch_size or self.training_batch_size, loop=True)
+            self._train_iterator = self._train_reader.all_batches(batch_size=self.world.batch_size or self.training_batch_size, loop=True, prefetch=self.prefetch)
         else:
             self._train_reader = None
             self._train_iterator = None
@@ -1,12 +1,20 @@
+import json
+import os
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from os.path import join
+
+import numpy as np
 
 from . import tf
 from phi import struct, math
-from phi.data.fluidformat import _transform_for_writing, _writing_staticshape, read_zipped_array, _slugify_filename
+from phi.data.fluidformat import _transform_for_writing, _writing_staticshape, read_array_file, _slugify_filename, NPY
 from phi.math import is_static_shape
 from phi.physics.world import StateProxy
 from phi.struct.context import _unsafe
 from phi.data import SceneSource, Dataset as BaseDataset
+from phi.data.sampler import BlockShuffle
+from phi.geom import GLOBAL_AXIS_ORDER as physics_config
 
 from .util import placeholder, dataset_handle
 from ..data.stream import consecutive_frames, FrameSelect
@@ -63,31 +71,175 @@ def load_state(state):
 
 
 def create_dataset(scene_sources, names, shapes, dtypes, batch_size, frames=None, shuffle=False, inner_frame_stride=1, outer_frame_stride=1, prefetch=2):
-    count = 0
+    """
+Creates a TensorFlow Dataset that loads the given scenes.
+    :param shuffle: False, True to shuffle all examples or a BlockShuffle to shuffle the scene order and examples within a bounded buffer
+    :return: Dataset
+    """
+    counts = []
     datasets = []
     for source in scene_sources:
         scene = source.scene
         nested_file_list = list(scene.data_paths(source.frames(), field_names=names))
-        count += _example_count(len(nested_file_list), frames, inner_frame_stride, outer_frame_stride)
+        decode = None
+        if scene.format == NPY and len(nested_file_list) > 0:  # uncompressed files can be decoded natively
+            decode = _npy_decoder(nested_file_list[0], dtypes)
+        if decode is None:
+            decode = lambda paths: tuple(tf.py_func(_read_npy_files, [paths], dtypes))
+        counts.append(_example_count(len(nested_file_list), frames, inner_frame_stride, outer_frame_stride))
         dataset = tf.data.Dataset.from_tensor_slices(nested_file_list)
-        dataset = dataset.map(lambda *items: tuple(tf.py_func(_read_npy_files, items, dtypes)))
+        dataset = dataset.map(decode, num_parallel_calls=tf.data.experimental.AUTOTUNE)
         if frames is not None:
             dataset = stacked_window(dataset, frames, outer_stride=outer_frame_stride, inner_stride=inner_frame_stride)
         datasets.append(dataset)
-    dataset = concat_datasets(datasets)
-    if shuffle:
-        dataset = dataset.shuffle(count)
+    if isinstance(shuffle, BlockShuffle):
+        dataset = block_shuffle_datasets(datasets, counts, shuffle)
+    else:
+        dataset = concat_datasets(datasets)
+        if shuffle:
+            dataset = dataset.shuffle(sum(counts))
     dataset = dataset.batch(batch_size)
     dataset = dataset.prefetch(prefetch)
     return dataset
 
 
 def _read_npy_files(items):
-    data = [read_zipped_array(item.decode())[0,...] for item in items]
+    data = [read_array_file(item.decode())[0, ...] for item in items]
     data = [math.to_float(array) for array in data]
     return data
 
 
+def _npy_decoder(filenames, dtypes):
+    """
+Creates a function that reads uncompressed .npy files using native TensorFlow operations.
+The array headers of `filenames` are assumed to be valid for all frames of the same scene.
+    :param filenames: one .npy file per field
+    :param dtypes: TensorFlow data types to convert the fields to
+    :return: function(paths) -> tuple of tensors or None if the files cannot be decoded natively
+    """
+    headers = []
+    for filename in filenames:
+        with open(filename, 'rb') as file:
+            version = np.lib.format.read_magic(file)
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file) if version == (1, 0) else np.lib.format.read_array_header_2_0(file)
+            offset = file.tell()
+        little_endian = dtype.byteorder in ('<', '|') or (dtype.byteorder == '=' and np.little_endian)
+        if fortran_order or not little_endian or dtype.hasobject or offset % dtype.itemsize != 0:
+            return None
+        example_shape = shape[1:] if shape[0] == 1 and len(shape) > 1 else shape  # see read_npy_array()
+        flip = not physics_config.is_x_first and shape[-1] != 1
+        headers.append((example_shape, flip, tf.as_dtype(dtype.newbyteorder('<')), offset // dtype.itemsize))
+
+    def decode(paths):
+        tensors = []
+        for i, ((shape, flip, file_dtype, skip), dtype) in enumerate(zip(headers, dtypes)):
+            data = tf.reshape(tf.io.decode_raw(tf.io.read_file(paths[i]), file_dtype)[skip:], shape)
+            if flip:
+                data = data[..., ::-1]  # component order in stored files is always XYZ
+            tensors.append(tf.cast(data, dtype))
+        return tuple(tensors)
+    return decode
+
+
+def export_records(scene_sources, directory, names=None, scenes_per_shard=8, workers=4):
+    """
+Converts scenes into TFRecord shards that can be loaded with `create_record_dataset()` without Python code.
+Each record holds one frame of one scene with all fields stored as raw bytes.
+Scenes are never split across shards.
+A description of the shards is written to records.json.
+    :param scene_sources: SceneSources, e.g. Dataset.sources
+    :param directory: target directory
+    :param names: (optional) fields to export, defaults to all fields of the first scene
+    :param scenes_per_shard: number of scenes stored in each shard file
+    :param workers: number of shards written in parallel
+    :return: list of shard files
+    """
+    scene_sources = list(scene_sources)
+    assert len(scene_sources) > 0
+    names = list(scene_sources[0].scene.fieldnames) if names is None else list(names)
+    os.path.isdir(directory) or os.makedirs(directory)
+    chunks = [scene_sources[i:i + scenes_per_shard] for i in range(0, len(scene_sources), scenes_per_shard)]
+    filenames = [join(directory, 'shard_%05d.tfrecord' % i) for i in range(len(chunks))]
+    with ThreadPoolExecutor(workers) as executor:  # decompression and file I/O release the GIL
+        descriptions = list(executor.map(lambda args: _write_shard(names, *args), zip(filenames, chunks)))
+    fields = descriptions[0]['fields']
+    for description in descriptions:
+        assert description['fields'] == fields, 'All scenes must have the same field shapes and data types'
+    with open(join(directory, 'records.json'), 'w') as file:
+        json.dump({'names': names, 'fields': fields, 'shards': [os.path.basename(filename) for filename in filenames], 'frames': [description['frames'] for description in descriptions]}, file)
+    return filenames
+
+
+def _write_shard(names, filename, scene_sources):
+    fields = None
+    frame_count = 0
+    with tf.io.TFRecordWriter(filename) as writer:
+        for scene_index, source in enumerate(scene_sources):
+            for position, frame in enumerate(source.frames()):
+                arrays = [np.ascontiguousarray(source.scene.read_array(name, frame)[0, ...]) for name in names]
+                if fields is None:
+                    fields = {name: {'shape': list(array.shape), 'dtype': array.dtype.str} for name, array in zip(names, arrays)}
+                feature = {name: tf.train.Feature(bytes_list=tf.train.BytesList(value=[array.tobytes()])) for name, array in zip(names, arrays)}
+                feature['scene'] = tf.train.Feature(int64_list=tf.train.Int64List(value=[scene_index]))
+                feature['frame'] = tf.train.Feature(int64_list=tf.train.Int64List(value=[position]))
+                writer.write(tf.train.Example(features=tf.train.Features(feature=feature)).SerializeToString())
+                frame_count += 1
+    return {'fields': fields, 'frames': frame_count}
+
+
+def create_record_dataset(directory, names, dtypes, batch_size, frames=None, shuffle=False, inner_frame_stride=1, outer_frame_stride=1, prefetch=2, cycle_length=4):
+    """
+Creates a TensorFlow Dataset from TFRecord shards written by `export_records()`.
+Decoding and windowing use native TensorFlow operations and run in parallel.
+Shards are read interleaved, `cycle_length` at a time.
+    :param directory: directory containing records.json
+    :param names: fields to load
+    :param dtypes: TensorFlow data types of the fields
+    :param frames: (optional) number of consecutive frames in each example
+    :param shuffle: False, True or BlockShuffle. If not False, the shard order is shuffled as well.
+    :return: Dataset
+    """
+    with open(join(directory, 'records.json')) as file:
+        description = json.load(file)
+    fields = [description['fields'][name] for name in names]
+    features = {name: tf.io.FixedLenFeature([], tf.string) for name in names}
+    features['scene'] = tf.io.FixedLenFeature([], tf.int64)
+    features['frame'] = tf.io.FixedLenFeature([], tf.int64)
+    span = None if frames is None else (frames - 1) * inner_frame_stride + 1
+
+    def parse(serialized):
+        example = tf.io.parse_single_example(serialized, features)
+        tensors = [tf.cast(tf.reshape(tf.io.decode_raw(example[name], tf.as_dtype(np.dtype(field['dtype']).newbyteorder('<'))), field['shape']), dtype) for name, field, dtype in zip(names, fields, dtypes)]
+        return tuple(tensors) + (example['scene'], example['frame'])
+
+    def is_valid_window(*window):  # inside one scene and starting at a multiple of outer_frame_stride
+        scenes, positions = window[-2:]
+        return tf.logical_and(tf.equal(scenes[0], scenes[-1]), tf.equal(positions[0] % outer_frame_stride, 0))
+
+    def read_shard(filename):
+        dataset = tf.data.TFRecordDataset(filename).map(parse, num_parallel_calls=tf.data.experimental.AUTOTUNE)
+        if frames is None:
+            return dataset.map(lambda *example: example[0] if len(names) == 1 else example[:-2])
+        dataset = dataset.window(span, shift=1, drop_remainder=True)
+        dataset = dataset.flat_map(lambda *window: tf.data.Dataset.zip(tuple(component.batch(span) for component in window)))
+        dataset = dataset.filter(is_valid_window)
+        return dataset.map(lambda *window: window[0][::inner_frame_stride] if len(names) == 1 else tuple(tensor[::inner_frame_stride] for tensor in window[:-2]))
+
+    filenames = [join(directory, shard) for shard in description['shards']]
+    dataset = tf.data.Dataset.from_tensor_slices(filenames)
+    seed = shuffle.seed if isinstance(shuffle, BlockShuffle) else None
+    if shuffle:
+        dataset = dataset.shuffle(len(filenames), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.interleave(read_shard, cycle_length=cycle_length, num_parallel_calls=tf.data.experimental.AUTOTUNE)
+    if isinstance(shuffle, BlockShuffle):
+        dataset = dataset.batch(shuffle.block_size).shuffle(shuffle.buffer_blocks, seed=seed).apply(tf.data.experimental.unbatch())
+    elif shuffle:
+        dataset = dataset.shuffle(sum(description['frames']))
+    dataset = dataset.batch(batch_size)
+    dataset = dataset.prefetch(prefetch)
+    return dataset
+
+
 def stacked_window(dataset, size, outer_stride=1, inner_stride=1):
     """
 Combines lists of input elements into windows by adding a window dimension to the dataset.
@@ -99,8 +251,8 @@ All windows have the same number of elements.
     :return: Dataset
     """
     dataset = dataset.window(size, shift=outer_stride, stride=inner_stride, drop_remainder=True)
-    dataset = dataset.flat_map(lambda x: x)  # convert VariantDataset (window) to batch dimension
-    dataset = dataset.batch(size)
+    # convert VariantDataset (window) to batch dimension, one window per component
+    dataset = dataset.flat_map(lambda *windows: windows[0].batch(size) if len(windows) == 1 else tf.data.Dataset.zip(windows).batch(size))
     return dataset
 
 
@@ -118,10 +270,27 @@ def concat_datasets(datasets):
         return tf.data.Dataset.concatenate(dataset_1, dataset_2)
 
 
+def block_shuffle_datasets(datasets, counts, sampler):
+    """
+Combines the given Datasets, visiting them in random order, and shuffles blocks of consecutive elements within a bounded buffer, see BlockShuffle.
+The scene order is reshuffled every time the dataset is iterated.
+    :param datasets: ordered list of TensorFlow Datasets
+    :param counts: number of elements in each Dataset
+    :param sampler: BlockShuffle
+    :return: Dataset
+    """
+    counts = tf.constant(counts, tf.int64)
+    order = tf.data.Dataset.range(len(datasets)).shuffle(len(datasets), seed=sampler.seed, reshuffle_each_iteration=True)
+    choices = order.flat_map(lambda i: tf.data.Dataset.from_tensors(i).repeat(tf.gather(counts, i)))
+    dataset = tf.data.experimental.choose_from_datasets(datasets, choices)
+    dataset = dataset.batch(sampler.block_size).shuffle(sampler.buffer_blocks, seed=sampler.seed)
+    return dataset.apply(tf.data.experimental.unbatch())
+
+
 def _example_count(length, frames, inner_stride, outer_stride):
     if frames is None:
         return length
-    return (frames - (frames * inner_stride - 1)) // outer_stride
+    return max(0, (length - (frames - 1) * inner_stride - 1) // outer_stride + 1)
 
 
 class Dataset(BaseDataset):
@@ -139,15 +308,33 @@ Extends phi.data.Datset by TensorFlow data pipeline functions.
         self.tf_dataset = None
         self.iterator = None
         self.iterator_handle = None
+        self.records = None
 
     @staticmethod
     def load(directory, indices=None, name=None, max_scenes=None, assume_same_frames=True, assume_same_shapes=True, frames=None):
         base = BaseDataset.load(directory, indices=indices, name=name, max_scenes=max_scenes, assume_same_frames=assume_same_frames, assume_same_shapes=assume_same_shapes, frames=frames)
         return Dataset(base.name, base.sources)
 
-    def shuffle(self):
+    @staticmethod
+    def load_records(directory, name=None):
+        """
+        Creates a Dataset that loads TFRecord shards written by `export_records()` using a native TensorFlow pipeline.
+        :param directory: directory containing records.json
+        :param name: (optional) name of the dataset
+        :return: Dataset
+        """
+        dataset = Dataset(os.path.basename(directory) if name is None else name, ())
+        dataset.records = directory
+        return dataset
+
+    def shuffle(self, sampler=None):
+        """
+        Shuffles the examples when iterating.
+        :param sampler: (optional) BlockShuffle for locality-aware shuffling. If None, all examples are shuffled globally.
+        :return: self
+        """
         assert self.tf_dataset is None
-        self.shuffled = True
+        self.shuffled = sampler if sampler is not None else True
         return self
 
     def prefetch(self, prefetch):
@@ -165,7 +352,10 @@ Extends phi.data.Datset by TensorFlow data pipeline functions.
             assert isinstance(source, SceneSource)
         batch_size = batch_size if batch_size is not None else self.batch_size
         batch_size = 1 if batch_size is None else batch_size
-        self.tf_dataset = create_dataset(self.sources, names=names, shapes=shapes, dtypes=dtypes, batch_size=batch_size, frames=frames, shuffle=self.shuffled, inner_frame_stride=self.inner_frame_stride, outer_frame_stride=self.outer_frame_stride, prefetch=self.prefetch_value)
+        if self.records is not None:
+            self.tf_dataset = create_record_dataset(self.records, names=names, dtypes=dtypes, batch_size=batch_size, frames=frames, shuffle=self.shuffled, inner_frame_stride=self.inner_frame_stride, outer_frame_stride=self.outer_frame_stride, prefetch=self.prefetch_value)
+        else:
+            self.tf_dataset = create_dataset(self.sources, names=names, shapes=shapes, dtypes=dtypes, batch_size=batch_size, frames=frames, shuffle=self.shuffled, inner_frame_stride=self.inner_frame_stride, outer_frame_stride=self.outer_frame_stride, prefetch=self.prefetch_value)
         self.iterator = self.tf_dataset.make_initializable_iterator()
 
     def reset_iterator(self, session):
@@ -68,3 +68,32 @@ class TestStruct(TestCase):
         self.assertEqual(age, {'a': [26]})
         adult = MyStruct.is_adult(obj)
         self.assertEqual(adult, {'a': [True]})
+
+    def test_slots(self):
+        m = MyStruct()
+        self.assertIn('_age', MyStruct.__struct_slots__)
+        self.assertIn('_parent', Parent.__slots__)
+        self.assertNotIn('_parent', MyStruct.__slots__)
+        self.assertEqual(m._counter, 1)  # trait attributes are stored in __dict__
+        m2 = m.copied_with(age=10)
+        self.assertEqual(m2.age, 10)
+        self.assertEqual(m2.parent, 'parent')
+        self.assertEqual(m._counter + 1, m2._counter)
+
+    def test_cached_derived(self):
+        @struct.definition()
+        class Cached(struct.Struct):
+            def __init__(self, value, **kwargs):
+                struct.Struct.__init__(self, **struct.kwargs(locals()))
+
+            @struct.variable()
+            def value(self, value): return value
+
+            @struct.derived(cached=True)
+            def doubled(self):
+                return [2 * self.value]
+        c = Cached(1)
+        self.assertIs(c.doubled, c.doubled)
+        self.assertEqual(c.copied_with(value=2).doubled, [4])
+        self.assertEqual(c.doubled, [2])
+        self.assertEqual(Cached.doubled([c, Cached(3)]), [[2], [6]])
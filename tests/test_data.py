@@ -1,12 +1,25 @@
 from unittest import TestCase
 
 import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from unittest.mock import patch
 import numpy as np
 
+from phi.data.farm import generate_scenes, is_complete
 from phi.data.fluidformat import Scene
+from phi.data.frame_cache import SharedFrameCache
+from phi.data.sampler import BlockShuffle
 from phi.data.dataset import Dataset
-from phi.data.stream import SOURCE, FRAME, SCENE
-from phi.data.reader import BatchReader, SourceStream
+from phi.data.stream import SOURCE, FRAME, SCENE, consecutive_frames
+from phi.data.reader import BatchReader, SourceStream, CLIP, SKIP, WRAP
+from phi.physics.domain import Domain
+from phi.physics.field import CenteredGrid
+from phi.physics.heat import HeatDiffusion
+from phi.physics.world import World
 
 
 def build_test_database(path='data'):
@@ -91,3 +104,114 @@ class TestData(TestCase):
             d, d_1, d_2 = batch
             np.testing.assert_equal(d + 1, d_1)
             np.testing.assert_equal(d**2, d_2)
+
+    def test_grouped_load(self):
+        build_test_database()
+        streams = consecutive_frames('Density', 2)
+        reader = BatchReader(Dataset.load('data'), streams)
+        sequential = BatchReader(Dataset.load('data'), streams, threads=0)
+        with patch.object(Scene, 'read_array', autospec=True, side_effect=Scene.read_array) as read_array:
+            previous, following = reader[0:6]
+        self.assertEqual(read_array.call_count, 8)  # each of the 8 frames is read once
+        np.testing.assert_equal(following, previous + 1)
+        for index in range(6):
+            np.testing.assert_equal(sequential[index], [previous[index:index + 1], following[index:index + 1]])
+
+    def test_prefetch(self):
+        build_test_database()
+        reader = BatchReader(Dataset.load('data'), 'Density')
+        for last in (CLIP, SKIP, WRAP):
+            for loop in (False, True):
+                expected = list(islice(reader.all_batches(batch_size=3, last=last, loop=loop), 7))
+                with reader.all_batches(batch_size=3, last=last, loop=loop, prefetch=2) as iterator:
+                    batches = list(islice(iterator, 7))
+                self.assertEqual(len(expected), len(batches))
+                for expected_batch, batch in zip(expected, batches):
+                    np.testing.assert_equal(expected_batch, batch)
+        iterator = reader.all_batches(batch_size=2, prefetch=1)
+        self.assertEqual(4, len(list(iterator)))
+        iterator.close()
+        self.assertRaises(AssertionError, lambda: next(iterator))
+
+    def test_concurrent_access(self):
+        build_test_database()
+        reader = BatchReader(Dataset.load('data'), 'Density')
+        load = reader._load
+        reader._load = lambda indices: time.sleep(0.05) or load(indices)
+        iterator = reader.all_batches(batch_size=4, prefetch=1)
+        with ThreadPoolExecutor(2) as executor:
+            direct = [executor.submit(reader.__getitem__, slice(0, 4)) for _ in range(2)]
+            prefetched = next(iterator)
+            for future in direct:
+                np.testing.assert_equal(prefetched, future.result())
+        iterator.close()
+        self.assertEqual(8, reader.cache_info()['examples'])  # the prefetcher also loaded the second batch
+
+    def test_block_shuffle(self):
+        sampler = BlockShuffle(block_size=4, buffer_size=16, seed=0)
+        sizes = [40] * 25
+        order = sampler.order(sizes, epoch=0)
+        np.testing.assert_equal(np.arange(1000), np.sort(order))
+        np.testing.assert_equal(order, BlockShuffle(block_size=4, buffer_size=16, seed=0).order(sizes, epoch=0))
+        self.assertFalse(np.array_equal(order, sampler.order(sizes, epoch=1)))
+        scenes = order // 40
+        for start in range(0, 1000, 16):
+            self.assertLessEqual(len(set(scenes[start:start + 16])), 4)  # only scenes near the current one are accessed
+        build_test_database()
+        reader = BatchReader(Dataset.load('data'), 'Density')
+        sampler = BlockShuffle(block_size=2, buffer_size=4, seed=1)
+        iterator = reader.all_batches(batch_size=3, last=WRAP, loop=True, sampler=sampler, prefetch=1)
+        batches = [next(iterator) for _ in range(3)]
+        resumed = reader.all_batches(batch_size=3, last=WRAP, loop=True, sampler=sampler, state=iterator.state)
+        iterator.close()
+        values = np.concatenate(batches)[:, 0, 0, 0]
+        np.testing.assert_equal(values[:8], 1 + sampler.order(reader.source_sizes, epoch=0))
+        np.testing.assert_equal(values[8], 1 + sampler.order(reader.source_sizes, epoch=1)[0])
+        np.testing.assert_equal(next(resumed)[:, 0, 0, 0], 1 + sampler.order(reader.source_sizes, epoch=1)[1:4])
+
+    def test_batch_cache(self):
+        build_test_database()
+        example_size = 4 * 4 * 8  # 4x4 float64
+        reader = BatchReader(Dataset.load('data'), 'Density', cache_size=3 * example_size)
+        reader[0:2]
+        reader[[1, 2, 2]]  # the second 2 is loaded only once
+        self.assertEqual(dict(hits=2, misses=3, size=3 * example_size, capacity=3 * example_size, examples=3), reader.cache_info())
+        reader[3]  # evicts example 0, the least recently used
+        np.testing.assert_equal(reader[[0, 3]][:, 0, 0, 0], [1, 4])
+        self.assertEqual(dict(hits=3, misses=5, examples=3), {key: reader.cache_info()[key] for key in ('hits', 'misses', 'examples')})
+
+    def test_shared_frame_cache(self):
+        build_test_database()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        first = BatchReader(Dataset.load('data'), 'Density', shared_cache=SharedFrameCache(directory))
+        second = BatchReader(Dataset.load('data'), 'Density', shared_cache=SharedFrameCache(directory))
+        np.testing.assert_equal(first[0:8], second[0:8])
+        self.assertEqual((0, 8), (first.shared_cache.hits, first.shared_cache.misses))
+        self.assertEqual((8, 0), (second.shared_cache.hits, second.shared_cache.misses))
+        first.shared_cache.clear()
+        self.assertEqual([], os.listdir(directory))
+
+    def test_generate_scenes(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        report = generate_scenes(_heat_scene, 3, directory, 'heat', processes=2)
+        self.assertEqual(3, report['generated'])
+        scenes = Scene.list(directory, 'heat')
+        self.assertEqual([0, 1, 2], [scene.index for scene in scenes])
+        for scene in scenes:
+            self.assertEqual([0, 1, 2], scene.frames)
+            self.assertTrue(is_complete(scene))
+        np.testing.assert_allclose(scenes[2].read_array('temperature', 0), 2)
+        # Resume: only the incomplete scene is generated again
+        scenes[1].put_property('complete', False)
+        report = generate_scenes(_heat_scene, 3, directory, 'heat', processes=0)
+        self.assertEqual((1, 2), (report['generated'], report['skipped']))
+        self.assertTrue(is_complete(Scene(directory, 'heat', 1)))
+        self.assertEqual([0, 1, 2], [scene.index for scene in Scene.list(directory, 'heat')])
+
+
+def _heat_scene(index):
+    world = World(add_default_objects=False)
+    world.add(CenteredGrid.sample(float(index), Domain([4, 4])).copied_with(name='temperature'), physics=HeatDiffusion())
+    return world, 3
@@ -0,0 +1,56 @@
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from phi.physics.burgers import Burgers, BurgersVelocity
+from phi.physics.domain import Domain
+from phi.physics.ensemble import Ensemble
+from phi.physics.field import CenteredGrid, Noise
+from phi.physics.field.effect import Gravity
+from phi.physics.fluid import Fluid, IncompressibleFlow
+from phi.physics.heat import HeatDiffusion
+from phi.physics.material import CLOSED, PERIODIC
+
+
+class TestEnsemble(TestCase):
+
+    def test_burgers_viscosity_sweep(self):
+        ensemble = Ensemble.sweep(viscosity=[0.01, 0.05, 0.2])
+        velocity = BurgersVelocity(Domain([16, 16], boundaries=PERIODIC), velocity=Noise(channels=2))
+        batched = ensemble.batch(velocity)
+        self.assertEqual((3, 16, 16, 2), batched.velocity.data.shape)
+        for _ in range(3):
+            batched = Burgers().step(batched, dt=0.5)
+        for member_state, member in zip(ensemble.split(batched), ensemble.members):
+            self.assertEqual(member['viscosity'], member_state.viscosity)
+            single = velocity.copied_with(viscosity=member['viscosity'])
+            for _ in range(3):
+                single = Burgers().step(single, dt=0.5)
+            np.testing.assert_allclose(single.velocity.data, member_state.velocity.data, atol=1e-5)
+
+    def test_heat_diffusivity_sweep(self):
+        ensemble = Ensemble.sweep(diffusivity=[0.1, 0.5, 2.0])
+        temperature = CenteredGrid.sample(Noise(), Domain([16, 16]))
+        physics = ensemble.batch(HeatDiffusion(implicit=True))
+        batched = physics.step(ensemble.batch(temperature), dt=1.0)
+        for i, member in enumerate(ensemble.members):
+            single = HeatDiffusion(member['diffusivity'], implicit=True).step(temperature, dt=1.0)
+            np.testing.assert_allclose(single.data, batched.data[i:i + 1], atol=1e-4)
+
+    def test_buoyancy_sweep_scenes(self):
+        ensemble = Ensemble([{'buoyancy_factor': 0.1}, {'buoyancy_factor': 0.3}])
+        fluid = Fluid(Domain([16, 16], boundaries=CLOSED), density=Noise())
+        fluid = fluid.copied_with(density=fluid.density.with_data(np.abs(fluid.density.data)))
+        batched = IncompressibleFlow().step(ensemble.batch(fluid), dt=1.0, gravity=Gravity())
+        members = ensemble.split(batched)
+        single = IncompressibleFlow().step(fluid.copied_with(buoyancy_factor=0.3), dt=1.0, gravity=Gravity())
+        np.testing.assert_allclose(single.velocity.staggered_tensor(), members[1].velocity.staggered_tensor(), atol=1e-4)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        scenes = ensemble.scenes(directory, 'ensemble', copy_calling_script=False)
+        scenes.write(batched, frame=0)
+        for scene, member_state in zip(scenes.scenes, members):
+            self.assertEqual(member_state.buoyancy_factor, scene.properties['ensemble_member']['buoyancy_factor'])
+            np.testing.assert_equal(member_state.density.data, scene.read_array('density', 0))
@@ -4,11 +4,15 @@ import numpy as np
 
 from phi import struct, math
 from phi.physics.domain import Domain
-from phi.geom import box, AABox
-from phi.physics.field import CenteredGrid, Field, unstack_staggered_tensor, StaggeredGrid, data_bounds, ConstantField, Noise, staggered_curl_2d
+from phi.geom import box, AABox, Sphere, union
+from phi.physics.field import CenteredGrid, Field, unstack_staggered_tensor, StaggeredGrid, data_bounds, ConstantField, Noise, staggered_curl_2d, mask
+from phi.physics.field.angular_velocity import AngularVelocity
 from phi.physics.field.flag import SAMPLE_POINTS
 from phi.physics.field.staggered_grid import stack_staggered_components
+from phi.physics.field.util import extrapolate, diffuse
 from phi.physics.fluid import Fluid
+from phi.physics.material import CLOSED
+from phi.physics.pressuresolver.solver_api import FluidDomain
 
 
 class TestFields(TestCase):
@@ -89,6 +93,29 @@ class TestFields(TestCase):
         staggered3 = StaggeredGrid([staggered.data[0], staggered2.data[1]], name='')
         self.assertEqual(staggered3, staggered)
 
+    def test_staggered_buffer(self):
+        tensor = np.random.rand(1, 5, 4, 2)
+        staggered = StaggeredGrid(tensor)
+        self.assertIs(staggered.staggered_tensor(), tensor)
+        self.assertIs(staggered.copied_with(name='v').staggered_tensor(), tensor)
+        self.assertTrue(np.may_share_memory(staggered.data[0].data, tensor))
+        components = StaggeredGrid([staggered.data[0].data, staggered.data[1].data])
+        self.assertIs(components.staggered_tensor(), components.staggered_tensor())
+        buffered = components.buffered()
+        np.testing.assert_equal(buffered.data[1].data, staggered.data[1].data)
+        self.assertTrue(np.may_share_memory(buffered.data[1].data, buffered.staggered_tensor()))
+        # --- Operations on buffered grids ---
+        result = staggered * 2 - buffered
+        self.assertIsNotNone(result._buffered_tensor())
+        for component, expected in zip(result.data, staggered.data):
+            np.testing.assert_allclose(component.data, expected.data)
+        self.assertIsNone(staggered.with_data([c.data for c in staggered.data])._buffered_tensor())
+        # --- Invalid upper rows stay zero ---
+        for grid in (Domain([4, 3]).staggered_grid(1), result + 1, 2 - result, StaggeredGrid.gradient(CenteredGrid(np.random.rand(1, 4, 3, 1)))):
+            tensor = grid.staggered_tensor()
+            np.testing.assert_equal(tensor[:, -1, :, 1], 0)
+            np.testing.assert_equal(tensor[:, :, -1, 0], 0)
+
     def test_mixed_boundaries_resample(self):
         data = np.reshape([[1,2], [3,4]], (1,2,2,1))
         field = CenteredGrid(data, extrapolation=[('boundary', 'constant'), 'periodic'])
@@ -117,3 +144,66 @@ class TestFields(TestCase):
         vel = staggered_curl_2d(pot)
         div = vel.divergence()
         np.testing.assert_almost_equal(div.data, 0, decimal=3)
+
+    def test_lazy_grid(self):
+        u = CenteredGrid(np.random.rand(1, 8, 8, 1).astype(np.float32))
+        v = CenteredGrid(np.random.rand(1, 8, 8, 1).astype(np.float32))
+        eager = 0.5 * u.laplace() - u * v ** 2 + 0.04 * (1 - u)
+        lazy = 0.5 * u.laplace().lazy() - u.lazy() * v ** 2 + 0.04 * (1 - u.lazy())
+        result = lazy.evaluate()
+        self.assertIsInstance(result, CenteredGrid)
+        self.assertEqual(result.data.dtype, np.float32)
+        np.testing.assert_allclose(result.data, eager.data, rtol=1e-5)
+        np.testing.assert_allclose((v + lazy).data, (v + eager).data, rtol=1e-5)
+
+    def test_mask_rasterization(self):
+        grid = CenteredGrid(np.zeros([1, 40, 30, 1]), box=AABox(0, [20, 15]))
+        for geometry in [Sphere((5.3, 7), radius=2.2), box[3:9.5, 2:4].rotated(0.5), union([Sphere((1, 1), 3), box[10:30, 12:20]]), Sphere((100, 100), 1)]:
+            for antialias in (False, True):
+                geometry_mask = mask(geometry, antialias=antialias)
+                np.testing.assert_allclose(geometry_mask.at(grid).data, Field.at(geometry_mask, grid).data, atol=1e-6)
+
+    def test_angular_velocity_chunks(self):
+        grid = CenteredGrid(np.zeros([1, 32, 32, 1]), box=AABox(0, [32, 32]))
+        location = np.floor(np.random.uniform(8, 24, [2, 10, 2])) + 0.5
+        falloff = lambda distance: math.exp(-math.sum(distance ** 2, axis=-1, keepdims=True) / 4)
+        velocity = AngularVelocity(location, np.random.randn(10), falloff=falloff)
+        reference = velocity.at(grid).data
+        np.testing.assert_allclose(velocity.copied_with(memory_budget=500).at(grid).data, reference, atol=1e-6)
+        np.testing.assert_allclose(velocity.periodic_at(grid).data, reference, atol=1e-4)
+
+    def test_extrapolate_distance_transform(self):
+        valid_mask = np.zeros([1, 12, 12, 1], np.float32)
+        valid_mask[:, 3:8, 4:9, :] = 1
+        for field in [CenteredGrid(valid_mask * [2, 3] + (1 - valid_mask) * np.random.rand(1, 12, 12, 2)), StaggeredGrid(np.ones([1, 13, 13, 2]) * [2, 3])]:
+            iterative_field, iterative_distance = extrapolate(field, valid_mask, voxel_distance=2, use_distance_transform=False)
+            fast_field, fast_distance = extrapolate(field, valid_mask, voxel_distance=2)
+            np.testing.assert_allclose(fast_distance, iterative_distance, atol=1e-5)
+            for fast, iterative in zip(fast_field.unstack(), iterative_field.unstack()):
+                np.testing.assert_allclose(fast.data, iterative.data, atol=1e-5)
+
+    def test_implicit_diffusion(self):
+        grid = CenteredGrid(np.random.rand(2, 16, 16, 1), extrapolation='boundary')
+        for amount in (0.1, 100):
+            diffused = diffuse(grid, amount, implicit=True, accuracy=1e-6)
+            residual = diffused.data - amount * math.stencil.laplace(diffused.data, padding='replicate') - grid.data
+            self.assertLess(np.max(np.abs(residual)), 1e-5 * (1 + amount))  # float32 round-off is amplified by the Laplace operator
+            np.testing.assert_allclose(np.mean(diffused.data), np.mean(grid.data), rtol=1e-5)
+        staggered = StaggeredGrid(np.random.rand(1, 9, 9, 2))
+        diffused = diffuse(staggered, 10, implicit=True)
+        self.assertIsInstance(diffused, StaggeredGrid)
+        self.assertLess(np.std(diffused.staggered_tensor()[:, :-1, :-1]), np.std(staggered.staggered_tensor()[:, :-1, :-1]))
+
+    def test_masked_diffusion(self):
+        domain = Domain([16, 16], boundaries=CLOSED)
+        accessible = np.ones([1, 16, 16, 1], np.float32)
+        accessible[:, :, 8, :] = 0
+        fluiddomain = FluidDomain(domain, accessible=domain.centered_grid(accessible))
+        grid = domain.centered_grid(np.random.rand(1, 16, 16, 1))
+        for implicit in (False, True):
+            diffused = diffuse(grid, 100 if implicit else 0.2, implicit=implicit, fluiddomain=fluiddomain, enable_backprop=False)
+            np.testing.assert_allclose(diffused.data[:, :, 8], grid.data[:, :, 8])  # obstacle keeps its values
+            for side in (slice(0, 8), slice(9, 16)):  # no flux through the obstacle or the closed boundaries
+                np.testing.assert_allclose(np.mean(diffused.data[:, :, side]), np.mean(grid.data[:, :, side]), rtol=1e-5)
+        diffused = diffuse(domain.staggered_grid(np.random.rand(1, 17, 17, 2)), 100, implicit=True, fluiddomain=fluiddomain)
+        self.assertIsInstance(diffused, StaggeredGrid)
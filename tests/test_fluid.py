@@ -8,7 +8,7 @@ from phi.physics.domain import Domain
 from phi.physics.field import StaggeredGrid, Noise
 from phi.physics.field.effect import Fan, Inflow
 from phi.physics.material import CLOSED, OPEN
-from phi.physics.fluid import Fluid, INCOMPRESSIBLE_FLOW, IncompressibleFlow
+from phi.physics.fluid import Fluid, INCOMPRESSIBLE_FLOW, IncompressibleFlow, FluidDomainCache
 from phi.physics.obstacle import Obstacle
 from phi.physics.pressuresolver.sparse import SparseCG
 from phi.physics.world import World
@@ -122,3 +122,22 @@ class TestFluid(TestCase):
             self.assertEqual(fluid.velocity.unstack()[0].data.dtype, numpy.float16)
         finally:
             math.set_precision(32)  # Reset environment
+
+    def test_fluid_domain_cache(self):
+        cache = FluidDomainCache()
+        fluid = Fluid(Domain([16, 16]))
+        obstacles = [Sphere((4, 4), radius=2), box[8:12, 2:6]]
+        fluiddomain = cache.fluid_domain(fluid.domain, obstacles, fluid.velocity)
+        self.assertIs(fluiddomain, cache.fluid_domain(fluid.domain, [Sphere((4, 4), radius=2), box[8:12, 2:6]], fluid.velocity))
+        self.assertIs(fluiddomain.active_tensor(extend=1), fluiddomain.active_tensor(extend=1))
+        self.assertEqual(0, fluiddomain.active.data[0, 4, 4, 0])
+        # --- Moving one obstacle only rasterizes the moved geometry ---
+        moved = cache.fluid_domain(fluid.domain, [obstacles[0], box[8:12, 10:14]], fluid.velocity)
+        self.assertIsNot(moved, fluiddomain)
+        self.assertEqual(3, len(cache._masks))
+        numpy.testing.assert_equal(moved.active.data[0, 8:12, 2:6], 1)
+        numpy.testing.assert_equal(moved.active.data[0, 8:12, 10:14], 0)
+        # --- Slowly moving obstacles are rasterized again even if struct equality does not distinguish them ---
+        for step in range(3):
+            geometry = AABox([8, 2.5 + 1e-7 * (2 * step - 1)], [12, 6])  # lower edge crosses the cell centers at y=2.5
+            numpy.testing.assert_equal(cache.fluid_domain(fluid.domain, [geometry], fluid.velocity).active.data, FluidDomainCache().fluid_domain(fluid.domain, [geometry], fluid.velocity).active.data)
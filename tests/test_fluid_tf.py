@@ -2,7 +2,7 @@ from unittest import TestCase
 
 import numpy
 
-from phi.tf.flow import tf, Session, placeholder, variable, tf_bake_subgraph, tf_bake_graph, Noise, constant, struct, OPEN, PERIODIC, STICKY, SLIPPERY, World, Fluid, IncompressibleFlow, Obstacle, CLOSED, Inflow, Domain, Sphere, box, Scene, math
+from phi.tf.flow import tf, Session, placeholder, variable, tf_bake_subgraph, tf_bake_graph, Noise, constant, struct, OPEN, PERIODIC, STICKY, SLIPPERY, World, Fluid, IncompressibleFlow, Obstacle, CLOSED, Inflow, Domain, Sphere, box, Scene, math, mask, CenteredGrid, grid_union, AngularVelocity, StaggeredGrid
 
 
 class TestFluidTF(TestCase):
@@ -115,3 +115,29 @@ class TestFluidTF(TestCase):
             self.assertEqual(fluid.velocity.unstack()[0].data.dtype.as_numpy_dtype, numpy.float16)
         finally:
             math.set_precision(32)  # Reset environment
+
+    def test_mask_gradient(self):
+        center = tf.Variable([5.3, 7.0])
+        grid = CenteredGrid(numpy.zeros([1, 16, 16, 1]))
+        sphere_mask = mask(Sphere(center, radius=2.2), antialias=True).at(grid)
+        self.assertIsNotNone(tf.gradients(math.sum(sphere_mask.data), center)[0])
+
+    def test_grid_union_gradient(self):
+        center = tf.Variable([5.3, 7.0])
+        geometry = grid_union([Sphere(center, radius=2.2), Sphere((1., 1.), 1.), box[10:12, 3:5]])
+        distance = geometry.approximate_signed_distance(tf.constant(numpy.random.rand(1, 20, 2) * 16, tf.float32))
+        self.assertIsNotNone(tf.gradients(math.sum(distance), center)[0])
+
+    def test_angular_velocity_unknown_shape(self):
+        points = tf.placeholder(tf.float32, [1, None, None, 2])
+        velocity = AngularVelocity(location=numpy.array([[[4.0, 4.0]]]), strength=1.0).sample_at(points)
+        self.assertEqual([1, None, None, 2], velocity.shape.as_list())
+
+    def test_staggered_buffer_tf(self):
+        staggered = StaggeredGrid(tf.constant(numpy.random.rand(1, 5, 4, 2)))
+        grids = [staggered * 2 + 1, StaggeredGrid.gradient(CenteredGrid(tf.constant(numpy.random.rand(1, 4, 3, 1), tf.float32))), Domain([4, 3]).staggered_grid(1)]
+        with tf.Session() as session:
+            tensors = session.run([grid.staggered_tensor() for grid in grids[:2]]) + [grids[2].staggered_tensor()]
+        for tensor in tensors:
+            numpy.testing.assert_equal(tensor[:, -1, :, 1], 0)
+            numpy.testing.assert_equal(tensor[:, :, -1, 0], 0)
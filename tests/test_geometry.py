@@ -2,7 +2,7 @@ from unittest import TestCase
 
 import numpy as np
 
-from phi.geom import AABox, Sphere, box
+from phi.geom import AABox, Sphere, box, union, grid_union
 from phi.physics.field import CenteredGrid
 
 
@@ -38,3 +38,18 @@ class TestGeometry(TestCase):
         values = growing_sphere.value_at(np.zeros([10, 3, 2]) + [0, 4])
         np.testing.assert_equal(values.shape, [10, 3, 1])
         np.testing.assert_equal(values[:, 0, 0], [0, 0, 0, 0, 1, 1, 1, 1, 1, 1])
+
+    def test_grid_union(self):
+        np.random.seed(0)
+        centers, radii = np.random.rand(50, 2) * 10, np.random.rand(50) * 0.5 + 0.1
+        lowers = np.random.rand(20, 2) * 10
+        geometries = [Sphere(c, r) for c, r in zip(centers, radii)] + [AABox(l, l + 0.5) for l in lowers] + [box[:, 9:10]]
+        location = points().data
+        accelerated = grid_union(geometries)
+        np.testing.assert_equal(accelerated.lies_inside(location), union(geometries).lies_inside(location))
+        finite = geometries[:-1]
+        distance = grid_union(finite, cell_size=2.).approximate_signed_distance(location)
+        np.testing.assert_allclose(distance, np.minimum(union(finite).approximate_signed_distance(location), 2.), rtol=1e-5)
+        # --- Array-valued children ---
+        array_union = grid_union(Sphere(centers, radii), AABox(lowers, lowers + 0.5))
+        np.testing.assert_equal(array_union.lies_inside(location), union(finite).lies_inside(location))
@@ -3,6 +3,7 @@ from unittest import TestCase
 import numpy as np
 
 from phi.math.nd import _dim_shifted
+from phi.math import stencil
 from phi.tf import tf
 
 # pylint: disable-msg = redefined-builtin, redefined-outer-name, unused-wildcard-import, wildcard-import
@@ -156,6 +157,37 @@ class TestMath(TestCase):
         _resample_test('constant', [0, -1, 0, 0], (0.5, 1, 1.5, 2, 1, 0, -1))
         _resample_test(['constant', 'circular', ['symmetric', 'reflect'], 'constant'], None, (1, 1, 1.5, 2, 1.5, 2.5, 1.5))
 
+    def test_fused_evaluate(self):
+        a, b = np.random.rand(2, 9, 5, 1), np.random.rand(1, 5, 1)
+        expression = 2 * fused.lazy(a) ** 2 - fused.lazy(b) / (1 + fused.lazy(a))
+        expected = 2 * a ** 2 - b / (1 + a)
+        np.testing.assert_allclose(fused.evaluate(expression), expected)
+        np.testing.assert_allclose(fused._evaluate_blocked(expression, chunk_size=7), expected)
+        np.testing.assert_allclose(fused._evaluate_eager(expression), expected)
+
+    def test_stencil_laplace(self):
+        tensor = np.random.rand(2, 6, 7, 3)
+        padded = np.pad(tensor, [[0, 0], [1, 1], [1, 1], [0, 0]], 'edge')
+        expected = padded[:, :-2, 1:-1] + padded[:, 2:, 1:-1] + padded[:, 1:-1, :-2] + padded[:, 1:-1, 2:] - 4 * tensor
+        np.testing.assert_allclose(stencil.laplace(tensor, padding='replicate'), expected)
+        np.testing.assert_allclose(stencil.laplace(tensor, padding='replicate', dx=(1, 2)), expected - 0.75 * (padded[:, 1:-1, :-2] + padded[:, 1:-1, 2:] - 2 * tensor))
+        # --- Higher order ---
+        x = np.linspace(0, 2 * np.pi, 32, endpoint=False)
+        sine = np.sin(x).reshape(1, 32, 1)
+        errors = [np.max(np.abs(stencil.laplace(sine, padding='circular', dx=x[1], order=order) + sine)) for order in (2, 4, 6)]
+        self.assertLess(errors[1], errors[0] / 100)
+        self.assertLess(errors[2], errors[1] / 10)
+
+    def test_stencil_vector_calculus(self):
+        potential = np.random.rand(1, 8, 9, 10, 1)
+        grad = stencil.gradient(potential, padding='circular')
+        np.testing.assert_allclose(stencil.curl(grad, padding='circular'), 0, atol=1e-12)
+        staggered = np.random.rand(1, 5, 6, 2)
+        components = [staggered[:, :, :-1, 0:1], staggered[:, :-1, :, 1:2]]
+        expected = np.diff(components[0], axis=1) + np.diff(components[1], axis=2) / 2
+        np.testing.assert_allclose(stencil.staggered_divergence(staggered, dx=(1, 2)), expected)
+        np.testing.assert_allclose(stencil.staggered_divergence(components, dx=(1, 2)), expected)
+
 
 def _resample_test(mode, constant_values, expected):
     grid = np.tile(np.reshape(np.array([[1,2], [4,5]]), [1,2,2,1]), [1, 1, 1, 2])
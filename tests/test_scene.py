@@ -1,9 +1,16 @@
+import os
+import shutil
+import tempfile
+import time
 from unittest import TestCase
+from concurrent.futures import ThreadPoolExecutor
 from os.path import isfile  # needs to be after
 
 import numpy as np
 
+from phi.data.async_writer import AsyncWriter
 from phi.data.fluidformat import Scene
+from phi.data.source import SceneSource
 from phi import struct
 from phi.physics.domain import Domain
 from phi.physics.field import StaggeredGrid, CenteredGrid
@@ -48,3 +55,74 @@ class TestScene(TestCase):
         np.testing.assert_equal(mystruct[0]['Two'][0, 0, 0, 0], loaded_struct[0]['Two'][0, 0, 0, 0])
 
         scene.remove()
+
+    def test_npy_format(self):
+        scene = Scene.create('data', 'npy_format', format='npy', copy_calling_script=False)
+        self.assertEqual('npy', Scene.at(scene.path).format)
+        state = Fluid(Domain([4, 4]), density=1.5)
+        scene.write(state, frame=0)
+        self.assertTrue(isfile(scene.subpath('density_000000.npy')))
+        self.assertEqual(['density', 'velocity'], scene.fieldnames)
+        self.assertEqual([0], scene.frames)
+        density = Scene.at(scene.path).read_array('density', 0)
+        self.assertIsInstance(density.base, np.memmap)
+        np.testing.assert_equal(state.density.data, density)
+        loaded_state = scene.read(state, frame=0)
+        np.testing.assert_equal(loaded_state.velocity.data[0].data, state.velocity.data[0].data)
+        scene.remove()
+
+    def test_async_writer(self):
+        scene = Scene.create('data', 'async_writer', count=2, copy_calling_script=False)
+        with AsyncWriter(workers=2, max_pending=2) as writer:
+            scene.writer = writer
+            array = np.zeros([2, 4, 4, 1])
+            for frame in range(5):
+                array[...] = frame
+                scene.write(array, 'frame', frame)  # array is modified after enqueueing
+            writer.flush()
+            self.assertEqual(0, writer.pending)
+        for sub_scene in scene.scenes:
+            self.assertEqual(list(range(5)), sub_scene.frames)
+            np.testing.assert_equal(sub_scene.read_array('frame', 3), 3)
+            sub_scene.remove()
+        writer = AsyncWriter()
+        writer.write('data/missing_directory/file.npz', np.zeros([1, 4, 4, 1]))
+        self.assertRaises(IOError, writer.close)
+
+    def test_manifest(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        scene = Scene.create(directory, 'manifest', copy_calling_script=False)
+        self.assertEqual({}, scene.manifest)
+        scene.write(Fluid(Domain([4, 4])), frame=0)
+        scene.write(Fluid(Domain([4, 4])), frame=1)
+        manifest = scene.manifest
+        self.assertEqual(['density', 'velocity'], sorted(manifest))
+        self.assertEqual([1, 5, 5, 2], manifest['velocity'][1]['shape'])
+        self.assertEqual([0, 1], scene.frames)
+        self.assertIn(scene.index, [s.index for s in Scene.list(directory, 'manifest')])
+        self.assertEqual((1, 4, 4, 1), SceneSource(scene).shape('density'))
+        # Files written without the manifest make it stale
+        np.savez_compressed(scene.subpath('density_000002.npz'), np.zeros([4, 4, 1]))
+        os.utime(scene.path, (time.time() + 10, time.time() + 10))  # time stamps can be too coarse to order both writes
+        self.assertIsNone(scene.manifest)
+        self.assertEqual([0, 1, 2], scene.get_frames(mode='union'))
+        scene.remove()
+        self.assertNotIn(scene.index, [s.index for s in Scene.list(directory, 'manifest')])
+
+    def test_concurrent_create(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        Scene.create(directory, 'concurrent', copy_calling_script=False)
+
+        def create(_):
+            batch = Scene.create(directory, 'concurrent', count=3, copy_calling_script=False)
+            return [scene.index for scene in batch.scenes]
+
+        with ThreadPoolExecutor(4) as executor:
+            reserved = list(executor.map(create, range(8)))
+        for indices in reserved:
+            self.assertEqual(list(range(indices[0], indices[0] + 3)), indices)
+        all_indices = sorted(sum(reserved, [0]))
+        self.assertEqual(len(set(all_indices)), len(all_indices))
+        self.assertEqual(all_indices, [scene.index for scene in Scene.list(directory, 'concurrent')])
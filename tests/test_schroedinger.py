@@ -5,7 +5,9 @@ import numpy
 from phi.geom import box
 from phi.physics.domain import Domain
 from phi.physics.obstacle import Obstacle
-from phi.physics.schroedinger import QuantumWave, SCHROEDINGER, WavePacket, StepPotential
+from phi.physics.field import CenteredGrid
+from phi.physics.field.effect import FieldEffect, ADD, GROW
+from phi.physics.schroedinger import QuantumWave, SCHROEDINGER, WavePacket, StepPotential, Schroedinger, HarmonicPotential
 
 
 class TestSchroedinger(TestCase):
@@ -22,3 +24,40 @@ class TestSchroedinger(TestCase):
         pot = StepPotential(box[0:1, 0:1], 1.0)
         SCHROEDINGER.step(q, 1.0, potentials=[pot], obstacles=[Obstacle(box[3:4, 0:1])])
         numpy.testing.assert_equal(q.amplitude.data.shape, [1, 4, 4, 1])
+
+    def test_cached_kernels(self):
+        q = QuantumWave(Domain([16, 16]), amplitude=WavePacket([8, 5], 2.0, [0, 1]))
+        potential, obstacles = StepPotential(box[7:9, 7:9], 0.2), [Obstacle(box[12:14, 0:3])]
+        physics = Schroedinger()
+        q1 = physics.step(q, 0.5, potentials=[potential], obstacles=obstacles)
+        q2 = physics.step(q1, 0.5, potentials=[potential.copied_with(age=1)], obstacles=obstacles)
+        self.assertEqual(len(physics._kinetic), 1)
+        self.assertEqual(len(physics._potentials), 1)
+        self.assertEqual(len(physics._masks), 1)
+        numpy.testing.assert_allclose(q2.amplitude.data, Schroedinger().step(q1, 0.5, potentials=[potential], obstacles=obstacles).amplitude.data)
+
+    def test_strang_splitting(self):
+        q = QuantumWave(Domain([32, 32]), amplitude=WavePacket([16, 10], 3.0, [0, 1]))
+        potential = FieldEffect(HarmonicPotential([16, 16], 10.0, maximum_value=None), ['potential'], mode=ADD)
+        reference = Schroedinger(substeps=200, strang=True).step(q, 5.0, potentials=[potential]).amplitude.data
+        lie = Schroedinger(substeps=10).step(q, 5.0, potentials=[potential]).amplitude.data
+        strang = Schroedinger(substeps=10, strang=True).step(q, 5.0, potentials=[potential]).amplitude.data
+        self.assertLess(numpy.max(numpy.abs(strang - reference)), 0.5 * numpy.max(numpy.abs(lie - reference)))
+
+    def test_potential_modes(self):
+        q = QuantumWave(Domain([16, 16]), amplitude=WavePacket([8, 5], 2.0, [0, 1]))
+        field = HarmonicPotential([8, 8], 5.0, maximum_value=None)
+        potential = FieldEffect(field, ['potential'], mode=GROW)
+        physics = Schroedinger()
+        # GROW potentials keep their original scaling, V = field · dt
+        expected = numpy.exp(1j * field.at(q.amplitude).data * 0.5 ** 2)
+        numpy.testing.assert_allclose(physics.potential_rotation(q, [potential], 0.5), expected, rtol=1e-5)
+        # Strang half-steps rotate by half the angle of a full step
+        numpy.testing.assert_allclose(physics.potential_rotation(q, [potential], 0.5, 0.5) ** 2, expected, rtol=1e-5)
+
+    def test_cache_exact_values(self):
+        q = QuantumWave(Domain([16, 16]), amplitude=WavePacket([8, 5], 2.0, [0, 1]))
+        physics = Schroedinger()
+        for step in range(3):
+            potential = FieldEffect(CenteredGrid(numpy.full([1, 16, 16, 1], 0.2 + 1e-6 * step, numpy.float32), name='potential'), ['potential'], mode=ADD)  # equal within the tolerance of struct equality
+            numpy.testing.assert_equal(physics.potential_rotation(q, [potential], 1.0), Schroedinger().potential_rotation(q, [potential], 1.0))
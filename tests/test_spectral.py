@@ -0,0 +1,38 @@
+from unittest import TestCase
+
+import numpy as np
+
+from phi.geom import AABox
+from phi.physics.domain import Domain
+from phi.physics.field import CenteredGrid
+from phi.physics.flame import KuramotoSivashinsky, SpectralKuramotoSivashinsky
+from phi.physics.material import PERIODIC
+from phi.physics.reaction_diffusion import Pattern, ReactionDiffusion, SpectralReactionDiffusion
+
+
+class TestSpectral(TestCase):
+
+    def test_kuramoto_sivashinsky(self):
+        x = (np.arange(64) + 0.5) * 32 * np.pi / 64
+        u0 = CenteredGrid((np.cos(x / 16) * (1 + np.sin(x / 16))).reshape(1, 64, 1), box=AABox(0, 32 * np.pi), extrapolation='periodic')
+        explicit, spectral = u0, u0
+        for _ in range(200):
+            explicit = KuramotoSivashinsky().step(explicit, dt=0.01)
+        physics = SpectralKuramotoSivashinsky()
+        for _ in range(4):
+            spectral = physics.step(spectral, dt=0.5)
+        self.assertEqual(spectral.age, 2)
+        np.testing.assert_allclose(spectral.data, explicit.data, atol=2e-3)
+
+    def test_reaction_diffusion(self):
+        x = (np.arange(32) + 0.5) - 16
+        seed = np.exp(-(x[:, None] ** 2 + x[None, :] ** 2) / 20.)[None, ..., None]
+        pattern = Pattern(Domain([32, 32], PERIODIC, box=AABox(0, [16, 16])), u=1 - 0.5 * seed, v=0.5 * seed)
+        explicit, spectral = pattern, pattern
+        for _ in range(100):
+            explicit = ReactionDiffusion().step(explicit, dt=0.02)
+        physics = SpectralReactionDiffusion()
+        for _ in range(2):
+            spectral = physics.step(spectral, dt=1.0)
+        np.testing.assert_allclose(spectral.v.data, explicit.v.data, atol=5e-3)
+        np.testing.assert_allclose(spectral.u.data, explicit.u.data, atol=5e-3)
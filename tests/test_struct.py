@@ -108,3 +108,11 @@ class TestStruct(TestCase):
         assert dom.staggered_shape().x.content_type is struct.Struct.shape
         assert dom.staggered_grid(math.zeros).content_type is struct.VALID
         assert dom.staggered_grid(math.zeros).x.content_type is struct.VALID
+
+    def test_exact_key(self):
+        domain = Domain([4, 4], box=box[0:1, 0:1])
+        self.assertEqual(struct.exact_key(domain), struct.exact_key(Domain([4, 4], box=box[0:1, 0:1])))
+        moved = Domain([4, 4], box=box[0:1, 0:1 + 1e-6])
+        self.assertEqual(domain, moved)  # struct equality compares arrays within a tolerance
+        self.assertNotEqual(struct.exact_key(domain), struct.exact_key(moved))
+        self.assertNotEqual(struct.exact_key(numpy.zeros(2, numpy.float32)), struct.exact_key(numpy.zeros(2, numpy.float64)))
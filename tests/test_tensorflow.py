@@ -1,3 +1,5 @@
+import shutil
+import tempfile
 from unittest import TestCase
 
 import numpy
@@ -9,6 +11,9 @@ from phi import math, struct
 from phi.geom import box
 from phi.physics.field import CenteredGrid
 from phi.tf.util import variable
+from phi.data.fluidformat import Scene, NPY
+from phi.data.sampler import BlockShuffle
+from phi.tf.data import Dataset, export_records
 
 
 class TestPlaceholder(TestCase):
@@ -31,3 +36,91 @@ class TestPlaceholder(TestCase):
         self.assertEqual('Placeholder/0:0', p[0].name)
         self.assertEqual('Placeholder/1/data:0', p[1].data.name)
         self.assertIsInstance(p, tuple)
+
+
+def _write_scenes(directory, format='npz'):
+    for scene_index in range(4):
+        scene = Scene.create(directory, copy_calling_script=False, format=format)
+        for frame in range(5):
+            scene.write_sim_frame([numpy.zeros([1, 2, 1]) + 10 * scene_index + frame, numpy.zeros([1, 3, 2], numpy.float32) + [frame, -frame]], ['density', 'velocity'], frame)
+    return directory
+
+
+def _load_all(dataset, frames=2, names=('density',)):
+    tf.reset_default_graph()
+    dataset.setup(list(names), None, [tf.float32] * len(names), batch_size=1, frames=frames)
+    element = dataset.iterator.get_next()
+    values = []
+    with tf.Session() as session:
+        session.run(dataset.iterator.initializer)
+        try:
+            while True:
+                value = session.run(element)
+                values.append(value if isinstance(value, tuple) else (value,))
+        except tf.errors.OutOfRangeError:
+            pass
+    return values
+
+
+class TestDataset(TestCase):
+
+    def test_block_shuffle(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        for scene_index in range(4):
+            scene = Scene.create(directory, copy_calling_script=False)
+            for frame in range(5):
+                scene.write_sim_frame([numpy.zeros([1, 2, 1]) + 10 * scene_index + frame], ['density'], frame)
+        tf.reset_default_graph()
+        dataset = Dataset.load(directory).shuffle(BlockShuffle(block_size=2, buffer_size=4, seed=0))
+        dataset.setup(['density'], [(2, 1)], [numpy.float32], batch_size=1, frames=2)
+        element = dataset.iterator.get_next()
+        values = []
+        with tf.Session() as session:
+            session.run(dataset.iterator.initializer)
+            try:
+                while True:
+                    values.append(session.run(element)[0, :, 0, 0])
+            except tf.errors.OutOfRangeError:
+                pass
+        expected = [[10 * scene_index + frame, 10 * scene_index + frame + 1] for scene_index in range(4) for frame in range(4)]
+        self.assertEqual(sorted(expected), sorted(value.tolist() for value in values))
+        self.assertNotEqual(expected, [value.tolist() for value in values])
+
+    def test_native_npy(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        _write_scenes(directory, NPY)
+        values = _load_all(Dataset.load(directory), frames=3, names=('density', 'velocity'))
+        self.assertNotIn('PyFunc', [op.type for op in tf.get_default_graph().get_operations()])
+        self.assertEqual(12, len(values))
+        numpy.testing.assert_equal(values[3][0][0, :, 0, 0], [10, 11, 12])
+        scene = Scene.list(directory)[1]
+        numpy.testing.assert_equal(values[3][1][0], numpy.concatenate([scene.read_array('velocity', frame) for frame in range(3)]))
+
+    def test_native_npy_shapes(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        for size in (2, 3):
+            Scene.create(directory, copy_calling_script=False, format=NPY).write_sim_frame([numpy.zeros([1, size, 1]) + size], ['density'], 0)
+        values = _load_all(Dataset.load(directory, assume_same_shapes=False), frames=None)
+        self.assertNotIn('PyFunc', [op.type for op in tf.get_default_graph().get_operations()])
+        self.assertEqual([[2, 2], [3, 3, 3]], [value[0][0, :, 0].tolist() for value in values])
+
+    def test_records(self):
+        source_directory, record_directory = tempfile.mkdtemp(), tempfile.mkdtemp()
+        for directory in (source_directory, record_directory):
+            self.addCleanup(shutil.rmtree, directory)
+        _write_scenes(source_directory)
+        shards = export_records(Dataset.load(source_directory).sources, record_directory, scenes_per_shard=3)
+        self.assertEqual(2, len(shards))
+        expected = _load_all(Dataset.load(source_directory), names=('density', 'velocity'))
+        values = _load_all(Dataset.load_records(record_directory), names=('density', 'velocity'))
+        self.assertNotIn('PyFunc', [op.type for op in tf.get_default_graph().get_operations()])
+        self.assertEqual(sorted(e[0][0, :, 0, 0].tolist() for e in expected), sorted(v[0][0, :, 0, 0].tolist() for v in values))
+        dataset = Dataset.load_records(record_directory)
+        dataset.outer_frame_stride = 2
+        strided = sorted(v[0][0, :, 0, 0].tolist() for v in _load_all(dataset))
+        self.assertEqual([[10 * scene_index + frame, 10 * scene_index + frame + 1] for scene_index in range(4) for frame in (0, 2)], strided)
+        shuffled = _load_all(Dataset.load_records(record_directory).shuffle(BlockShuffle(block_size=1, buffer_size=4, seed=0)), frames=None)
+        self.assertEqual(20, len(shuffled))
@@ -1,15 +1,32 @@
+import sys
 from unittest import TestCase
 
 import numpy
 import six
 
 from phi import struct
-from phi.physics.collective import StateCollection
+from phi.physics.collective import StateCollection, CollectivePhysics
+from phi.geom import Sphere
 from phi.physics.domain import Domain
-from phi.physics.fluid import Fluid
+from phi.physics.field import CenteredGrid
+from phi.physics.field.effect import Inflow
+from phi.physics.fluid import Fluid, IncompressibleFlow
+from phi.physics.obstacle import GeometryMovement, Obstacle
+from phi.physics.physics import Physics, State, StateDependency, STATIC
 from phi.physics.world import World
 
 
+class _RecordingPhysics(Physics):
+
+    def __init__(self, log, blocking=True):
+        Physics.__init__(self, [StateDependency('markers', 'marker', blocking=blocking)])
+        self.log = log
+
+    def step(self, state, dt=1.0, markers=()):
+        self.log.append((state.name, tuple(marker.age for marker in markers)))
+        return state.copied_with(age=state.age + dt)
+
+
 class TestWorld(TestCase):
 
     def test_names(self):
@@ -56,3 +73,51 @@ class TestWorld(TestCase):
         c5 = struct.map(lambda x: x, c1)
         assert isinstance(c5, StateCollection)
         assert c5 == c1
+
+    def test_step_plan(self):
+        log = []
+        physics = CollectivePhysics()
+        physics.add('sim', _RecordingPhysics(log))
+        states = StateCollection([State(name='sim'), State(name='m1', tags=('marker',)), State(name='m2', tags=('marker',))])
+        states = physics.step(states, dt=1.0)
+        plan = physics._plan
+        self.assertEqual(list(states.keys()), ['sim', 'm1', 'm2'])
+        self.assertEqual(log, [('sim', (1.0, 1.0))])  # blocking dependencies are stepped first
+        physics.step(states, dt=1.0)
+        self.assertIs(physics._plan, plan)
+        # --- changing the physics or the states invalidates the plan ---
+        physics.add('sim', _RecordingPhysics(log, blocking=False))
+        states = physics.step(states.state_added(State(name='m3', tags=('marker',))), dt=1.0)
+        self.assertIsNot(physics._plan, plan)
+        self.assertEqual(log[-1], ('sim', (1.0, 1.0, 0.0)))  # non-blocking dependencies see the previous states
+        self.assertEqual(states.m3.age, 1.0)
+
+    def test_parallel_step(self):
+        results = []
+        for threads in (None, 3):
+            world = World(threads=threads)
+            for i in range(3):
+                world.add(Fluid(Domain([16, 16]), name='fluid%d' % i, density=numpy.random.RandomState(i).rand(1, 16, 16, 1)), physics=IncompressibleFlow())
+            world.step()
+            results.append(world.state)
+            self.assertEqual(set(world.physics.timings.keys()), set(world.state.keys()))
+        self.assertEqual(list(results[0].keys()), list(results[1].keys()))
+        for name in results[0].keys():
+            if name.startswith('fluid'):
+                numpy.testing.assert_equal(results[0][name].density.data, results[1][name].density.data)
+
+    def test_parallel_geometry_movement(self):
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # switch threads often so that struct contexts of different threads overlap
+        self.addCleanup(sys.setswitchinterval, switch_interval)
+        results = []
+        for threads in (None, 8):
+            world = World(threads=threads)
+            for i in range(8):
+                world.add(Inflow(Sphere([4, 4], 2), rate=0.1), physics=GeometryMovement(lambda t, i=i: Sphere([4 + t, 4 + i], 2)))
+                world.add(Obstacle(Sphere([8, 4], 1)), physics=GeometryMovement(lambda t, i=i: Sphere([8 + t, 4 + i], 1)))
+            for _ in range(30):
+                world.step()
+            grid = CenteredGrid.sample(0, Domain([40, 16]))
+            results.append([inflow.field.at(grid).data for inflow in world.state.all_with_tag('inflow')])
+        numpy.testing.assert_equal(results[0], results[1])